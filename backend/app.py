@@ -1,7 +1,9 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, session
+from flask import Flask, request, jsonify, render_template, send_from_directory, session, g
 from flask_cors import CORS
-from memory_store import MemoryStore
-from memory_indexer import MemoryIndexer
+from memory_store import get_memory_store, get_memory_store_stats
+from emotion_engine import get_emotion_cache_stats
+from memory_indexer import get_memory_indexer
+from memory_shards import MemoryShardManager
 from system_metrics import SystemMetrics
 from ai_news_routes import ai_news
 from ai_news_brain import initialize as initialize_ai_news
@@ -97,22 +99,76 @@ def api_status():
         }
     })
 
-# Initialize the memory store
-memory_store = MemoryStore()
-
-# Initialize the memory indexer
-memory_indexer = MemoryIndexer(memory_store)
-memory_indexer.rebuild_index()
+# Initialize the memory store ('log' appends each mutation instead of rewriting the file,
+# 'sqlite' keeps memories in a database that several workers can share)
+memory_store_config = {'storage_backend': os.getenv('MEMORY_STORAGE_BACKEND', 'log')}
+if os.getenv('MEMORY_STORAGE_PATH'):
+    memory_store_config['storage_path'] = os.getenv('MEMORY_STORAGE_PATH')
+# Shared with every module that falls back to get_memory_store()
+memory_store = get_memory_store(memory_store_config)
 
 # Initialize the system metrics collector
 metrics = SystemMetrics(collection_interval=60)
 metrics.start_collection()
 
+# Initialize the memory indexer; it follows store changes, so startup only reconciles the saved index.
+# Search cache hits and misses are reported as module activations. The vector index
+# for similarity search is optional, as it needs NumPy and memory for the vectors.
+memory_indexer_options = {
+    'metrics': metrics,
+    'use_vectors': os.getenv('MEMORY_VECTOR_INDEX', 'false').lower() == 'true'
+}
+memory_indexer = get_memory_indexer(memory_store, **memory_indexer_options)
+memory_indexer.sync_index()
+
+# 'user' gives signed-in users their own lazily loaded memory shard, with its own index.
+# Memories stored before switching stay in the shared store; copy them into a shard
+# with `python memory_shards.py <user_id>` first.
+memory_partitioning = os.getenv('MEMORY_PARTITIONING', 'none')
+memory_shards = None
+if memory_partitioning == 'user':
+    memory_shards = MemoryShardManager(
+        {key: value for key, value in memory_store_config.items() if key != 'storage_path'},
+        memory_budget=int(os.getenv('MEMORY_SHARD_BUDGET_MB', '64')) * 1024 * 1024,
+        indexer_options=memory_indexer_options
+    )
+
+def current_memory_user():
+    """Lease the signed-in user's memory shard for the rest of the request and get their ID (None without a shard)"""
+    user_id = session.get("user_id")
+    if memory_shards is None or not user_id:
+        return None
+    # The shard is leased until the request ends, so it cannot be closed while in use
+    if 'memory_shard_user' not in g:
+        g.memory_shard = memory_shards.acquire(user_id)
+        g.memory_shard_user = user_id
+    return g.memory_shard_user
+
+def current_memory_store():
+    """Get the memory store of the signed-in user, or the shared store"""
+    return g.memory_shard if current_memory_user() else memory_store
+
+def current_memory_indexer():
+    """Get the memory indexer of the signed-in user's shard, or the shared indexer"""
+    user_id = current_memory_user()
+    return memory_shards.get_indexer(user_id) if user_id else memory_indexer
+
+@app.teardown_request
+def release_memory_shard(exception=None):
+    """Release the memory shard leased by the request"""
+    user_id = g.pop('memory_shard_user', None)
+    if user_id is not None:
+        memory_shards.release(user_id)
+
 # Register shutdown handler to stop metrics collection when the application exits
 def shutdown_handler():
     print("Shutting down metrics collection...")
     metrics.stop_collection()
     print("Metrics collection stopped.")
+    if memory_shards is not None:
+        memory_shards.close()
+    memory_indexer.close()
+    memory_store.close()
 
 atexit.register(shutdown_handler)
 
@@ -132,7 +188,7 @@ def store_episodic_memory():
     if not data or 'input' not in data:
         return jsonify({'error': 'Invalid request data'}), 400
 
-    memory_id = memory_store.store_episodic_memory(data)
+    memory_id = current_memory_store().store_episodic_memory(data)
     return jsonify({'success': True, 'memory_id': memory_id})
 
 @app.route('/api/memory/episodic', methods=['GET'])
@@ -145,10 +201,12 @@ def retrieve_episodic_memories():
     query = {
         'text': text,
         'emotion': emotion,
-        'limit': limit
+        'limit': limit,
+        'match': request.args.get('match'),  # 'substring' keeps the old scan semantics
+        'rank': request.args.get('rank')
     }
 
-    memories = memory_store.retrieve_episodic_memories(query)
+    memories = current_memory_store().retrieve_episodic_memories(query)
     return jsonify(memories)
 
 @app.route('/api/memory/semantic/<category>', methods=['POST'])
@@ -158,14 +216,14 @@ def store_semantic_memory(category):
     if not data or 'key' not in data or 'value' not in data:
         return jsonify({'error': 'Invalid request data'}), 400
 
-    memory_store.store_semantic_memory(category, data['key'], data['value'])
+    current_memory_store().store_semantic_memory(category, data['key'], data['value'])
     return jsonify({'success': True})
 
 @app.route('/api/memory/semantic/<category>', methods=['GET'])
 def retrieve_semantic_memory(category):
     """Retrieve semantic memory by category and optional key"""
     key = request.args.get('key')
-    memory = memory_store.retrieve_semantic_memory(category, key)
+    memory = current_memory_store().retrieve_semantic_memory(category, key)
 
     if memory is None:
         return jsonify({'error': 'Memory not found'}), 404
@@ -175,13 +233,13 @@ def retrieve_semantic_memory(category):
 @app.route('/api/memory/user/summary', methods=['GET'])
 def get_user_summary():
     """Get a summary of the user based on semantic memories"""
-    summary = memory_store.get_user_summary()
+    summary = current_memory_store().get_user_summary()
     return jsonify(summary)
 
 @app.route('/api/memory/consolidate', methods=['POST'])
 def consolidate_memories():
     """Manually trigger memory consolidation"""
-    memory_store.consolidate_memories()
+    current_memory_store().consolidate_memories()
     return jsonify({'success': True, 'message': 'Memory consolidation complete'})
 
 @app.route('/api/ai-news', methods=['GET'])
@@ -226,17 +284,38 @@ def search_memories():
     if time_period:
         filters['time_period'] = time_period
 
+    # Time range: from/to are ISO timestamps or Unix times, to is exclusive
+    for param, name in (('from', 'time_from'), ('to', 'time_to'), ('last_days', 'last_days')):
+        if request.args.get(param):
+            filters[name] = request.args.get(param)
+
+    # Field boosts, e.g. boosts=input:2,response:0.5
+    field_boosts = {}
+    for boost in request.args.get('boosts', '').split(','):
+        field, _, value = boost.partition(':')
+        try:
+            field_boosts[field.strip()] = float(value)
+        except ValueError:
+            continue
+
     # Record the request in metrics
     start_time = time.time()
 
-    # Search for memories
-    memories = memory_indexer.search_memories(query, filters, limit)
+    # Search for memories; order=newest pages through matches by time with a cursor
+    indexer = current_memory_indexer()
+    try:
+        if request.args.get('order') == 'newest':
+            result = indexer.browse_memories(query, filters, limit, request.args.get('cursor'))
+        else:
+            result = indexer.search_memories(query, filters, limit, field_boosts)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid search parameter: {e}'}), 400
 
     # Record response time
     response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
     metrics.record_request('/api/memory/search', request.remote_addr, response_time)
 
-    return jsonify(memories)
+    return jsonify(result)
 
 @app.route('/api/memory/related/<memory_id>', methods=['GET'])
 @require_premium_subscription
@@ -247,8 +326,12 @@ def get_related_memories(memory_id):
     # Record the request in metrics
     start_time = time.time()
 
-    # Get related memories
-    related_memories = memory_indexer.get_related_memories(memory_id, limit)
+    # Get related memories; similar=true uses the vector index instead of cross-references
+    indexer = current_memory_indexer()
+    if request.args.get('similar', 'false').lower() == 'true':
+        related_memories = indexer.get_similar_memories(memory_id, limit)
+    else:
+        related_memories = indexer.get_related_memories(memory_id, limit)
 
     # Record response time
     response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
@@ -266,6 +349,10 @@ def get_metrics():
 
     # Get all metrics
     all_metrics = metrics.get_all_metrics()
+    all_metrics['memory_stores'] = get_memory_store_stats()
+    if memory_shards is not None:
+        all_metrics['memory_shards'] = memory_shards.get_stats()
+    all_metrics['emotion_cache'] = get_emotion_cache_stats()
 
     # Record response time
     response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
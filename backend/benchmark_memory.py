@@ -0,0 +1,366 @@
+"""
+Micro-benchmarks for the memory system.
+
+Each benchmark builds a synthetic store in a temporary directory, so running
+this script never touches the real data/ files.
+
+Usage:
+    python benchmark_memory.py
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory_store import MemoryStore
+from memory_indexer import MemoryIndexer, intersect_postings
+from text_index import analyze, light_stem
+from vector_index import NUMPY_AVAILABLE, VectorIndex, text_vector
+
+EMOTIONS = ['happy', 'sad', 'angry', 'anxious', 'surprised', 'neutral']
+WORDS = ['عمل', 'صديق', 'دراسة', 'سعادة', 'حزن', 'رياضة', 'موسيقى', 'عائلة', 'مشروع', 'سفر',
+         'work', 'friend', 'music', 'family', 'travel', 'exam', 'coffee', 'sleep', 'project', 'movie']
+
+# Arabic stems with the clitics and spelling variants they appear with in text
+ARABIC_STEMS = ['مدرسة', 'صديق', 'عمل', 'سعادة', 'حزن', 'رياضة', 'موسيقى', 'عائلة', 'مشروع', 'سفر',
+                'أمل', 'إجازة', 'كتاب', 'طبيب', 'رحلة', 'مدينة', 'لعبة', 'حديقة', 'جامعة', 'أخت']
+ARABIC_PREFIXES = ['', '', 'ال', 'وال', 'بال', 'لل', 'و']
+ARABIC_SUFFIXES = ['', '', 'ات', 'ها', 'ي', 'ين']
+DIACRITICS = ['', '', '\u064e', '\u0650', '\u064f']
+
+
+@contextmanager
+def temporary_workdir():
+    """Run inside a temporary directory so relative data/ paths stay isolated"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def synthetic_memories(count, seed=42):
+    """
+    Generate synthetic episodic memories
+
+    Args:
+        count (int): Number of memories
+        seed (int): Random seed
+
+    Returns:
+        list: Episodic memories, newest first
+    """
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+    memories = []
+    for i in range(count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(8))
+        memories.append({
+            'id': uuid.uuid4().hex,
+            'type': 'episodic',
+            'input': text,
+            'response': ' '.join(rng.choice(WORDS) for _ in range(6)),
+            'emotion': rng.choice(EMOTIONS),
+            'context': {},
+            'timestamp': (start + timedelta(seconds=i * 300)).isoformat(),
+            'importance': round(rng.uniform(0.1, 1.0), 2),
+            'retrieval_count': 0
+        })
+    memories.reverse()
+    return memories
+
+
+def build_store(count, **config):
+    """
+    Build a MemoryStore holding a synthetic snapshot in the current directory
+
+    Args:
+        count (int): Number of episodic memories
+        **config: Extra MemoryStore configuration
+
+    Returns:
+        MemoryStore: The loaded store
+    """
+    os.makedirs('data', exist_ok=True)
+    with open('data/memory_store.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'episodic_memories': synthetic_memories(count),
+            'semantic_memories': {},
+            'last_consolidation': datetime.now().isoformat()
+        }, f, ensure_ascii=False)
+
+    store_config = {'max_episodic_memories': count}
+    store_config.update(config)
+    return MemoryStore(store_config)
+
+
+def _time(fn, repeat):
+    """Average wall time of fn over repeat runs, in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def benchmark_id_lookup(sizes=(10000, 100000), repeat=20):
+    """
+    Measure search latency, which hydrates every hit through get_memory_by_id
+
+    Args:
+        sizes (tuple): Store sizes to benchmark
+        repeat (int): Number of timed runs per measurement
+    """
+    print("\n=== Benchmark: get_memory_by_id / search latency ===")
+
+    for size in sizes:
+        with temporary_workdir():
+            store = build_store(size)
+            indexer = MemoryIndexer(store)
+            indexer.rebuild_index()
+
+            ids = [memory['id'] for memory in store.episodic_memories[::max(1, size // 1000)]]
+
+            lookup_ms = _time(lambda: [store.get_memory_by_id(memory_id) for memory_id in ids], repeat)
+            search_ms = _time(lambda: indexer.search_memories('', {'emotion': 'sad'}, limit=10), repeat)
+
+            print(f"{size:>7} memories | {len(ids)} lookups: {lookup_ms:8.2f} ms "
+                  f"| emotion search: {search_ms:8.2f} ms")
+            store.close()
+
+
+def benchmark_eviction(sizes=(100, 10000, 100000), inserts=2000):
+    """
+    Measure insert cost into a full store, where every insert evicts a memory
+
+    Args:
+        sizes (tuple): Values of max_episodic_memories to benchmark
+        inserts (int): Number of timed inserts
+    """
+    print("\n=== Benchmark: insert with eviction ===")
+
+    for size in sizes:
+        with temporary_workdir():
+            store = build_store(size, storage_backend='log')
+            rng = random.Random(7)
+            texts = [' '.join(rng.choice(WORDS) for _ in range(8)) for _ in range(inserts)]
+
+            start = time.perf_counter()
+            for text in texts:
+                store.store_episodic_memory({'input': text, 'response': 'ok', 'emotion': rng.choice(EMOTIONS)})
+            insert_us = (time.perf_counter() - start) * 1e6 / inserts
+
+            assert len(store.episodic_by_id) == size
+            print(f"{size:>7} max memories | {insert_us:8.1f} us per insert")
+            store.close()
+
+
+def _set_based_matches(indexer, keywords, filters):
+    """Match memories the way search_memories did before postings were sorted"""
+    index_data = indexer.index_data
+    matching_ids = set()
+    if keywords:
+        matching_ids = set(index_data['keyword_index'].get(keywords[0], []))
+        for keyword in keywords[1:]:
+            matching_ids &= set(index_data['keyword_index'].get(keyword, []))
+    else:
+        matching_ids = set(index_data['memory_keys'].keys())
+
+    filter_indexes = {'emotion': 'emotion_index', 'time_period': 'temporal_index'}
+    for name, index_name in filter_indexes.items():
+        if name in filters:
+            matching_ids &= set(index_data[index_name].get(filters[name], []))
+    return matching_ids
+
+
+def benchmark_posting_intersection(size=50000, repeat=20):
+    """
+    Compare galloping intersection of sorted postings with set-based matching
+
+    Args:
+        size (int): Number of indexed memories
+        repeat (int): Number of timed runs per query
+    """
+    print("\n=== Benchmark: posting list intersection ===")
+
+    with temporary_workdir():
+        store = build_store(size)
+        indexer = MemoryIndexer(store)
+        # Cross-references are not needed for matching
+        for memory in store.episodic_memories:
+            indexer.index_memory(memory)
+
+        time_period = indexer._get_time_period(store.episodic_memories[0]['timestamp'])
+        queries = [
+            ('coffee', ['coffee'], {}),
+            ('coffee music + sad', ['coffee', 'music'], {'emotion': 'sad'}),
+            ('sad + this month', [], {'emotion': 'sad', 'time_period': time_period}),
+        ]
+
+        for label, keywords, filters in queries:
+            postings = [indexer.index_data['keyword_index'].get(keyword, []) for keyword in keywords]
+            postings.extend(indexer._filter_postings(filters))
+
+            expected = _set_based_matches(indexer, keywords, filters)
+            assert set(intersect_postings(postings)) == expected
+
+            set_ms = _time(lambda: _set_based_matches(indexer, keywords, filters), repeat)
+            sorted_ms = _time(lambda: intersect_postings(postings), repeat)
+            print(f"{label:>20} | {len(expected):>6} matches | sets: {set_ms:8.2f} ms "
+                  f"| sorted postings: {sorted_ms:8.2f} ms")
+        indexer.close()
+        store.close()
+
+
+def benchmark_broad_search(size=50000, repeat=5):
+    """
+    Measure top-10 searches whose queries match a large share of the memories
+
+    Args:
+        size (int): Number of indexed memories
+        repeat (int): Number of timed runs per query
+    """
+    print("\n=== Benchmark: broad search, top 10 ===")
+
+    with temporary_workdir():
+        store = build_store(size)
+        indexer = MemoryIndexer(store)
+        for memory in store.episodic_memories:
+            indexer.index_memory(memory)
+
+        for query, filters in [('coffee', None), ('coffee music', None), ('', {'emotion': 'sad'})]:
+            label = query or f"filters {filters}"
+            matches = len(indexer.search_memories(query, filters, limit=size))
+            search_ms = _time(lambda: indexer.search_memories(query, filters, limit=10), repeat)
+            print(f"{label:>24} | {matches:>6} matches | {search_ms:8.2f} ms")
+        indexer.close()
+        store.close()
+
+
+def benchmark_rebuild(sizes=(20000,)):
+    """
+    Measure a full index rebuild, including cross-references
+
+    Args:
+        sizes (tuple): Store sizes to benchmark
+    """
+    print("\n=== Benchmark: index rebuild ===")
+
+    for size in sizes:
+        with temporary_workdir():
+            store = build_store(size)
+            indexer = MemoryIndexer(store)
+
+            rebuild_ms = _time(indexer.rebuild_index, 1)
+            print(f"{size:>7} memories | rebuild: {rebuild_ms:9.1f} ms "
+                  f"| {len(indexer.index_data['cross_references'])} memories cross-referenced")
+            indexer.close()
+            store.close()
+
+
+def arabic_corpus(tokens, seed=11):
+    """
+    Generate Arabic text with varied clitics, hamza forms and diacritics
+
+    Args:
+        tokens (int): Number of words
+        seed (int): Random seed
+
+    Returns:
+        list: Sentences of about 12 words
+    """
+    rng = random.Random(seed)
+    words = []
+    for _ in range(tokens):
+        stem = rng.choice(ARABIC_STEMS)
+        if rng.random() < 0.3:
+            stem = stem.replace('أ', 'ا').replace('إ', 'ا').replace('ة', 'ه')
+        word = rng.choice(ARABIC_PREFIXES) + stem + rng.choice(ARABIC_SUFFIXES)
+        words.append(''.join(letter + rng.choice(DIACRITICS) for letter in word))
+    return [' '.join(words[i:i + 12]) + '.' for i in range(0, len(words), 12)]
+
+
+def _legacy_keywords(text):
+    """Extract keywords the way MemoryIndexer did before the shared analyzer"""
+    words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+    stopwords = ['و', 'في', 'من', 'على', 'إلى', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'تلك', 'هو', 'هي', 'أنا', 'أنت', 'نحن', 'هم']
+    return [word for word in words if word not in stopwords and len(word) > 2]
+
+
+def benchmark_analyzer(tokens=1000000):
+    """
+    Measure analyzer throughput and the size of the resulting term dictionary
+
+    Args:
+        tokens (int): Number of words in the synthetic Arabic corpus
+    """
+    print("\n=== Benchmark: keyword analyzer ===")
+
+    corpus = arabic_corpus(tokens)
+    light_stem.cache_clear()
+    for label, extract in [('legacy', _legacy_keywords), ('analyzer', analyze)]:
+        terms = set()
+        start = time.perf_counter()
+        for sentence in corpus:
+            terms.update(extract(sentence))
+        elapsed = time.perf_counter() - start
+        print(f"{label:>9} | {tokens / elapsed:12,.0f} tokens/s | {len(terms):>6} distinct terms")
+
+
+def benchmark_vector_search(size=100000, queries=200):
+    """
+    Measure exact and IVF similarity search over hashed n-gram vectors
+
+    Args:
+        size (int): Number of indexed memories
+        queries (int): Number of timed queries
+    """
+    print("\n=== Benchmark: vector similarity search ===")
+    if not NUMPY_AVAILABLE:
+        print("NumPy is not installed, skipping")
+        return
+
+    memories = synthetic_memories(size)
+    start = time.perf_counter()
+    index = VectorIndex(ivf_threshold=size + 1)  # Exact search first
+    for memory in memories:
+        index.add(memory['id'], f"{memory['input']} {memory['response']}")
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(3)
+    vectors = [text_vector(' '.join(rng.choice(WORDS) for _ in range(4)), index.dimensions) for _ in range(queries)]
+    exact = [set(memory_id for memory_id, _ in index.search(vector, 10)) for vector in vectors]
+    exact_ms = _time(lambda: [index.search(vector, 10) for vector in vectors], 1) / queries
+
+    start = time.perf_counter()
+    index.build_partitions()
+    partition_s = time.perf_counter() - start
+    index.ivf_threshold = 0
+    approximate = [set(memory_id for memory_id, _ in index.search(vector, 10)) for vector in vectors]
+    ivf_ms = _time(lambda: [index.search(vector, 10) for vector in vectors], 1) / queries
+    recall = sum(len(a & e) for a, e in zip(approximate, exact)) / sum(len(e) for e in exact)
+
+    print(f"{size:>7} memories | build: {build_s:6.1f} s | partitions: {partition_s:5.1f} s "
+          f"| {index.matrix.nbytes / 2 ** 20:.0f} MB")
+    print(f"{'':>7} top 10 | exact: {exact_ms:7.2f} ms | IVF: {ivf_ms:7.2f} ms | recall@10: {recall:.2f}")
+
+
+if __name__ == "__main__":
+    benchmark_id_lookup()
+    benchmark_eviction()
+    benchmark_posting_intersection()
+    benchmark_broad_search()
+    benchmark_rebuild()
+    benchmark_analyzer()
+    benchmark_vector_search()
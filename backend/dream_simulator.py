@@ -2,7 +2,7 @@ import json
 import random
 from datetime import datetime, timedelta
 import os
-from memory_store import MemoryStore
+from memory_store import get_memory_store
 
 class DreamSimulator:
     """
@@ -14,7 +14,7 @@ class DreamSimulator:
     
     def __init__(self, memory_store=None):
         """Initialize the dream simulator with a memory store"""
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
         self.dreams = []
         self.current_dream = None
         self.dream_influence = 0.0  # How much the dream influences responses (0.0-1.0)
@@ -4,7 +4,7 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from emotional_memory import get_last_emotion, get_emotion_timeline, log_emotion
-from emotion_engine import detect_emotion as detect_emotion_multilingual, get_emotion_in_language
+from emotion_engine import analyze_emotion, get_emotion_in_language
 from memory_store import MemoryStore
 
 class EmotionDecisionMatrix:
@@ -221,32 +221,11 @@ class EmotionDecisionMatrix:
         Returns:
             Tuple of (emotion, intensity)
         """
-        # Use the multilingual emotion detection system
-        standardized_emotion, detected_lang = detect_emotion_multilingual(text)
+        # The emotion engine measures intensity (modifiers and punctuation) in the same pass
+        analysis = analyze_emotion(text)
         # Convert to Arabic emotion name for compatibility with existing code
-        emotion = get_emotion_in_language(standardized_emotion, 'ar')
-
-        # Calculate intensity based on emotional keywords
-        intensity = 0.5  # Default medium intensity
-
-        # Simple intensity detection based on keyword repetition and modifiers
-        intensity_modifiers = {
-            "جداً": 0.3, "كثيراً": 0.3, "للغاية": 0.3, "very": 0.3, "extremely": 0.4,
-            "قليلاً": -0.2, "نوعاً ما": -0.2, "slightly": -0.2, "somewhat": -0.2
-        }
-
-        # Check for intensity modifiers
-        for modifier, value in intensity_modifiers.items():
-            if modifier in text.lower():
-                intensity += value
-
-        # Check for exclamation marks and question marks
-        intensity += text.count('!') * 0.1
-        intensity += text.count('؟') * 0.05
-        intensity += text.count('?') * 0.05
-
-        # Ensure intensity is between 0.1 and 1.0
-        intensity = max(0.1, min(intensity, 1.0))
+        emotion = get_emotion_in_language(analysis['emotion'], 'ar')
+        intensity = analysis['intensity']
 
         return emotion, intensity
 
@@ -261,8 +240,10 @@ class EmotionDecisionMatrix:
         Returns:
             Dictionary with emotional context analysis
         """
-        # Detect current emotion and intensity
-        current_emotion, intensity = self.detect_emotion(user_input)
+        # Detect current emotion, intensity and emotion probabilities
+        analysis = analyze_emotion(user_input)
+        current_emotion = get_emotion_in_language(analysis['emotion'], 'ar')
+        intensity = analysis['intensity']
 
         # Get emotion timeline
         timeline = get_emotion_timeline(session_id)
@@ -274,7 +255,7 @@ class EmotionDecisionMatrix:
         trend = self._calculate_emotional_trend(timeline, current_emotion)
 
         # Log the current emotion
-        log_emotion(session_id, current_emotion, user_input)
+        log_emotion(session_id, current_emotion, user_input, scores=analysis['scores'], intensity=intensity)
 
         # Get intensity level label
         intensity_level = "medium"
@@ -287,6 +268,7 @@ class EmotionDecisionMatrix:
             "current_emotion": current_emotion,
             "intensity": intensity,
             "intensity_level": intensity_level,
+            "emotion_scores": analysis['scores'],
             "stability": stability,
             "trend": trend,
             "timeline": timeline
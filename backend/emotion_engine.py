@@ -1,14 +1,118 @@
+import hashlib
 import os
-import re
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from emotion_engine_ar import emotion_ar
-from emotion_engine_en import emotion_en
+from emotion_lexicon import BASE_INTENSITY, EMOTIONS, analyze_text, analyze_texts
+from language_id import primary_language
+from text_index import normalize_text
+from ttl_cache import TTLCache
+
+# Process-wide cache of detect_emotion results. One chat turn runs the same text
+# through several modules, so it is only classified once.
+EMOTION_CACHE_SIZE = 4096
+EMOTION_CACHE_TTL = 300  # Seconds
+_emotion_cache = TTLCache(max_entries=EMOTION_CACHE_SIZE, ttl=EMOTION_CACHE_TTL)
+
+# Texts packed into one Gemini prompt by detect_emotions
+REMOTE_BATCH_SIZE = 50
+# Score reported for labels that came from Gemini, which gives no confidence of its own
+REMOTE_SCORE = 1.0
+
+# Analysis of empty text
+_EMPTY_ANALYSIS = {
+    'emotion': 'neutral',
+    'language': 'unknown',
+    'confidence': 0.0,
+    'scores': {emotion: 1.0 if emotion == 'neutral' else 0.0 for emotion in EMOTIONS},
+    'intensity': BASE_INTENSITY
+}
+
+# Arabic labels returned by the Gemini classifier
+_ARABIC_EMOTIONS = {
+    'حزن': 'sadness',
+    'فرح': 'happiness',
+    'غضب': 'anger',
+    'خوف': 'fear',
+    'حياد': 'neutral'
+}
+
+def remote_escalation_enabled() -> bool:
+    """
+    Check whether low-confidence texts may be sent to Gemini.
+    Controlled by EMOTION_REMOTE_ESCALATION (off by default).
+
+    Returns:
+        bool: True if remote escalation is enabled
+    """
+    return os.getenv('EMOTION_REMOTE_ESCALATION', 'false').lower() == 'true'
+
+def remote_confidence_threshold() -> float:
+    """
+    Get the lexicon confidence below which texts are escalated (EMOTION_REMOTE_THRESHOLD).
+
+    Returns:
+        float: The confidence threshold
+    """
+    return float(os.getenv('EMOTION_REMOTE_THRESHOLD', '0.5'))
+
+def _remote_emotion(text: str, language: str) -> Optional[str]:
+    """
+    Classify text with Gemini.
+    The Gemini modules are imported here so the local path works without the Google SDK.
+
+    Args:
+        text (str): The text to analyze
+        language (str): 'ar' or 'en'
+
+    Returns:
+        Optional[str]: Standardized emotion, or None if Gemini is unavailable or failed
+    """
+    try:
+        if language == 'ar':
+            from emotion_engine_ar import gemini_emotion_ar
+            return _ARABIC_EMOTIONS.get(gemini_emotion_ar(text))
+        from emotion_engine_en import gemini_emotion_en
+        return gemini_emotion_en(text)
+    except ImportError as e:
+        print(f"Error loading Gemini emotion detection: {e}")
+        return None
+
+def _remote_emotions(texts: List[str], language: str) -> List[Optional[str]]:
+    """
+    Classify many texts with Gemini, REMOTE_BATCH_SIZE texts per prompt.
+
+    Args:
+        texts (List[str]): The texts to analyze
+        language (str): 'ar' or 'en'
+
+    Returns:
+        List[Optional[str]]: Standardized emotion for each text, or None where Gemini failed
+    """
+    try:
+        if language == 'ar':
+            from emotion_engine_ar import gemini_emotions_ar as classify_batch
+        else:
+            from emotion_engine_en import gemini_emotions_en as classify_batch
+    except ImportError as e:
+        print(f"Error loading Gemini emotion detection: {e}")
+        return [None] * len(texts)
+
+    emotions = []
+    for start in range(0, len(texts), REMOTE_BATCH_SIZE):
+        emotions.extend(classify_batch(texts[start:start + REMOTE_BATCH_SIZE]))
+    if language == 'ar':
+        emotions = [_ARABIC_EMOTIONS.get(emotion) for emotion in emotions]
+    return emotions
 
 def detect_language(text: str) -> str:
     """
     Detect the language of the given text.
-    Currently supports Arabic and English.
+    Currently supports Arabic and English; Arabizi counts as Arabic and mixed text
+    takes its main script (see language_id.primary_language).
+    
+    Any Arabic character used to make the text Arabic. Mostly-Latin text with
+    a few Arabic words is now English, and Arabizi such as "ana za3lan" is
+    Arabic, which also selects the Arabic voice in memory_voice_bridge.
     
     Args:
         text (str): The text to analyze
@@ -16,22 +120,13 @@ def detect_language(text: str) -> str:
     Returns:
         str: Language code ('ar' for Arabic, 'en' for English, 'unknown' if can't determine)
     """
-    # Check for Arabic characters (Unicode range for Arabic: \u0600-\u06FF)
-    arabic_pattern = re.compile(r'[\u0600-\u06FF]')
-    if arabic_pattern.search(text):
-        return 'ar'
-    
-    # Default to English for Latin characters
-    english_pattern = re.compile(r'[a-zA-Z]')
-    if english_pattern.search(text):
-        return 'en'
-    
-    # If we can't determine the language
-    return 'unknown'
+    return primary_language(text)
 
 def detect_emotion(text: str, language: Optional[str] = None) -> Tuple[str, str]:
     """
-    Detect emotion in text using the appropriate language-specific emotion detection.
+    Detect emotion in text using the local emotion lexicon.
+    Gemini is consulted only when remote escalation is enabled and the lexicon is unsure.
+    Results are cached process-wide for EMOTION_CACHE_TTL seconds.
     
     Args:
         text (str): The text to analyze for emotion
@@ -41,36 +136,187 @@ def detect_emotion(text: str, language: Optional[str] = None) -> Tuple[str, str]
     Returns:
         Tuple[str, str]: (detected_emotion, language_used)
     """
+    analysis = _cached_analysis(text, language)
+    return (analysis['emotion'], analysis['language'])
+
+def analyze_emotion(text: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze the emotional content of text in one pass: the detected emotion, a probability
+    for each standardized emotion and the intensity. Shares the cache with detect_emotion.
+    
+    Args:
+        text (str): The text to analyze for emotion
+        language (str, optional): Language code; auto-detected if not provided
+    
+    Returns:
+        Dict[str, Any]: 'emotion', 'language', 'confidence', 'scores' (sadness, happiness,
+                        anger, fear and neutral probabilities) and 'intensity' (0.1 to 1)
+    """
+    return _copy_analysis(_cached_analysis(text, language))
+
+def detect_emotions(texts: List[str], language: Optional[str] = None) -> List[Tuple[str, str, float]]:
+    """
+    Detect emotions in many texts at once (see analyze_emotions).
+    
+    Args:
+        texts (List[str]): The texts to analyze for emotion
+        language (str, optional): Language code for all texts; auto-detected per text if not provided
+    
+    Returns:
+        List[Tuple[str, str, float]]: (detected_emotion, language_used, score) for each text, in order.
+                                      The score is the lexicon confidence, or REMOTE_SCORE for Gemini labels.
+    """
+    return [(analysis['emotion'], analysis['language'], analysis['confidence'])
+            for analysis in _cached_analyses(texts, language)]
+
+def analyze_emotions(texts: List[str], language: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Analyze many texts at once.
+    Each distinct text is analyzed once with the local lexicon. With remote escalation
+    enabled, the uncertain texts of each language are sent to Gemini packed into
+    shared prompts instead of one request per text.
+    
+    Args:
+        texts (List[str]): The texts to analyze for emotion
+        language (str, optional): Language code for all texts; auto-detected per text if not provided
+    
+    Returns:
+        List[Dict[str, Any]]: The analysis of each text, in order (see analyze_emotion)
+    """
+    return [_copy_analysis(analysis) for analysis in _cached_analyses(texts, language)]
+
+def _cached_analysis(text: str, language: Optional[str]) -> Dict[str, Any]:
+    """Analyze one text through the cache; the result is shared and must not be modified"""
     if not text:
-        return ('neutral', 'unknown')
+        return _EMPTY_ANALYSIS
+    
+    key = _cache_key(text, language)
+    analysis = _emotion_cache.get(key)
+    if analysis is None:
+        analysis = _analyze(text, language)
+        _emotion_cache.put(key, analysis)
+    return analysis
+
+def _cached_analyses(texts: List[str], language: Optional[str]) -> List[Dict[str, Any]]:
+    """Analyze many texts through the cache; the results are shared and must not be modified"""
+    results = [_EMPTY_ANALYSIS] * len(texts)
+    
+    # Group the positions of each distinct text that is not cached yet
+    pending = {}
+    for position, text in enumerate(texts):
+        if not text:
+            continue
+        key = _cache_key(text, language)
+        cached = _emotion_cache.get(key)
+        if cached is not None:
+            results[position] = cached
+        else:
+            pending.setdefault(key, []).append(position)
+    
+    # Analyze locally in one lexicon scan, grouping uncertain texts by language for Gemini
+    analyses = {}
+    uncertain = {}
+    threshold = remote_confidence_threshold()
+    escalate = remote_escalation_enabled()
+    pending_texts = [texts[positions[0]] for positions in pending.values()]
+    for key, text, analysis in zip(pending, pending_texts, analyze_texts(pending_texts)):
+        analysis['language'] = _resolve_language(text, language)
+        analyses[key] = analysis
+        if escalate and analysis['confidence'] < threshold:
+            uncertain.setdefault(analysis['language'], []).append(key)
     
+    for text_language, keys in uncertain.items():
+        emotions = _remote_emotions([texts[pending[key][0]] for key in keys], text_language)
+        for key, emotion in zip(keys, emotions):
+            if emotion:
+                _apply_remote_emotion(analyses[key], emotion)
+    
+    for key, analysis in analyses.items():
+        _emotion_cache.put(key, analysis)
+        for position in pending[key]:
+            results[position] = analysis
+    return results
+
+def _copy_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a cached analysis so callers can modify it"""
+    return dict(analysis, scores=dict(analysis['scores']))
+
+def _apply_remote_emotion(analysis: Dict[str, Any], emotion: str):
+    """Replace the lexicon result of an analysis with a Gemini label"""
+    analysis['emotion'] = emotion
+    analysis['confidence'] = REMOTE_SCORE
+    analysis['scores'] = {name: 1.0 if name == emotion else 0.0 for name in EMOTIONS}
+
+def _resolve_language(text: str, language: Optional[str]) -> str:
+    """
+    Pick the language used for a text: the requested one, or the detected one.
+    Unsupported languages are treated as English.
+    
+    Args:
+        text (str): The text to analyze
+        language (str, optional): The requested language code
+    
+    Returns:
+        str: 'ar' or 'en'
+    """
     # Auto-detect language if not specified
     if not language:
         language = detect_language(text)
     
-    # Route to the appropriate language-specific emotion detection
-    if language == 'ar':
-        emotion = emotion_ar(text)
-        # Map Arabic emotion names to standardized format if needed
-        emotion_map = {
-            'حزن': 'sadness',
-            'فرح': 'happiness',
-            'غضب': 'anger',
-            'خوف': 'fear',
-            'حياد': 'neutral'
-        }
-        standardized_emotion = emotion_map.get(emotion, 'neutral')
-        return (standardized_emotion, 'ar')
-    
-    elif language == 'en':
-        emotion = emotion_en(text)
-        return (emotion, 'en')
-    
-    # Fallback to English for unsupported languages
-    else:
+    if language not in ('ar', 'en'):
         print(f"Language '{language}' not supported for emotion detection. Falling back to English.")
-        emotion = emotion_en(text)
-        return (emotion, 'en')
+        language = 'en'
+    return language
+
+def _cache_key(text: str, language: Optional[str]) -> Tuple[bytes, str]:
+    """
+    Build the emotion cache key: a digest of the normalized text plus the requested language.
+    Case, Arabic spelling variants and whitespace do not change the result, so they share a key.
+    
+    Args:
+        text (str): The text to analyze
+        language (str, optional): The requested language code
+    
+    Returns:
+        Tuple[bytes, str]: The cache key
+    """
+    normalized = ' '.join(normalize_text(text).split())
+    return (hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest(), language or '')
+
+def _analyze(text: str, language: Optional[str]) -> Dict[str, Any]:
+    """
+    Analyze text without the cache (see analyze_emotion).
+    
+    Args:
+        text (str): The text to analyze for emotion
+        language (str, optional): Language code; auto-detected if not provided
+    
+    Returns:
+        Dict[str, Any]: The analysis
+    """
+    analysis = analyze_text(text)
+    analysis['language'] = _resolve_language(text, language)
+    
+    # The local lexicon handles both languages; Gemini is only asked when it is unsure
+    if analysis['confidence'] < remote_confidence_threshold() and remote_escalation_enabled():
+        emotion = _remote_emotion(text, analysis['language'])
+        if emotion:
+            _apply_remote_emotion(analysis, emotion)
+    
+    return analysis
+
+def get_emotion_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss statistics of the emotion detection cache.
+    
+    Returns:
+        Dict[str, Any]: Entry count, hits, misses, hit rate and limits
+    """
+    return _emotion_cache.get_stats()
+
+def clear_emotion_cache():
+    """Drop all cached emotion detection results."""
+    _emotion_cache.clear()
 
 def get_emotion_in_language(emotion: str, target_language: str) -> str:
     """
@@ -1,18 +1,27 @@
+import json
 import os
+import re
+from typing import List, Optional
+
+from emotion_lexicon import classify_emotion
 from google_model_client import generate_response
 
-def emotion_ar(text: str) -> str:
+# Emotion labels Gemini is asked to answer with
+GEMINI_LABELS = ('حزن', 'فرح', 'غضب', 'خوف', 'حياد')
+
+# Standardized emotion names to the Arabic labels used by this module
+ARABIC_LABELS = {'sadness': 'حزن', 'happiness': 'فرح', 'anger': 'غضب', 'fear': 'خوف', 'neutral': 'حياد'}
+
+def gemini_emotion_ar(text: str) -> Optional[str]:
     """
     Detect emotion in Arabic text using Google Gemini AI.
-    Falls back to keyword-based detection if AI detection fails.
 
     Args:
         text (str): The text to analyze for emotion
 
     Returns:
-        str: The detected emotion (حزن, فرح, غضب, خوف, حياد)
+        Optional[str]: The detected emotion (حزن, فرح, غضب, خوف, حياد), or None if Gemini failed
     """
-    # First try using Gemini for emotion detection
     try:
         # Create a prompt for Gemini to analyze the emotion
         prompt = f"""
@@ -42,20 +51,62 @@ def emotion_ar(text: str) -> str:
         elif "حياد" in response:
             return "حياد"
 
-        # If we couldn't extract a valid emotion, fall back to keyword-based detection
-        print(f"Gemini returned unexpected emotion format: {response}. Falling back to keyword detection.")
+        print(f"Gemini returned unexpected emotion format: {response}.")
     except Exception as e:
-        # Log the error and fall back to keyword-based detection
-        print(f"Error using Gemini for emotion detection: {str(e)}. Falling back to keyword detection.")
-
-    # Fallback: Keyword-based emotion detection
-    sad = ["حزين", "ضايق", "دموع", "تعبان"]
-    joy = ["فرحان", "سعيد", "مبسوط", "نجحت"]
-    anger = ["زعلان", "عصبت", "قهرت", "غضبان"]
-    fear = ["خايف", "مرعوب", "قلقان", "توتر"]
-
-    if any(w in text for w in sad): return "حزن"
-    if any(w in text for w in joy): return "فرح"
-    if any(w in text for w in anger): return "غضب"
-    if any(w in text for w in fear): return "خوف"
-    return "حياد"
+        print(f"Error using Gemini for emotion detection: {str(e)}.")
+    return None
+
+def gemini_emotions_ar(texts: List[str]) -> List[Optional[str]]:
+    """
+    Detect emotions in many Arabic texts with a single Gemini prompt.
+
+    Args:
+        texts (List[str]): The texts to analyze for emotion
+
+    Returns:
+        List[Optional[str]]: The detected emotion (حزن, فرح, غضب, خوف, حياد) for each text,
+                             or None for texts Gemini gave no valid answer for
+    """
+    try:
+        prompt = f"""
+        تحليل المشاعر في كل نص من النصوص التالية (قائمة JSON):
+
+        {json.dumps(texts, ensure_ascii=False)}
+
+        لكل نص، حدد المشاعر الأساسية (حزن، فرح، غضب، خوف، حياد).
+        أعطني فقط قائمة JSON بنفس الترتيب وبنفس عدد النصوص، كل عنصر فيها كلمة واحدة من: حزن، فرح، غضب، خوف، حياد.
+        """
+
+        # Call Gemini API
+        response = generate_response(prompt, model_type="vertex_gemini")
+
+        # Extract the JSON list from the response
+        match = re.search(r'\[.*\]', response, re.DOTALL)
+        answers = json.loads(match.group(0)) if match else None
+        if isinstance(answers, list) and len(answers) == len(texts):
+            return [next((label for label in GEMINI_LABELS if label in str(answer).lower()), None)
+                    for answer in answers]
+
+        print(f"Gemini returned unexpected emotion list format: {response}.")
+    except Exception as e:
+        print(f"Error using Gemini for batch emotion detection: {str(e)}.")
+    return [None] * len(texts)
+
+def emotion_ar(text: str) -> str:
+    """
+    Detect emotion in Arabic text using Google Gemini AI.
+    Falls back to the local emotion lexicon if AI detection fails.
+
+    Args:
+        text (str): The text to analyze for emotion
+
+    Returns:
+        str: The detected emotion (حزن, فرح, غضب, خوف, حياد)
+    """
+    emotion = gemini_emotion_ar(text)
+    if emotion:
+        return emotion
+
+    print("Falling back to lexicon detection.")
+    emotion, _ = classify_emotion(text)
+    return ARABIC_LABELS[emotion]
@@ -1,18 +1,24 @@
+import json
 import os
+import re
+from typing import List, Optional
+
+from emotion_lexicon import classify_emotion
 from google_model_client import generate_response
 
-def emotion_en(text: str) -> str:
+# Emotion labels Gemini is asked to answer with
+GEMINI_LABELS = ('sadness', 'happiness', 'anger', 'fear', 'neutral')
+
+def gemini_emotion_en(text: str) -> Optional[str]:
     """
     Detect emotion in English text using Google Gemini AI.
-    Falls back to keyword-based detection if AI detection fails.
 
     Args:
         text (str): The text to analyze for emotion
 
     Returns:
-        str: The detected emotion (sadness, happiness, anger, fear, neutral)
+        Optional[str]: The detected emotion (sadness, happiness, anger, fear, neutral), or None if Gemini failed
     """
-    # First try using Gemini for emotion detection
     try:
         # Create a prompt for Gemini to analyze the emotion
         prompt = f"""
@@ -42,20 +48,62 @@ def emotion_en(text: str) -> str:
         elif "neutral" in response:
             return "neutral"
 
-        # If we couldn't extract a valid emotion, fall back to keyword-based detection
-        print(f"Gemini returned unexpected emotion format: {response}. Falling back to keyword detection.")
+        print(f"Gemini returned unexpected emotion format: {response}.")
+    except Exception as e:
+        print(f"Error using Gemini for emotion detection: {str(e)}.")
+    return None
+
+def gemini_emotions_en(texts: List[str]) -> List[Optional[str]]:
+    """
+    Detect emotions in many English texts with a single Gemini prompt.
+
+    Args:
+        texts (List[str]): The texts to analyze for emotion
+
+    Returns:
+        List[Optional[str]]: The detected emotion (sadness, happiness, anger, fear, neutral) for each text,
+                             or None for texts Gemini gave no valid answer for
+    """
+    try:
+        prompt = f"""
+        Analyze the emotion in each of the following texts (a JSON list):
+
+        {json.dumps(texts, ensure_ascii=False)}
+
+        For each text, identify the primary emotion (sadness, happiness, anger, fear, neutral).
+        Respond with only a JSON list in the same order and with the same number of items, each one of these words: sadness, happiness, anger, fear, neutral.
+        """
+
+        # Call Gemini API
+        response = generate_response(prompt, model_type="vertex_gemini")
+
+        # Extract the JSON list from the response
+        match = re.search(r'\[.*\]', response, re.DOTALL)
+        answers = json.loads(match.group(0)) if match else None
+        if isinstance(answers, list) and len(answers) == len(texts):
+            return [next((label for label in GEMINI_LABELS if label in str(answer).lower()), None)
+                    for answer in answers]
+
+        print(f"Gemini returned unexpected emotion list format: {response}.")
     except Exception as e:
-        # Log the error and fall back to keyword-based detection
-        print(f"Error using Gemini for emotion detection: {str(e)}. Falling back to keyword detection.")
-
-    # Fallback: Keyword-based emotion detection
-    sad = ["sad", "upset", "unhappy", "depressed", "miserable", "heartbroken"]
-    happy = ["happy", "joyful", "excited", "delighted", "pleased", "cheerful"]
-    angry = ["angry", "mad", "furious", "annoyed", "irritated", "outraged"]
-    fearful = ["afraid", "scared", "terrified", "anxious", "worried", "frightened"]
-
-    if any(w in text.lower() for w in sad): return "sadness"
-    if any(w in text.lower() for w in happy): return "happiness"
-    if any(w in text.lower() for w in angry): return "anger"
-    if any(w in text.lower() for w in fearful): return "fear"
-    return "neutral"
\ No newline at end of file
+        print(f"Error using Gemini for batch emotion detection: {str(e)}.")
+    return [None] * len(texts)
+
+def emotion_en(text: str) -> str:
+    """
+    Detect emotion in English text using Google Gemini AI.
+    Falls back to the local emotion lexicon if AI detection fails.
+
+    Args:
+        text (str): The text to analyze for emotion
+
+    Returns:
+        str: The detected emotion (sadness, happiness, anger, fear, neutral)
+    """
+    emotion = gemini_emotion_en(text)
+    if emotion:
+        return emotion
+
+    print("Falling back to lexicon detection.")
+    emotion, _ = classify_emotion(text)
+    return emotion
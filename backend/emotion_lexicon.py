@@ -0,0 +1,347 @@
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+from text_index import normalize_text
+
+# Standardized emotions, in the order used to break ties
+EMOTIONS = ('sadness', 'happiness', 'anger', 'fear', 'neutral')
+
+# Weighted lexicon: emotion -> {term: weight}. Arabic terms are matched with
+# common clitics before them and inflection suffixes after them, English terms
+# with the usual inflection suffixes. Terms may span several words.
+ARABIC_LEXICON = {
+    'sadness': {
+        'حزين': 1.0, 'حزن': 1.0, 'ضايق': 0.8, 'متضايق': 0.9, 'دموع': 0.8, 'تعبان': 0.6,
+        'بكيت': 0.9, 'ابكي': 0.9, 'بكاء': 0.8, 'مكتئب': 1.2, 'اكتئاب': 1.2, 'كئيب': 1.0,
+        'وحيد': 0.7, 'حسره': 0.8, 'مجروح': 0.8, 'فراق': 0.8, 'يائس': 1.0, 'محبط': 1.0,
+        'احباط': 1.0, 'مكسور': 0.8, 'ضيق': 0.7, 'مهموم': 1.0, 'زهقان': 0.7,
+    },
+    'happiness': {
+        'فرحان': 1.0, 'فرح': 1.0, 'سعيد': 1.0, 'سعاده': 1.0, 'مبسوط': 1.0, 'نجحت': 0.8,
+        'مسرور': 1.0, 'مبتهج': 1.0, 'ممتن': 0.8, 'الحمد لله': 0.5, 'رائع': 0.8, 'ممتاز': 0.7,
+        'متحمس': 0.8, 'احب': 0.6, 'مرتاح': 0.6, 'شكرا': 0.4, 'يسعدني': 0.9, 'اشتقت': 0.5,
+    },
+    'anger': {
+        'زعلان': 0.8, 'عصبت': 1.0, 'معصب': 1.0, 'عصبي': 0.8, 'قهرت': 0.9, 'مقهور': 0.9,
+        'غضبان': 1.0, 'غاضب': 1.0, 'غضب': 1.0, 'اكره': 1.0, 'كرهت': 1.0, 'مزعج': 0.7,
+        'منزعج': 0.8, 'ازعاج': 0.6, 'مستفز': 0.8, 'متنرفز': 0.9, 'طفشت': 0.6,
+    },
+    'fear': {
+        'خايف': 1.0, 'خائف': 1.0, 'خوف': 1.0, 'مرعوب': 1.2, 'رعب': 1.0, 'قلقان': 0.9,
+        'قلق': 0.9, 'توتر': 0.8, 'متوتر': 0.9, 'مذعور': 1.2, 'فزع': 1.0, 'مرتعب': 1.2,
+    },
+}
+
+ENGLISH_LEXICON = {
+    'sadness': {
+        'sad': 1.0, 'unhappy': 1.0, 'upset': 0.8, 'depressed': 1.2, 'miserable': 1.2,
+        'heartbroken': 1.2, 'lonely': 0.8, 'cry': 0.8, 'tears': 0.7, 'gloomy': 0.9,
+        'hopeless': 1.1, 'disappointed': 0.9, 'grief': 1.1, 'sorrow': 1.0, 'hurt': 0.7,
+        'devastated': 1.3,
+    },
+    'happiness': {
+        'happy': 1.0, 'joyful': 1.0, 'joy': 1.0, 'excited': 0.9, 'delighted': 1.1,
+        'pleased': 0.8, 'cheerful': 1.0, 'glad': 0.9, 'great': 0.5, 'wonderful': 0.8,
+        'amazing': 0.8, 'love': 0.6, 'thrilled': 1.1, 'grateful': 0.8, 'thankful': 0.7,
+        'proud': 0.7, 'awesome': 0.7,
+    },
+    'anger': {
+        'angry': 1.0, 'mad': 0.8, 'furious': 1.3, 'annoyed': 0.8, 'irritated': 0.8,
+        'outraged': 1.3, 'hate': 1.0, 'pissed': 1.0, 'frustrated': 0.9, 'rage': 1.2,
+        'livid': 1.3, 'fed up': 0.9,
+    },
+    'fear': {
+        'afraid': 1.0, 'scared': 1.0, 'terrified': 1.3, 'anxious': 0.9, 'worried': 0.9,
+        'worry': 0.8, 'frightened': 1.1, 'nervous': 0.8, 'panic': 1.1, 'fear': 1.0,
+        'scary': 0.9, 'dread': 1.0, 'freaking out': 1.0,
+    },
+}
+
+# Words that scale the nearest emotion term (after it in Arabic, usually before it in English)
+INTENSIFIERS = {
+    'جدا': 1.5, 'كثير': 1.4, 'كثيرا': 1.4, 'مره': 1.3, 'للغايه': 1.8, 'شديد': 1.5, 'شديده': 1.5,
+    'الشديد': 1.5, 'الشديده': 1.5, 'بشده': 1.5,
+    'تماما': 1.4, 'اوي': 1.4, 'قوي': 1.3, 'شوي': 0.7, 'قليلا': 0.7, 'نوعا ما': 0.7,
+    'very': 1.5, 'really': 1.4, 'so': 1.3, 'extremely': 1.8, 'too': 1.3, 'super': 1.5,
+    'totally': 1.4, 'incredibly': 1.7, 'quite': 1.2, 'deeply': 1.6, 'absolutely': 1.6,
+    'slightly': 0.6, 'somewhat': 0.7, 'a bit': 0.6, 'a little': 0.6, 'kinda': 0.7,
+}
+
+NEGATIONS = (
+    'لا', 'لست', 'ليس', 'ليست', 'لم', 'لن', 'ما', 'مش', 'مو', 'مب', 'مافي', 'بدون',
+    'not', 'no', 'never', 'nothing', 'without', 'nor', 'cannot',
+)
+
+# A negation applies to emotion terms within this many following words
+NEGATION_WINDOW = 3
+# A negated term counts at this fraction of its weight, for the emotion in NEGATION_SHIFT
+# ("not happy" leans sad, "not afraid" is just not afraid)
+NEGATED_WEIGHT = 0.5
+NEGATION_SHIFT = {'happiness': 'sadness'}
+
+# Confidence reported for text without any lexicon evidence
+NO_EVIDENCE_CONFIDENCE = 0.3
+
+# Intensity starts at BASE_INTENSITY and moves INTENSITY_STEP for every doubling
+# (or halving) factor of an intensifier, plus a little for each exclamation or
+# question mark. It is kept between MIN_INTENSITY and 1.
+BASE_INTENSITY = 0.5
+INTENSITY_STEP = 0.5
+PUNCTUATION_INTENSITY = {'!': 0.1, '?': 0.05, '؟': 0.05}
+MIN_INTENSITY = 0.1
+
+_ARABIC_CLITICS = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال', 'و', 'ف', 'ب', 'ل', 'ك')
+_ARABIC_SUFFIXES = ('ها', 'هم', 'كم', 'نا', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي', 'ك', 'ت', 'ا')
+_ENGLISH_SUFFIXES = ('ness', 'ing', 'ed', 'es', 'ly', 'd', 's')
+
+
+def _normalized_key(phrase):
+    """Normalize a lexicon phrase the same way as scanned text"""
+    return ' '.join(normalize_text(phrase).split())
+
+
+def _build_lookup(lexicon):
+    """Flatten an emotion lexicon into {normalized term: (emotion, weight)}"""
+    return {_normalized_key(term): (emotion, weight)
+            for emotion, terms in lexicon.items() for term, weight in terms.items()}
+
+
+def _alternation(words):
+    """
+    Regex matching any of the phrases, built as a character trie
+
+    A plain alternation makes the regex engine try every phrase at each word;
+    the trie only follows the characters actually present. Longer phrases are
+    tried first, so the longest phrase wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in ' '.join(word.split()):
+            node = node.setdefault(char, {})
+        node[''] = {}  # A phrase ends here
+    return _trie_pattern(trie)
+
+
+def _trie_pattern(node):
+    """Regex for the phrases below a trie node (see _alternation)"""
+    branches = [(r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # Greedy, so continuing to a longer phrase is tried before ending here
+    return '(?:' + pattern + ')?' if '' in node else pattern
+
+
+_TERMS = {**_build_lookup(ENGLISH_LEXICON), **_build_lookup(ARABIC_LEXICON)}
+_ARABIC_TERMS = [_normalized_key(term) for terms in ARABIC_LEXICON.values() for term in terms]
+_ENGLISH_TERMS = [_normalized_key(term) for terms in ENGLISH_LEXICON.values() for term in terms]
+_INTENSIFIERS = {_normalized_key(word): factor for word, factor in INTENSIFIERS.items()}
+_NEGATIONS = [_normalized_key(word) for word in NEGATIONS]
+
+# One pass over the text: every match is a negation, an intensifier, a lexicon
+# term, a punctuation mark or the end of a text in a batch (see scan_texts).
+# Other words are not matched; they are counted in the gaps between matches.
+_SCAN_PATTERN = re.compile(
+    r"(?<!\w)(?:"
+    rf"(?P<negation>\w+n['’]t|{_alternation(_NEGATIONS)})"
+    rf"|(?P<intensifier>{_alternation(_INTENSIFIERS)})"
+    rf"|(?:{_alternation(_ARABIC_CLITICS)})?(?P<arabic>{_alternation(_ARABIC_TERMS)})(?:{_alternation(_ARABIC_SUFFIXES)})?"
+    rf"|(?P<english>{_alternation(_ENGLISH_TERMS)})(?:{_alternation(_ENGLISH_SUFFIXES)})?"
+    r")(?!\w)"
+    r"|(?P<mark>[!?؟])"
+    r"|(?P<end>\x00)"
+)
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+# Ends each text of a batch scan; no lexicon phrase or word can match across it
+_TEXT_END = '\x00'
+
+
+def scan_text(text: str) -> Tuple[Dict[str, float], float]:
+    """
+    Score text against the emotion lexicon and measure its intensity in a single scan
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        Tuple[Dict[str, float], float]: (evidence for each standardized emotion, intensity).
+            The evidence is all zero without lexicon hits.
+    """
+    return scan_texts([text])[0]
+
+
+def scan_texts(texts: List[str]) -> List[Tuple[Dict[str, float], float]]:
+    """
+    Score many texts against the emotion lexicon in a single scan
+
+    The normalized texts are joined, each followed by a separator that no
+    lexicon phrase can cross, and scanned by one pass of the pattern; every
+    separator match closes the text before it.
+
+    Args:
+        texts (List[str]): The texts to analyze
+
+    Returns:
+        List[Tuple[Dict[str, float], float]]: (evidence, intensity) for each text, in order (see scan_text)
+    """
+    batch = ''.join(normalize_text(text).replace(_TEXT_END, ' ') + _TEXT_END if text else _TEXT_END
+                    for text in texts)
+    return list(_scan(batch))
+
+
+def _scan(batch):
+    """Yield (evidence, intensity) for each text of a joined batch, in order"""
+    scores = dict.fromkeys(EMOTIONS, 0.0)
+    intensity = BASE_INTENSITY
+    position = 0
+    negated_until = -1
+    boost = 1.0
+    boost_position = -1
+    last_hit = None  # [emotion, weight, position] of the latest term
+
+    gap_start = 0
+    for match in _SCAN_PATTERN.finditer(batch):
+        kind = match.lastgroup
+        if kind == 'mark':
+            intensity += PUNCTUATION_INTENSITY[match.group(kind)]
+            continue
+        if kind == 'end':
+            yield scores, max(MIN_INTENSITY, min(intensity, 1.0))
+            scores = dict.fromkeys(EMOTIONS, 0.0)
+            intensity = BASE_INTENSITY
+            position = 0
+            negated_until = -1
+            boost = 1.0
+            boost_position = -1
+            last_hit = None
+            gap_start = match.end()
+            continue
+
+        # Words between the previous match and this one advance the position
+        position += len(_WORD_PATTERN.findall(batch, gap_start, match.start()))
+        gap_start = match.end()
+        if kind == 'negation':
+            negated_until = position + NEGATION_WINDOW
+        elif kind == 'intensifier':
+            factor = _INTENSIFIERS[' '.join(match.group(kind).split())]
+            intensity += INTENSITY_STEP * math.log2(factor)
+            if last_hit is not None and last_hit[2] == position - 1:
+                # "سعيد جدا": scale the term just before
+                scores[last_hit[0]] += last_hit[1] * (factor - 1)
+                last_hit[1] *= factor
+                last_hit[2] = position
+            else:
+                boost *= factor
+                boost_position = position
+        else:
+            emotion, weight = _TERMS[' '.join(match.group(kind).split())]
+            if position - boost_position <= 2:
+                weight *= boost
+            boost = 1.0
+            boost_position = -1
+            if position <= negated_until:
+                emotion = NEGATION_SHIFT.get(emotion, 'neutral')
+                weight *= NEGATED_WEIGHT
+            scores[emotion] += weight
+            last_hit = [emotion, weight, position]
+        position += 1
+
+
+def score_emotions(text: str) -> Dict[str, float]:
+    """
+    Score text against the emotion lexicon
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        Dict[str, float]: Evidence for each standardized emotion (all zero without lexicon hits)
+    """
+    return scan_text(text)[0]
+
+
+def emotion_distribution(scores: Dict[str, float]) -> Dict[str, float]:
+    """
+    Turn lexicon evidence into a probability distribution over the standardized emotions
+
+    Args:
+        scores (Dict[str, float]): Evidence for each emotion
+
+    Returns:
+        Dict[str, float]: Share of the evidence per emotion; all neutral without evidence
+    """
+    total = sum(scores.values())
+    if not total:
+        return {emotion: 1.0 if emotion == 'neutral' else 0.0 for emotion in EMOTIONS}
+    return {emotion: scores.get(emotion, 0.0) / total for emotion in EMOTIONS}
+
+
+def _classify_scores(scores: Dict[str, float]) -> Tuple[str, float]:
+    """Pick the emotion with the most evidence and its confidence (see classify_emotion)"""
+    total = sum(scores.values())
+    if not total:
+        return ('neutral', NO_EVIDENCE_CONFIDENCE)
+
+    emotion = max(EMOTIONS, key=lambda name: (scores[name], -EMOTIONS.index(name)))
+    share = scores[emotion] / total
+    return (emotion, share * (1 - math.exp(-2 * total)))
+
+
+def classify_emotion(text: str) -> Tuple[str, float]:
+    """
+    Classify text into one of the standardized emotions using the lexicon
+
+    Confidence grows with the share of evidence held by the winning emotion
+    and with the amount of evidence, so a single weak term or a mix of
+    conflicting terms gives a low value.
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        Tuple[str, float]: (emotion, confidence between 0 and 1)
+    """
+    return _classify_scores(score_emotions(text))
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """
+    Classify text and describe its emotional content from a single scan
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        Dict[str, Any]: 'emotion' and 'confidence' as from classify_emotion, 'scores'
+            (probability of each standardized emotion) and 'intensity' (0.1 to 1)
+    """
+    return _describe(*scan_text(text))
+
+
+def _describe(scores: Dict[str, float], intensity: float) -> Dict[str, Any]:
+    """Build the analysis of a text from its evidence and intensity (see analyze_text)"""
+    emotion, confidence = _classify_scores(scores)
+    return {
+        'emotion': emotion,
+        'confidence': confidence,
+        'scores': emotion_distribution(scores),
+        'intensity': intensity
+    }
+
+
+def analyze_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Analyze many texts from a single batch scan (see analyze_text and scan_texts)
+
+    Args:
+        texts (List[str]): The texts to analyze
+
+    Returns:
+        List[Dict[str, Any]]: The analysis of each text, in order
+    """
+    return [_describe(scores, intensity) for scores, intensity in scan_texts(texts)]
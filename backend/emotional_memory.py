@@ -1,15 +1,23 @@
 from datetime import datetime
+from typing import Dict, Optional
 
 _memory = {}
 
-def log_emotion(session_id: str, emotion: str, text: str):
-    if session_id not in _memory:
-        _memory[session_id] = []
-    _memory[session_id].append({
+def log_emotion(session_id: str, emotion: str, text: str,
+                scores: Optional[Dict[str, float]] = None, intensity: Optional[float] = None):
+    record = {
         "emotion": emotion,
         "text": text,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    # Emotion probabilities and intensity from emotion_engine.analyze_emotion, when known
+    if scores is not None:
+        record["scores"] = scores
+    if intensity is not None:
+        record["intensity"] = intensity
+    if session_id not in _memory:
+        _memory[session_id] = []
+    _memory[session_id].append(record)
 
 def get_last_emotion(session_id: str):
     if session_id in _memory and _memory[session_id]:
@@ -22,7 +22,7 @@ from datetime import datetime, timedelta
 
 from emotional_memory import get_emotion_timeline, get_last_emotion
 from memory_store import MemoryStore
-from emotion_engine import detect_emotion, get_emotion_in_language
+from emotion_engine import detect_emotions, get_emotion_in_language
 
 class EmotionalMotivationSystem:
     """
@@ -315,10 +315,15 @@ class EmotionalMotivationSystem:
                 "confidence": 0.0
             }
         
+        # Records logged without an emotion are classified from their text, in one batch
+        unlabeled = [record for record in timeline if not record.get("emotion") and record.get("text")]
+        detected = {id(record): emotion for record, (emotion, _, _) in
+                    zip(unlabeled, detect_emotions([record["text"] for record in unlabeled]))}
+        
         # Standardize emotions in timeline
         standardized_timeline = []
         for record in timeline:
-            emotion = record.get("emotion", "neutral")
+            emotion = record.get("emotion") or detected.get(id(record), "neutral")
             # Convert Arabic emotion names to standardized format if needed
             if emotion in ["حزن", "فرح", "غضب", "خوف", "حياد"]:
                 emotion_map = {
@@ -21,7 +21,7 @@ from datetime import datetime, timedelta
 
 from emotional_memory import get_emotion_timeline, get_last_emotion
 from memory_store import MemoryStore
-from emotion_engine import get_emotion_in_language
+from emotion_engine import detect_emotions, get_emotion_in_language
 
 class EmotionalSelfAwareness:
     """
@@ -240,9 +240,14 @@ class EmotionalSelfAwareness:
         """
         triggers = {}
         
+        # Records logged without an emotion are classified from their text, in one batch
+        unlabeled = [record for record in timeline if not record.get("emotion") and record.get("text")]
+        detected = {id(record): emotion for record, (emotion, _, _) in
+                    zip(unlabeled, detect_emotions([record["text"] for record in unlabeled]))}
+        
         # Extract potential triggers from text
         for record in timeline:
-            emotion = self._standardize_emotion(record["emotion"])
+            emotion = self._standardize_emotion(record.get("emotion") or detected.get(id(record), "neutral"))
             text = record.get("text", "")
             
             # Skip neutral emotions or empty text
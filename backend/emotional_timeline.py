@@ -198,6 +198,10 @@ class EmotionalTimeline:
                     "color": self.emotion_colors.get(emotion, "#f8f8f2")
                 }
                 
+                # Add intensity if it was logged
+                if "intensity" in record:
+                    data_point["intensity"] = record["intensity"]
+                
                 # Add text sample if configured
                 if self.config["include_text_samples"]:
                     data_point["text"] = record.get("text", "")
@@ -223,11 +227,8 @@ class EmotionalTimeline:
         
         for record in timeline:
             try:
-                # Standardize emotion
-                emotion = self._standardize_emotion(record["emotion"])
-                
                 # Get valence
-                valence = self.emotion_valence.get(emotion, 0.0)
+                valence = self._record_valence(record)
                 
                 # Create data point
                 data_point = {
@@ -263,7 +264,7 @@ class EmotionalTimeline:
         for record in timeline:
             try:
                 emotion = self._standardize_emotion(record["emotion"])
-                valence = self.emotion_valence.get(emotion, 0.0)
+                valence = self._record_valence(record)
                 valence_timeline.append({
                     "timestamp": record["timestamp"],
                     "emotion": emotion,
@@ -336,9 +337,7 @@ class EmotionalTimeline:
         valence_values = []
         for record in timeline:
             try:
-                emotion = self._standardize_emotion(record["emotion"])
-                valence = self.emotion_valence.get(emotion, 0.0)
-                valence_values.append(valence)
+                valence_values.append(self._record_valence(record))
             except KeyError:
                 # Skip records with missing required fields
                 continue
@@ -404,9 +403,7 @@ class EmotionalTimeline:
         valence_timeline = []
         for record in timeline:
             try:
-                emotion = self._standardize_emotion(record["emotion"])
-                valence = self.emotion_valence.get(emotion, 0.0)
-                valence_timeline.append(valence)
+                valence_timeline.append(self._record_valence(record))
             except KeyError:
                 # Skip records with missing required fields
                 continue
@@ -435,6 +432,28 @@ class EmotionalTimeline:
         else:
             return "deteriorating"
     
+    def _record_valence(self, record: Dict) -> float:
+        """
+        Get the valence of an emotion record.
+        
+        Records logged with emotion probabilities use the expected valence over
+        all emotions, so mixed or weak emotions count less than clear ones.
+        
+        Args:
+            record: Emotion record
+            
+        Returns:
+            Valence between -1.0 and 1.0
+            
+        Raises:
+            KeyError: If the record has no emotion
+        """
+        emotion = self._standardize_emotion(record["emotion"])
+        scores = record.get("scores")
+        if scores:
+            return sum(self.emotion_valence.get(name, 0.0) * probability for name, probability in scores.items())
+        return self.emotion_valence.get(emotion, 0.0)
+    
     def _standardize_emotion(self, emotion: str) -> str:
         """
         Standardize emotion name to English format.
@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict
+
+# Runs of Arabic-script letters, and Latin words (which may contain the digits
+# Arabizi uses for Arabic sounds). Pure numbers, symbols and emoji match neither
+# and carry no language.
+_ARABIC_PATTERN = re.compile(r'[\u0621-\u065F\u066E-\u06D3\u06FA-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFC]+')
+_LATIN_PATTERN = re.compile(r"[A-Za-z0-9']*[A-Za-z][A-Za-z0-9']*")
+
+# Arabizi: a digit standing for an Arabic letter (3 = ع, 7 = ح, 2 = ء, 5 = خ ...) at the start
+# of a word or between letters, and followed by one ("3ala", "za3lan"). Trailing digits and
+# short tokens such as "a5", "mp3" or "h2o" are English.
+_ARABIZI_DIGITS = re.compile(r'(?:^|[a-z])[235679][a-z]')
+ARABIZI_MIN_LETTERS = 3
+
+# Common Arabic words written in Latin letters without any digit. Words that are also
+# English words or names ("ya", "ana", "salam", "leh" ...) are left out.
+ARABIZI_WORDS = frozenset([
+    'habibi', 'habibti', 'inshallah', 'yalla', 'yallah', 'shukran', 'wallah', 'wallahi',
+    'mashallah', 'alhamdulillah', 'hamdulillah', 'enta', 'inta', 'enti', 'inti', 'keda', 'kida',
+    'yani', 'msh', 'mish', 'akeed', 'tamam', 'kheir', 'khair', 'marhaba', 'ahlan', 'izayak',
+    'izzay', 'ezay', 'shou', 'lesh', 'kteer', 'ktir', 'awi', 'gedan', 'jiddan', 'zaalan', 'za3lan',
+    'mabsoot', 'mabsout', 'khalas', 'yaani',
+])
+
+# A text is mixed when each script holds at least this share of its letters
+MIXED_MIN_SHARE = 0.1
+# Latin text is Arabizi when at least this share of its words look like Arabizi,
+# and either one of them spells an Arabic letter with a digit or at least
+# ARABIZI_MIN_WORDS of them do (so "ana za3lan" is Arabizi, a lone "habibi" is not)
+ARABIZI_MIN_SHARE = 0.4
+ARABIZI_MIN_WORDS = 2
+
+
+def _has_arabizi_digits(word):
+    """Check whether a lowercase Latin word spells an Arabic letter with a digit"""
+    return sum(map(str.isalpha, word)) >= ARABIZI_MIN_LETTERS and _ARABIZI_DIGITS.search(word) is not None
+
+
+def _is_arabizi_word(word):
+    """Check whether a lowercase Latin word looks like Arabizi"""
+    return word in ARABIZI_WORDS or _has_arabizi_digits(word)
+
+
+@lru_cache(maxsize=8192)
+def language_profile(text: str) -> Dict[str, Any]:
+    """
+    Score the scripts used in text and identify its language
+
+    Results are memoized per text; treat the returned dict as read-only.
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        Dict[str, Any]: 'language' ('ar', 'en', 'mixed', 'arabizi' or 'unknown'),
+            'arabic_share' (share of letters in Arabic script) and 'arabizi_share'
+            (share of Latin words that look like Arabizi; only measured for Latin text)
+    """
+    text = text or ''
+    arabic_letters = sum(map(len, _ARABIC_PATTERN.findall(text)))
+    latin_words = _LATIN_PATTERN.findall(text)
+    total = arabic_letters + sum(map(len, latin_words))
+    arabic_share = arabic_letters / total if total else 0.0
+    arabizi_share = 0.0
+
+    if not total:
+        language = 'unknown'
+    elif arabic_share >= 1 - MIXED_MIN_SHARE:
+        language = 'ar'
+    elif arabic_share > MIXED_MIN_SHARE:
+        language = 'mixed'
+    else:
+        # Latin script: English unless enough words look like Arabizi
+        words = [word.lower() for word in latin_words]
+        arabizi_words = sum(map(_is_arabizi_word, words))
+        arabizi_share = arabizi_words / len(words)
+        is_arabizi = arabizi_share >= ARABIZI_MIN_SHARE and (
+            arabizi_words >= ARABIZI_MIN_WORDS or any(map(_has_arabizi_digits, words)))
+        language = 'arabizi' if is_arabizi else 'en'
+
+    return {'language': language, 'arabic_share': arabic_share, 'arabizi_share': arabizi_share}
+
+
+def identify_language(text: str) -> str:
+    """
+    Identify the language of text from its scripts
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        str: 'ar', 'en', 'mixed' (Arabic and Latin script), 'arabizi' (Arabic
+            written in Latin letters) or 'unknown' (no letters)
+    """
+    return language_profile(text)['language']
+
+
+def primary_language(text: str) -> str:
+    """
+    Get the supported language closest to text, for components that only handle Arabic and English
+
+    Arabizi counts as Arabic, and mixed text takes the language of the
+    script with most letters (Arabic on a tie).
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        str: 'ar', 'en' or 'unknown'
+    """
+    profile = language_profile(text)
+    language = profile['language']
+    if language == 'arabizi':
+        return 'ar'
+    if language == 'mixed':
+        return 'ar' if profile['arabic_share'] >= 0.5 else 'en'
+    return language
@@ -2,7 +2,7 @@ import json
 import os
 from datetime import datetime, timedelta
 import random
-from memory_store import MemoryStore
+from memory_store import get_memory_store
 
 class LegacyMode:
     """
@@ -23,7 +23,7 @@ class LegacyMode:
     
     def __init__(self, memory_store=None):
         """Initialize the legacy mode with a memory store"""
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
         self.legacy_data = {
             'user_relationships': {},  # Relationships by user ID
             'global_stats': {
@@ -2,7 +2,7 @@ import json
 import os
 from datetime import datetime
 import re
-from memory_store import MemoryStore
+from memory_store import get_memory_store
 
 class LongTermConsciousness:
     """
@@ -20,7 +20,7 @@ class LongTermConsciousness:
     
     def __init__(self, memory_store=None):
         """Initialize the long term consciousness with a memory store"""
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
         self.consciousness_data = {
             'values': {},        # What matters to the user
             'boundaries': {},    # Limits that shouldn't be crossed
@@ -0,0 +1,392 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import MutableMapping
+
+# File layout:
+#   magic (4 bytes) | header length (4 bytes, little endian) | JSON header | padding | tables
+# Every table stores its keys sorted by their UTF-8 bytes, with uint32 offset arrays
+# into a key blob and a value blob, so a key is found by binary search directly in
+# the mapped file. Posting lists refer to memories by number through the 'docs'
+# table and are encoded as delta varints.
+INDEX_MAGIC = b'MIDX'
+
+
+def _encode_varints(values):
+    """Encode non-negative integers as LEB128 varints"""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return out
+
+
+def _decode_varints(data):
+    """Decode LEB128 varints"""
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    return values
+
+
+def _align(buffer, alignment=4):
+    """Pad a bytearray to a multiple of alignment"""
+    buffer.extend(b'\0' * (-len(buffer) % alignment))
+
+
+class MappedTable:
+    """
+    Read-only sorted table inside a memory-mapped index file
+
+    Keys are compared as UTF-8 bytes by binary search over the offset array,
+    and values are only decoded when they are looked up.
+    """
+
+    def __init__(self, buffer, data_start, entry, docs=None, byteorder='little'):
+        """
+        Open a table
+
+        Args:
+            buffer (mmap.mmap): The mapped index file
+            data_start (int): Offset of the table section
+            entry (dict): Table directory entry from the header
+            docs (MappedTable, optional): Table mapping memory numbers to IDs
+            byteorder (str): Byte order the offset arrays were written in
+        """
+        self.buffer = buffer
+        self.codec = entry['codec']
+        self.count = entry['count']
+        self.docs = docs
+        self.key_offsets = self._offsets(data_start + entry['key_offsets'], byteorder)
+        self.value_offsets = self._offsets(data_start + entry['value_offsets'], byteorder)
+        self.keys_start = data_start + entry['keys']
+        self.values_start = data_start + entry['values']
+
+    def _offsets(self, start, byteorder):
+        """View an array of count + 1 uint32 offsets without copying it"""
+        view = memoryview(self.buffer)[start:start + 4 * (self.count + 1)].cast('I')
+        if byteorder == sys.byteorder:
+            return view
+        offsets = array('I', view)
+        offsets.byteswap()
+        return offsets
+
+    def release(self):
+        """Release the views into the mapped file, so the buffer can be closed"""
+        for offsets in (self.key_offsets, self.value_offsets):
+            if isinstance(offsets, memoryview):
+                offsets.release()
+
+    def key_bytes(self, position):
+        """Get the encoded key at a position"""
+        return self.buffer[self.keys_start + self.key_offsets[position]:
+                           self.keys_start + self.key_offsets[position + 1]]
+
+    def find(self, key):
+        """
+        Find the position of a key
+
+        Args:
+            key (str): The key
+
+        Returns:
+            int: Position of the key, or -1 if it is not in the table
+        """
+        target = key.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.key_bytes(low) == target:
+            return low
+        return -1
+
+    def keys(self):
+        """Iterate over all keys in sorted order"""
+        for position in range(self.count):
+            yield self.key_bytes(position).decode('utf-8')
+
+    def doc_id(self, number):
+        """Get the memory ID stored under a memory number"""
+        return self.value_at(number)
+
+    def value_at(self, position):
+        """
+        Decode the value at a position
+
+        Args:
+            position (int): Position in the table
+
+        Returns:
+            any: The decoded value
+        """
+        data = self.buffer[self.values_start + self.value_offsets[position]:
+                           self.values_start + self.value_offsets[position + 1]]
+
+        if self.codec == 'json':
+            return json.loads(data.decode('utf-8'))
+        if self.codec == 'doc':
+            return data.decode('utf-8')
+
+        numbers = _decode_varints(data)
+        if self.codec == 'ids':
+            memory_ids = []
+            number = 0
+            for delta in numbers:
+                number += delta
+                memory_ids.append(self.docs.doc_id(number))
+            return memory_ids
+
+        # 'tf' stores (delta, term frequency) pairs
+        frequencies = {}
+        number = 0
+        for index in range(0, len(numbers), 2):
+            number += numbers[index]
+            frequencies[self.docs.doc_id(number)] = numbers[index + 1]
+        return frequencies
+
+
+class MappedPostings(MutableMapping):
+    """
+    Mutable mapping over a MappedTable
+
+    Reads decode entries from the mapped file on first access and keep them,
+    so in-place changes to a posting list stick. Added and deleted keys are
+    tracked on top of the file, which is never modified.
+    """
+
+    def __init__(self, table=None):
+        """
+        Wrap a table
+
+        Args:
+            table (MappedTable, optional): The mapped table; empty if omitted
+        """
+        self.table = table
+        self.cache = {}  # Decoded or changed values
+        self.added = set()  # Keys not in the table
+        self.deleted = set()  # Table keys that were deleted
+
+    def _in_table(self, key):
+        return self.table is not None and self.table.find(key) >= 0
+
+    def __contains__(self, key):
+        if key in self.cache:
+            return True
+        if key in self.deleted or not isinstance(key, str):
+            return False
+        return self._in_table(key)
+
+    def __getitem__(self, key):
+        if key in self.cache:
+            return self.cache[key]
+        if key in self.deleted or self.table is None or not isinstance(key, str):
+            raise KeyError(key)
+
+        position = self.table.find(key)
+        if position < 0:
+            raise KeyError(key)
+        value = self.table.value_at(position)
+        self.cache[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            if self._in_table(key):
+                self.deleted.discard(key)
+            else:
+                self.added.add(key)
+        self.cache[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.cache.pop(key, None)
+        if key in self.added:
+            self.added.discard(key)
+        else:
+            self.deleted.add(key)
+
+    def __iter__(self):
+        if self.table is not None:
+            for key in self.table.keys():
+                if key not in self.deleted:
+                    yield key
+        yield from list(self.added)
+
+    def __len__(self):
+        count = self.table.count if self.table is not None else 0
+        return count - len(self.deleted) + len(self.added)
+
+
+def _build_table(entries, codec, doc_numbers, data):
+    """
+    Append one sorted table to the data section
+
+    Args:
+        entries (Mapping): Keys and values of the table
+        codec (str): Value codec
+        doc_numbers (dict): Maps memory IDs to memory numbers
+        data (bytearray): The data section
+
+    Returns:
+        dict: Directory entry of the table
+    """
+    items = sorted(((key.encode('utf-8'), value) for key, value in entries.items()), key=lambda item: item[0])
+
+    key_blob = bytearray()
+    value_blob = bytearray()
+    key_offsets = array('I', [0])
+    value_offsets = array('I', [0])
+
+    for key, value in items:
+        key_blob.extend(key)
+        key_offsets.append(len(key_blob))
+
+        if codec == 'json':
+            value_blob.extend(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        elif codec == 'doc':
+            value_blob.extend(value.encode('utf-8'))
+        elif codec == 'ids':
+            numbers = sorted(doc_numbers[memory_id] for memory_id in value)
+            value_blob.extend(_encode_varints(
+                number - previous for number, previous in zip(numbers, [0] + numbers[:-1])))
+        else:
+            pairs = sorted((doc_numbers[memory_id], count) for memory_id, count in value.items())
+            encoded = []
+            previous = 0
+            for number, count in pairs:
+                encoded.extend((number - previous, count))
+                previous = number
+            value_blob.extend(_encode_varints(encoded))
+        value_offsets.append(len(value_blob))
+
+    entry = {'codec': codec, 'count': len(items)}
+    _align(data)
+    entry['key_offsets'] = len(data)
+    data.extend(key_offsets.tobytes())
+    entry['value_offsets'] = len(data)
+    data.extend(value_offsets.tobytes())
+    entry['keys'] = len(data)
+    data.extend(key_blob)
+    entry['values'] = len(data)
+    data.extend(value_blob)
+    return entry
+
+
+def write_index_file(path, tables, metadata, before_replace=None):
+    """
+    Write index tables to a compact binary file
+
+    The file is written to a temporary path and moved into place. Windows
+    cannot replace a file that is still mapped, so a reader of the previous
+    file must unmap it first (see close_index_file), through before_replace.
+
+    Args:
+        path (str): Destination path
+        tables (dict): Maps table names to (codec, mapping) pairs, where codec is
+            'ids' (lists of memory IDs), 'tf' ({memory ID: term frequency}) or 'json'
+        metadata (dict): JSON-serializable values stored in the header
+        before_replace (callable, optional): Called once the new file is complete,
+            before it replaces the previous one
+    """
+    # Number every memory ID that appears in a posting list
+    memory_ids = set()
+    for codec, entries in tables.values():
+        if codec == 'ids':
+            for value in entries.values():
+                memory_ids.update(value)
+        elif codec == 'tf':
+            for value in entries.values():
+                memory_ids.update(value.keys())
+    doc_list = sorted(memory_ids)
+    doc_numbers = {memory_id: number for number, memory_id in enumerate(doc_list)}
+
+    data = bytearray()
+    directory = {'docs': _build_table({f"{number:010d}": memory_id for number, memory_id in enumerate(doc_list)},
+                                      'doc', doc_numbers, data)}
+    for name, (codec, entries) in tables.items():
+        directory[name] = _build_table(entries, codec, doc_numbers, data)
+
+    header = json.dumps({'metadata': metadata, 'tables': directory, 'byteorder': sys.byteorder},
+                        ensure_ascii=False).encode('utf-8')
+    prefix = bytearray(INDEX_MAGIC + len(header).to_bytes(4, 'little') + header)
+    _align(prefix)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if before_replace is not None:
+        before_replace()
+    os.replace(temp_path, path)
+
+
+def read_index_file(path):
+    """
+    Map a binary index file
+
+    Only the header is parsed; table entries are decoded on access.
+
+    Args:
+        path (str): Path of the index file
+
+    Returns:
+        tuple: (dict of table name to MappedPostings, metadata dict)
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:4] != INDEX_MAGIC:
+        raise ValueError(f"Not a memory index file: {path}")
+
+    header_length = int.from_bytes(buffer[4:8], 'little')
+    header = json.loads(buffer[8:8 + header_length].decode('utf-8'))
+    data_start = 8 + header_length + (-(8 + header_length) % 4)
+    byteorder = header.get('byteorder', 'little')
+
+    directory = header['tables']
+    docs = MappedTable(buffer, data_start, directory['docs'], byteorder=byteorder)
+    tables = {
+        name: MappedPostings(MappedTable(buffer, data_start, entry, docs, byteorder))
+        for name, entry in directory.items() if name != 'docs'
+    }
+    return tables, header['metadata']
+
+
+def close_index_file(tables):
+    """
+    Unmap an index file opened with read_index_file
+
+    The tables must not be used afterwards.
+
+    Args:
+        tables (iterable): MappedPostings of the file; empty ones are skipped
+    """
+    buffers = {}
+    for postings in tables:
+        table = postings.table
+        for mapped in (table, table.docs if table is not None else None):
+            if mapped is not None:
+                mapped.release()
+                buffers[id(mapped.buffer)] = mapped.buffer
+    for buffer in buffers.values():
+        buffer.close()
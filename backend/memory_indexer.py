@@ -1,9 +1,171 @@
+import hashlib
+import heapq
 import json
+import math
 import os
 from datetime import datetime
 from collections import defaultdict
-import re
-from memory_store import MemoryStore
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from memory_index_file import MappedPostings, close_index_file, read_index_file, write_index_file
+from memory_store import get_memory_store
+from text_index import analyze, normalize_text
+from ttl_cache import TTLCache
+from vector_index import NUMPY_AVAILABLE, VectorIndex, text_vector
+
+# Bumped when the index layout changes, so older index files are rebuilt
+INDEX_VERSION = 6
+
+# Indexes mapping a key to a list of memory IDs
+LIST_INDEXES = ('keyword_index', 'category_index', 'temporal_index', 'emotion_index',
+                'priority_index')
+
+# Number of neighbours on each side of a memory, in its user's timeline,
+# that are checked for relatedness
+CROSS_REFERENCE_WINDOW = 5
+
+# A posting list at most this many times longer than the candidates of an
+# intersection is matched through a set rather than by galloping search
+DENSE_INTERSECTION_RATIO = 8
+
+# Index file written before the binary format, imported once if found
+LEGACY_INDEX_PATH = 'data/memory_index.json'
+
+# Shared indexers by absolute index path (see get_memory_indexer)
+_shared_indexers = {}
+_shared_indexers_lock = threading.Lock()
+
+# Memory fields whose text is indexed, with their default search boosts
+# (episodic memories carry input/response, semantic memories a value)
+FIELD_BOOSTS = {
+    'input': 1.0,
+    'response': 0.5,
+    'value': 1.5,
+    'text': 1.0
+}
+
+# Search ranking: BM25 over the boosted field frequencies, multiplied by an
+# exponential recency decay and the importance of the memory
+BM25_K1 = 1.2
+BM25_B = 0.75
+RECENCY_HALF_LIFE_DAYS = 30
+
+def insert_posting(posting, memory_id):
+    """
+    Add a memory ID to a sorted posting list, keeping it free of duplicates
+    
+    Args:
+        posting (list): Sorted posting list
+        memory_id (str): The memory ID
+    """
+    position = bisect_left(posting, memory_id)
+    if position == len(posting) or posting[position] != memory_id:
+        posting.insert(position, memory_id)
+
+
+def remove_posting(posting, memory_id):
+    """
+    Remove a memory ID from a sorted posting list
+    
+    Args:
+        posting (list): Sorted posting list
+        memory_id (str): The memory ID
+    """
+    position = bisect_left(posting, memory_id)
+    if position < len(posting) and posting[position] == memory_id:
+        del posting[position]
+
+
+def _gallop(posting, memory_id, position, end):
+    """
+    Find the first position at or after position whose ID is not below memory_id
+    
+    The search probes position, position + 1, position + 3, position + 7 and
+    so on until it passes memory_id, then bisects only that last step, so
+    finding an ID k entries ahead costs O(log k) instead of O(log n).
+    
+    Args:
+        posting (list): Sorted posting list
+        memory_id (str): The memory ID
+        position (int): Position to start from
+        end (int): Length of the posting list
+        
+    Returns:
+        int: Insertion position of memory_id, at least position
+    """
+    step = 1
+    low = position
+    while position < end and posting[position] < memory_id:
+        low = position + 1
+        position += step
+        step <<= 1
+    return bisect_left(posting, memory_id, low, min(position, end))
+
+
+def intersect_postings(postings):
+    """
+    Intersect sorted posting lists, starting from the shortest
+    
+    Candidates from the shortest list are looked up in each longer list by an
+    exponential search that starts from the last matched position, so the
+    cost follows the rarest term and the gaps between matches rather than
+    the length of the most common term. When the candidates are nearly as
+    many as the entries of a list, probing each one would cost more than a
+    membership test, so that list is filtered through a set of the candidates
+    instead.
+    
+    Args:
+        postings (list): Sorted, deduplicated posting lists
+        
+    Returns:
+        list: Sorted memory IDs present in every list
+    """
+    if not postings:
+        return []
+    
+    postings = sorted(postings, key=len)
+    result = list(postings[0])
+    for posting in postings[1:]:
+        end = len(posting)
+        if len(result) * DENSE_INTERSECTION_RATIO >= end:
+            # Filtering the sorted list keeps the matches sorted
+            result = list(filter(set(result).__contains__, posting))
+        else:
+            matched = []
+            position = 0
+            for memory_id in result:
+                position = _gallop(posting, memory_id, position, end)
+                if position == end:
+                    break
+                if posting[position] == memory_id:
+                    matched.append(memory_id)
+                    position += 1
+            result = matched
+        if not result:
+            break
+    return result
+
+
+def _format_cursor(entry):
+    """Encode a (time, memory ID) time index entry as a pagination cursor"""
+    memory_time, memory_id = entry
+    return f"{memory_time!r}:{memory_id}"
+
+
+def _parse_cursor(cursor):
+    """
+    Decode a pagination cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    memory_time, separator, memory_id = cursor.partition(':')
+    if not separator:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return (float(memory_time), memory_id)
+
 
 class MemoryIndexer:
     """
@@ -14,7 +176,7 @@ class MemoryIndexer:
     and flexible querying based on various criteria.
     
     Features:
-    - Keyword-based memory indexing
+    - Keyword-based memory indexing, with per-field term frequencies for ranking
     - Semantic categorization of memories
     - Temporal indexing (time-based retrieval)
     - Emotional context indexing
@@ -22,69 +184,224 @@ class MemoryIndexer:
     - Cross-referencing between related memories
     """
     
-    def __init__(self, memory_store=None):
-        """Initialize the memory indexer with a memory store"""
-        self.memory_store = memory_store if memory_store else MemoryStore()
+    def __init__(self, memory_store=None, index_path='data/memory_index.bin', metrics=None,
+                 cache_size=256, cache_ttl=60, use_vectors=False):
+        """
+        Initialize the memory indexer with a memory store
+        
+        Args:
+            memory_store (MemoryStore, optional): The store to index; the shared store if omitted
+            index_path (str): Path of the binary index file
+            metrics (SystemMetrics, optional): Receives search cache hits and misses
+            cache_size (int): Maximum number of cached searches
+            cache_ttl (float): Seconds a cached search stays valid
+            use_vectors (bool): Keep a hashed n-gram vector index for similarity search (needs NumPy)
+        """
+        self.memory_store = memory_store if memory_store else get_memory_store()
+        self.index_path = index_path
+        self.metrics = metrics
         self.index_data = {
-            'keyword_index': defaultdict(list),  # Maps keywords to memory IDs
-            'category_index': defaultdict(list),  # Maps categories to memory IDs
-            'temporal_index': defaultdict(list),  # Maps time periods to memory IDs
-            'emotion_index': defaultdict(list),   # Maps emotions to memory IDs
-            'priority_index': defaultdict(list),  # Maps priority levels to memory IDs
-            'cross_references': defaultdict(list), # Maps memory IDs to related memory IDs
+            'keyword_index': {},  # Maps keywords to memory IDs
+            'field_index': {},  # Maps fields to keywords to {memory ID: term frequency}
+            'category_index': {},  # Maps categories to memory IDs
+            'temporal_index': {},  # Maps time periods to memory IDs
+            'emotion_index': {},   # Maps emotions to memory IDs
+            'priority_index': {},  # Maps priority levels to memory IDs
+            'cross_references': {}, # Maps memory IDs to {related memory ID: weight}
+            'memory_keys': {},  # Maps memory IDs to the (index, key) postings they appear in
+            'memory_stats': {},  # Maps memory IDs to [time, importance, length, fingerprint]
+            'total_length': 0,  # Sum of the lengths in memory_stats
+            'version': INDEX_VERSION,
             'last_indexed': None,
             'last_updated': datetime.now().isoformat()
         }
         
+        # Guards the index against store events arriving during searches
+        self.lock = threading.RLock()
+        self.dirty = False
+        
+        # Incremented on every index change; cache keys include it, so results
+        # cached before a change are never returned after it
+        self.revision = 0
+        self.search_cache = TTLCache(cache_size, cache_ttl)
+        
+        # Per-user timelines of (time, memory ID) and the relation features of
+        # each memory, built lazily so cross-references can be added incrementally
+        self.timelines = None
+        self.relation_features = None
+        
+        # Sorted (time, memory ID) pairs of all timestamped memories, for time
+        # ranges; built lazily from memory_stats
+        self.time_index = None
+        
+        # Optional vector index for similarity search, built lazily from the store
+        if use_vectors and not NUMPY_AVAILABLE:
+            print("NumPy is not installed; vector similarity search is disabled")
+        self.use_vectors = use_vectors and NUMPY_AVAILABLE
+        self.vector_index = None
+        
         # Load existing index data
         self.load_index_data()
+        
+        # Keep the index current as memories are stored, updated and evicted
+        self.memory_store.subscribe(self.handle_memory_event)
     
     def load_index_data(self):
-        """Load index data from storage file"""
-        index_path = 'data/memory_index.json'
+        """
+        Load index data from storage file
+        
+        The binary index is memory-mapped and posting lists are only decoded
+        when a search touches them. An index saved in the older JSON format
+        is imported instead and written as a binary index on the next save.
+        """
         try:
-            if os.path.exists(index_path):
-                with open(index_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # Convert defaultdict keys back from strings
-                    self.index_data = {
-                        'keyword_index': defaultdict(list, data.get('keyword_index', {})),
-                        'category_index': defaultdict(list, data.get('category_index', {})),
-                        'temporal_index': defaultdict(list, data.get('temporal_index', {})),
-                        'emotion_index': defaultdict(list, data.get('emotion_index', {})),
-                        'priority_index': defaultdict(list, data.get('priority_index', {})),
-                        'cross_references': defaultdict(list, data.get('cross_references', {})),
-                        'last_indexed': data.get('last_indexed'),
-                        'last_updated': data.get('last_updated', datetime.now().isoformat())
-                    }
+            if os.path.exists(self.index_path):
+                tables, metadata = read_index_file(self.index_path)
+                self.index_data = {
+                    'field_index': {},
+                    'memory_keys': tables.pop('memory_keys', None),
+                    'memory_stats': tables.pop('memory_stats', MappedPostings()),
+                    'total_length': metadata.get('total_length', 0),
+                    'version': metadata.get('version', 1),
+                    'last_indexed': metadata.get('last_indexed'),
+                    'last_updated': metadata.get('last_updated', datetime.now().isoformat())
+                }
+                for index_name in LIST_INDEXES + ('cross_references',):
+                    self.index_data[index_name] = tables.pop(index_name, MappedPostings())
+                for name, postings in tables.items():
+                    if name.startswith('field_index.'):
+                        self.index_data['field_index'][name.split('.', 1)[1]] = postings
+            elif os.path.exists(LEGACY_INDEX_PATH):
+                self.import_index_json(LEGACY_INDEX_PATH)
         except Exception as e:
             print(f"Error loading index data: {e}")
             # Initialize with empty data if loading fails
     
     def save_index_data(self):
-        """Save index data to storage file"""
-        index_path = 'data/memory_index.json'
+        """
+        Save index data to storage file
+        
+        Windows cannot replace a mapped file, so the loaded index is unmapped
+        once the new file is written, and the saved file is mapped in its place.
+        """
+        unmapped = []
         try:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(index_path), exist_ok=True)
-            
-            # Convert defaultdicts to regular dicts for JSON serialization
-            serializable_data = {
-                'keyword_index': dict(self.index_data['keyword_index']),
-                'category_index': dict(self.index_data['category_index']),
-                'temporal_index': dict(self.index_data['temporal_index']),
-                'emotion_index': dict(self.index_data['emotion_index']),
-                'priority_index': dict(self.index_data['priority_index']),
-                'cross_references': dict(self.index_data['cross_references']),
+            tables = {index_name: ('ids', self.index_data[index_name]) for index_name in LIST_INDEXES}
+            tables['cross_references'] = ('tf', self.index_data['cross_references'])
+            for field, postings in self.index_data['field_index'].items():
+                tables[f"field_index.{field}"] = ('tf', postings)
+            if self.index_data['memory_keys'] is not None:
+                tables['memory_keys'] = ('json', self.index_data['memory_keys'])
+            tables['memory_stats'] = ('json', self.index_data['memory_stats'])
+            
+            write_index_file(self.index_path, tables, {
+                'version': self.index_data['version'],
+                'total_length': self.index_data['total_length'],
                 'last_indexed': self.index_data['last_indexed'],
                 'last_updated': datetime.now().isoformat()
-            }
-            
-            with open(index_path, 'w', encoding='utf-8') as f:
-                json.dump(serializable_data, f, ensure_ascii=False, indent=2)
+            }, before_replace=lambda: self._unmap_index_file(unmapped))
+            self.dirty = False
         except Exception as e:
             print(f"Error saving index data: {e}")
+        
+        if unmapped:
+            # Map the saved file, or the previous one if it could not be replaced
+            self.load_index_data()
+    
+    def _unmap_index_file(self, unmapped):
+        """
+        Unmap the tables loaded from the index file, once everything in them was saved
+        
+        Args:
+            unmapped (list): Receives the unmapped tables, which must be reloaded afterwards
+        """
+        unmapped.extend(postings for postings in self._index_tables() if isinstance(postings, MappedPostings))
+        close_index_file(unmapped)
+    
+    def _index_tables(self):
+        """Iterate over every table of the index data"""
+        for index_name in LIST_INDEXES + ('cross_references', 'memory_keys', 'memory_stats'):
+            yield self.index_data[index_name]
+        yield from self.index_data['field_index'].values()
+    
+    def import_index_json(self, path):
+        """
+        Load index data from a JSON export
+        
+        Args:
+            path (str): Path of the JSON file
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        # Older exports may hold unsorted posting lists with duplicates
+        self.index_data = {
+            index_name: {key: sorted(set(posting)) for key, posting in data.get(index_name, {}).items()}
+            for index_name in LIST_INDEXES
+        }
+        self.index_data.update({
+            'field_index': {field: dict(postings) for field, postings in data.get('field_index', {}).items()},
+            # Exports written before cross-references were weighted are rebuilt by version
+            'cross_references': {memory_id: dict(related) for memory_id, related in
+                                 data.get('cross_references', {}).items() if isinstance(related, dict)},
+            # Missing in index files written before incremental updates
+            'memory_keys': data.get('memory_keys'),
+            'memory_stats': data.get('memory_stats', {}),
+            'total_length': data.get('total_length', 0),
+            'version': data.get('version', 1),
+            'last_indexed': data.get('last_indexed'),
+            'last_updated': data.get('last_updated', datetime.now().isoformat())
+        })
+        self.timelines = None
+        self.relation_features = None
+        self.time_index = None
+        self.vector_index = None
+        self._mark_changed()
+    
+    def export_index_json(self, path):
+        """
+        Write the index as JSON, for inspection or moving it between versions
+        
+        Args:
+            path (str): Path of the JSON file
+        """
+        with self.lock:
+            serializable_data = {index_name: dict(self.index_data[index_name]) for index_name in LIST_INDEXES}
+            serializable_data.update({
+                'field_index': {field: dict(postings) for field, postings in self.index_data['field_index'].items()},
+                'cross_references': dict(self.index_data['cross_references']),
+                'memory_keys': dict(self.index_data['memory_keys']) if self.index_data['memory_keys'] is not None else None,
+                'memory_stats': dict(self.index_data['memory_stats']),
+                'total_length': self.index_data['total_length'],
+                'version': self.index_data['version'],
+                'last_indexed': self.index_data['last_indexed'],
+                'last_updated': self.index_data['last_updated']
+            })
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(serializable_data, f, ensure_ascii=False, indent=2)
+    
+    @staticmethod
+    def _memory_fields(memory):
+        """
+        Get the indexed text fields of a memory
+        
+        Args:
+            memory (dict): The memory
+            
+        Returns:
+            dict: Maps field names to their text
+        """
+        fields = {}
+        for field in FIELD_BOOSTS:
+            value = memory.get(field)
+            if value is None or value == '':
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(str(item) for item in value)
+            fields[field] = str(value)
+        return fields
     
     def index_memory(self, memory):
         """
@@ -101,174 +418,460 @@ class MemoryIndexer:
         
         memory_id = memory['id']
         
-        # Index by keywords
-        if 'text' in memory:
-            keywords = self._extract_keywords(memory['text'])
-            for keyword in keywords:
-                self.index_data['keyword_index'][keyword].append(memory_id)
+        # Term frequencies per field
+        fields = self._memory_fields(memory)
+        field_counts = {field: Counter(self._extract_keywords(text)) for field, text in fields.items()}
+        keywords = set()
+        length = 0
+        memory_keys = []
+        for field, term_counts in field_counts.items():
+            memory_keys.extend(('field_index', field, keyword) for keyword in term_counts)
+            keywords.update(term_counts)
+            length += sum(term_counts.values())
+        
+        # Index by keywords (once per memory, for matching), in a stable order
+        for keyword in sorted(keywords):
+            memory_keys.append(('keyword_index', keyword))
         
         # Index by category
-        if 'text' in memory:
-            category = self._categorize_memory(memory['text'])
-            self.index_data['category_index'][category].append(memory_id)
+        if fields:
+            category = self._categorize_memory(' '.join(fields.values()))
+            memory_keys.append(('category_index', category))
         
         # Index by time period
         if 'timestamp' in memory:
             time_period = self._get_time_period(memory['timestamp'])
-            self.index_data['temporal_index'][time_period].append(memory_id)
+            memory_keys.append(('temporal_index', time_period))
         
         # Index by emotion
         if 'emotion' in memory:
-            emotion = memory['emotion']
-            self.index_data['emotion_index'][emotion].append(memory_id)
+            memory_keys.append(('emotion_index', memory['emotion']))
         
         # Index by priority
         priority = memory.get('priority', 'medium')
-        self.index_data['priority_index'][priority].append(memory_id)
+        memory_keys.append(('priority_index', priority))
+        memory_keys = [list(index_key) for index_key in memory_keys]
+        
+        # Ranking inputs, so searches can score memories without loading them
+        memory_time = self._timeline_time(memory.get('timestamp'))
+        stats = [
+            memory_time if memory_time != float('-inf') else None,
+            memory.get('importance', memory.get('confidence', 0.5)),
+            length,
+            self._memory_fingerprint(memory)
+        ]
+        
+        with self.lock:
+            # Updates that change nothing indexed (such as a retrieval count)
+            # leave the index and its revision untouched
+            if self._is_indexed_as(memory_id, memory_keys, stats, field_counts):
+                if self.index_data['memory_stats'][memory_id] != stats:
+                    # Only the importance (and with it the fingerprint) changed, as on every
+                    # retrieval. It merely reweights the ranking, so it keeps the revision: cached
+                    # searches may rank by the previous importance until they expire after cache_ttl
+                    self.index_data['memory_stats'][memory_id] = stats
+                    self.dirty = True
+                return True
+            
+            # Load the timelines before a new memory is recorded as indexed
+            self._get_timelines()
+            
+            # Re-indexing a memory replaces its previous postings
+            self._remove_postings(memory_id)
+            
+            for index_key in memory_keys:
+                if index_key[0] == 'field_index':
+                    _, field, keyword = index_key
+                    self.index_data['field_index'].setdefault(field, {}).setdefault(keyword, {})[memory_id] = \
+                        field_counts[field][keyword]
+                else:
+                    insert_posting(self.index_data[index_key[0]].setdefault(index_key[1], []), memory_id)
+            # Remembered so the postings can be removed without scanning the index
+            self.index_data['memory_keys'][memory_id] = memory_keys
+            
+            self.index_data['memory_stats'][memory_id] = stats
+            self.index_data['total_length'] += length
+            if self.time_index is not None and memory_time != float('-inf'):
+                insert_posting(self.time_index, (memory_time, memory_id))
+            
+            # Link new memories to their neighbours; updates usually leave the features unchanged
+            features = self._relation_features(memory, keywords)
+            if self.relation_features.get(memory_id) != features:
+                self._unlink_memory(memory_id)
+                self._link_memory(memory_id, features)
+            
+            if self.vector_index is not None:
+                self.vector_index.add(memory_id, ' '.join(fields.values()))
+            
+            # Update last indexed timestamp
+            self.index_data['last_updated'] = datetime.now().isoformat()
+            self._mark_changed()
+        
+        return True
+    
+    def _is_indexed_as(self, memory_id, memory_keys, stats, field_counts):
+        """
+        Check whether a memory is already indexed with exactly these postings
+        
+        The importance in its ranking inputs is not compared.
+        
+        Args:
+            memory_id (str): ID of the memory
+            memory_keys (list): The postings the memory would be added to
+            stats (list): Its ranking inputs
+            field_counts (dict): Its term frequencies per field
+            
+        Returns:
+            bool: True if re-indexing would change at most the importance
+        """
+        if self.index_data['memory_keys'].get(memory_id) != memory_keys:
+            return False
+        indexed_stats = self.index_data['memory_stats'].get(memory_id)
+        if indexed_stats is None or (indexed_stats[0], indexed_stats[2]) != (stats[0], stats[2]):
+            return False
+        field_index = self.index_data['field_index']
+        return all(field_index.get(field, {}).get(keyword, {}).get(memory_id) == count
+                   for field, term_counts in field_counts.items() for keyword, count in term_counts.items())
+    
+    @staticmethod
+    def _memory_fingerprint(memory):
+        """
+        Digest of everything indexing reads from a memory
+        
+        Saved with the ranking inputs, so sync_index can find memories that
+        changed after the index file was last written.
+        
+        Args:
+            memory (dict): The memory
+            
+        Returns:
+            str: Hex digest
+        """
+        indexed = [memory.get(field) for field in FIELD_BOOSTS] + [
+            memory.get('timestamp'), memory.get('emotion'), memory.get('priority'),
+            memory.get('importance', memory.get('confidence')), memory.get('user_id')]
+        return hashlib.blake2b(json.dumps(indexed, ensure_ascii=False, default=str).encode('utf-8'),
+                               digest_size=8).hexdigest()
+    
+    def _mark_changed(self):
+        """Record an index change, so it is saved and cached searches are dropped"""
+        self.dirty = True
+        self.revision += 1
+    
+    def remove_memory(self, memory_id):
+        """
+        Remove a memory and its cross-references from the index
+        
+        Args:
+            memory_id (str): ID of the memory to remove
+            
+        Returns:
+            bool: True if the memory was indexed, False otherwise
+        """
+        with self.lock:
+            removed = self._remove_postings(memory_id)
+            self._unlink_memory(memory_id)
+            
+            if removed:
+                self.index_data['last_updated'] = datetime.now().isoformat()
+                self._mark_changed()
+        
+        return removed
+    
+    def _remove_postings(self, memory_id):
+        """
+        Remove a memory from every posting list it was added to
+        
+        Args:
+            memory_id (str): ID of the memory
+            
+        Returns:
+            bool: True if the memory was indexed, False otherwise
+        """
+        memory_keys = self.index_data['memory_keys'].pop(memory_id, None)
+        if memory_keys is None:
+            return False
         
-        # Update last indexed timestamp
-        self.index_data['last_updated'] = datetime.now().isoformat()
+        if self.vector_index is not None:
+            self.vector_index.remove(memory_id)
+        
+        stats = self.index_data['memory_stats'].pop(memory_id, None)
+        if stats is not None:
+            self.index_data['total_length'] -= stats[2]
+            if self.time_index is not None and stats[0] is not None:
+                remove_posting(self.time_index, (stats[0], memory_id))
+        
+        for index_key in memory_keys:
+            if index_key[0] == 'field_index':
+                _, field, key = index_key
+                postings = self.index_data['field_index'].get(field, {})
+                posting = postings.get(key)
+                if posting is not None:
+                    posting.pop(memory_id, None)
+                    if not posting:
+                        del postings[key]
+                continue
+            
+            index_name, key = index_key
+            posting = self.index_data[index_name].get(key)
+            if posting:
+                remove_posting(posting, memory_id)
+                if not posting:
+                    del self.index_data[index_name][key]
         
         return True
     
+    def handle_memory_event(self, event, memory):
+        """
+        Apply a MemoryStore change event to the index
+        
+        Args:
+            event (str): 'insert', 'update' or 'evict'
+            memory (dict): The changed memory
+        """
+        if event == 'evict':
+            self.remove_memory(memory['id'])
+        else:
+            self.index_memory(memory)
+    
+    def sync_index(self):
+        """
+        Bring the loaded index up to date with the memory store
+        
+        Only memories added, removed or changed since the index was saved are
+        processed; changes are found by comparing each memory's fingerprint,
+        so updates made after the last save are picked up even after an
+        unclean exit. A full rebuild is only done when there is no usable
+        saved index.
+        
+        Returns:
+            int: Number of memories indexed, re-indexed or removed
+        """
+        if (self.index_data['last_indexed'] is None or self.index_data['memory_keys'] is None or
+                self.index_data['version'] != INDEX_VERSION):
+            return self.rebuild_index()
+        
+        with self.memory_store.lock.read(), self.lock:
+            memories = self.memory_store.get_all_memories()
+            current_ids = {memory['id'] for memory in memories}
+            
+            stale_ids = [memory_id for memory_id in self.index_data['memory_keys'] if memory_id not in current_ids]
+            for memory_id in stale_ids:
+                self.remove_memory(memory_id)
+            
+            stats = self.index_data['memory_stats']
+            missing = [memory for memory in memories if memory['id'] not in self.index_data['memory_keys'] or
+                       (stats.get(memory['id']) or [None] * 4)[3] != self._memory_fingerprint(memory)]
+            for memory in missing:
+                self.index_memory(memory)
+        
+        return len(stale_ids) + len(missing)
+    
+    def close(self):
+        """Stop following the memory store and save pending index changes"""
+        _forget_shared_indexer(self)
+        self.memory_store.unsubscribe(self.handle_memory_event)
+        with self.lock:
+            if self.dirty:
+                self.save_index_data()
+    
     def rebuild_index(self):
         """
         Rebuild the entire index from the memory store
         
+        Normally the index follows the store through change events, so this is
+        only needed to recover from a missing or damaged index file.
+        
         Returns:
             int: Number of memories indexed
         """
-        # Clear existing indexes
-        self.index_data['keyword_index'] = defaultdict(list)
-        self.index_data['category_index'] = defaultdict(list)
-        self.index_data['temporal_index'] = defaultdict(list)
-        self.index_data['emotion_index'] = defaultdict(list)
-        self.index_data['priority_index'] = defaultdict(list)
-        self.index_data['cross_references'] = defaultdict(list)
+        # Hold the store's read lock so no change event is lost between listing and indexing
+        with self.memory_store.lock.read(), self.lock:
+            # Clear existing indexes
+            for index_name in LIST_INDEXES:
+                self.index_data[index_name] = {}
+            self.index_data['field_index'] = {}
+            self.index_data['cross_references'] = {}
+            self.index_data['memory_keys'] = {}
+            self.index_data['memory_stats'] = {}
+            self.index_data['total_length'] = 0
+            self.index_data['version'] = INDEX_VERSION
+            self.timelines = {}
+            self.relation_features = {}
+            self.time_index = []
+            self.vector_index = None
+            
+            # Get all memories from the memory store
+            memories = self.memory_store.get_all_memories()
+            
+            # Index each memory in time order, so it is appended to its timeline
+            # and only compared with the memories before it
+            count = 0
+            for memory in sorted(memories, key=lambda memory: self._timeline_time(memory.get('timestamp'))):
+                if self.index_memory(memory):
+                    count += 1
+            
+            # Update last indexed timestamp
+            self.index_data['last_indexed'] = datetime.now().isoformat()
+            self.index_data['last_updated'] = datetime.now().isoformat()
+            
+            # Save the updated index
+            self.save_index_data()
+        
+        return count
+    
+    @staticmethod
+    def _timeline_time(timestamp):
+        """
+        Parse a memory timestamp for ordering and proximity checks
+        
+        Args:
+            timestamp (str): ISO timestamp
+            
+        Returns:
+            float: Unix time, or -inf if missing or invalid (ordered first)
+        """
+        if timestamp:
+            try:
+                return datetime.fromisoformat(timestamp).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return float('-inf')
+    
+    def _relation_features(self, memory, keywords):
+        """
+        Collect what _relation_weight compares, so each memory is parsed only once
+        
+        Args:
+            memory (dict): The memory
+            keywords (iterable): Keywords of the memory
+            
+        Returns:
+            tuple: (user ID, time, emotion, frozenset of keywords)
+        """
+        return (memory.get('user_id', 'unknown'), self._timeline_time(memory.get('timestamp')),
+                memory.get('emotion'), frozenset(keywords))
+    
+    def _get_timelines(self):
+        """
+        Get the per-user timelines, building them from the store on first use
         
-        # Get all memories from the memory store
-        memories = self.memory_store.get_all_memories()
+        A loaded index file holds the cross-references but not the timelines,
+        so they are rebuilt from the indexed memories, taking their keywords
+        from memory_keys rather than extracting them again.
         
-        # Index each memory
-        count = 0
-        for memory in memories:
-            if self.index_memory(memory):
-                count += 1
+        Returns:
+            dict: Maps user IDs to sorted lists of (time, memory ID)
+        """
+        if self.timelines is not None:
+            return self.timelines
         
-        # Update cross-references
-        self._build_cross_references(memories)
+        self.timelines = {}
+        self.relation_features = {}
+        memory_keys = self.index_data['memory_keys'] or {}
+        for memory in self.memory_store.get_all_memories():
+            index_keys = memory_keys.get(memory['id'])
+            if index_keys is None:
+                continue
+            keywords = [index_key[1] for index_key in index_keys if index_key[0] == 'keyword_index']
+            features = self._relation_features(memory, keywords)
+            self.relation_features[memory['id']] = features
+            self.timelines.setdefault(features[0], []).append((features[1], memory['id']))
         
-        # Update last indexed timestamp
-        self.index_data['last_indexed'] = datetime.now().isoformat()
-        self.index_data['last_updated'] = datetime.now().isoformat()
+        for timeline in self.timelines.values():
+            timeline.sort()
+        return self.timelines
+    
+    def _link_memory(self, memory_id, features):
+        """
+        Add a memory to its user's timeline and cross-reference it with its neighbours
         
-        # Save the updated index
-        self.save_index_data()
+        Args:
+            memory_id (str): ID of the memory
+            features (tuple): Relation features of the memory
+        """
+        timeline = self._get_timelines().setdefault(features[0], [])
+        entry = (features[1], memory_id)
+        position = bisect_left(timeline, entry)
+        neighbours = timeline[max(0, position - CROSS_REFERENCE_WINDOW):position + CROSS_REFERENCE_WINDOW]
+        timeline.insert(position, entry)
+        self.relation_features[memory_id] = features
         
-        return count
+        cross_references = self.index_data['cross_references']
+        for _, other_id in neighbours:
+            weight = self._relation_weight(features, self.relation_features[other_id])
+            if weight:
+                cross_references.setdefault(memory_id, {})[other_id] = weight
+                cross_references.setdefault(other_id, {})[memory_id] = weight
     
-    def _build_cross_references(self, memories):
+    def _unlink_memory(self, memory_id):
         """
-        Build cross-references between related memories
+        Remove a memory from its timeline and drop its cross-references
         
         Args:
-            memories (list): List of memories to process
+            memory_id (str): ID of the memory
         """
-        # Group memories by user/session
-        memories_by_user = defaultdict(list)
-        for memory in memories:
-            user_id = memory.get('user_id', 'unknown')
-            memories_by_user[user_id].append(memory)
+        features = self.relation_features.pop(memory_id, None) if self.relation_features is not None else None
+        if features is not None:
+            remove_posting(self.timelines.get(features[0], []), (features[1], memory_id))
         
-        # For each user, find related memories
-        for user_id, user_memories in memories_by_user.items():
-            # Sort by timestamp
-            sorted_memories = sorted(user_memories, key=lambda x: x.get('timestamp', ''))
-            
-            # Build cross-references based on temporal proximity and content similarity
-            for i, memory in enumerate(sorted_memories):
-                memory_id = memory.get('id')
-                if not memory_id:
-                    continue
-                
-                # Look at nearby memories (temporal proximity)
-                start_idx = max(0, i - 5)
-                end_idx = min(len(sorted_memories), i + 6)
-                
-                for j in range(start_idx, end_idx):
-                    if i == j:
-                        continue
-                    
-                    other_memory = sorted_memories[j]
-                    other_id = other_memory.get('id')
-                    if not other_id:
-                        continue
-                    
-                    # Check for content similarity
-                    if self._are_memories_related(memory, other_memory):
-                        self.index_data['cross_references'][memory_id].append(other_id)
+        # Cross-references are symmetric, so only the related memories need updating
+        cross_references = self.index_data['cross_references']
+        for other_id in list(cross_references.pop(memory_id, {})):
+            related = cross_references.get(other_id)
+            if related is not None:
+                related.pop(memory_id, None)
+                if not related:
+                    del cross_references[other_id]
     
-    def _are_memories_related(self, memory1, memory2):
+    @staticmethod
+    def _relation_weight(features1, features2):
         """
-        Determine if two memories are related
+        Score how strongly two memories are related
+        
+        A shared emotion and being within an hour of each other count one
+        each, and sharing at least two keywords counts once per keyword.
         
         Args:
-            memory1 (dict): First memory
-            memory2 (dict): Second memory
+            features1 (tuple): Relation features of the first memory
+            features2 (tuple): Relation features of the second memory
             
         Returns:
-            bool: True if memories are related, False otherwise
+            int: Relation weight, 0 if the memories are unrelated
         """
+        _, time1, emotion1, keywords1 = features1
+        _, time2, emotion2, keywords2 = features2
+        weight = 0
+        
         # Check if they share the same emotion
-        if 'emotion' in memory1 and 'emotion' in memory2:
-            if memory1['emotion'] == memory2['emotion']:
-                return True
+        if emotion1 is not None and emotion1 == emotion2:
+            weight += 1
         
-        # Check if they share keywords
-        if 'text' in memory1 and 'text' in memory2:
-            keywords1 = self._extract_keywords(memory1['text'])
-            keywords2 = self._extract_keywords(memory2['text'])
-            
-            # If they share at least 2 keywords, consider them related
-            common_keywords = set(keywords1) & set(keywords2)
-            if len(common_keywords) >= 2:
-                return True
+        # If they share at least 2 keywords, consider them related
+        common_keywords = len(keywords1 & keywords2)
+        if common_keywords >= 2:
+            weight += common_keywords
         
         # Check temporal proximity (within 1 hour)
-        if 'timestamp' in memory1 and 'timestamp' in memory2:
-            try:
-                time1 = datetime.fromisoformat(memory1['timestamp'])
-                time2 = datetime.fromisoformat(memory2['timestamp'])
-                
-                time_diff = abs((time1 - time2).total_seconds())
-                if time_diff <= 3600:  # Within 1 hour
-                    return True
-            except:
-                pass
+        if time1 != float('-inf') and time2 != float('-inf') and abs(time1 - time2) <= 3600:
+            weight += 1
         
-        return False
+        return weight
     
     def _extract_keywords(self, text):
         """
         Extract keywords from text
         
+        Memories and queries both go through the shared text_index analyzer,
+        so Arabic spelling variants, diacritics and clitics match each other.
+        
         Args:
             text (str): The text to extract keywords from
             
         Returns:
-            list: Extracted keywords
+            list: Extracted keywords (normalized stems)
         """
-        # Remove punctuation and convert to lowercase
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        
-        # Split into words
-        words = text.split()
-        
-        # Filter out common words (stopwords)
-        stopwords = ['و', 'في', 'من', 'على', 'إلى', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'تلك', 'هو', 'هي', 'أنا', 'أنت', 'نحن', 'هم']
-        keywords = [word for word in words if word not in stopwords and len(word) > 2]
-        
-        return keywords
+        return analyze(text)
     
     def _categorize_memory(self, text):
         """
@@ -296,11 +899,11 @@ class MemoryIndexer:
         
         # Count category matches
         category_scores = defaultdict(int)
-        text_lower = text.lower()
+        text_lower = normalize_text(text)
         
         for category, keywords in categories.items():
             for keyword in keywords:
-                if keyword in text_lower:
+                if normalize_text(keyword) in text_lower:
                     category_scores[category] += 1
         
         # Return the category with the highest score, or 'general' if no matches
@@ -328,119 +931,303 @@ class MemoryIndexer:
             # If parsing fails, return 'unknown'
             return 'unknown'
     
-    def search_memories(self, query, filters=None, limit=10):
+    def search_memories(self, query, filters=None, limit=10, field_boosts=None):
         """
         Search for memories using the index
         
+        Memories must contain every query keyword in at least one field and
+        match every filter. The sorted posting lists involved are intersected
+        from the rarest up, without building sets. Matches are scored from the
+        index alone (BM25 over the boosted field frequencies, times recency
+        decay and importance; without keywords only the latter two), the top
+        results are picked with a heap and only those are loaded from the store.
+        
         Args:
             query (str): Search query
-            filters (dict, optional): Additional filters (emotion, time_period, priority, category)
+            filters (dict, optional): Additional filters (emotion, time_period, priority,
+                category, and the time range time_from, time_to and last_days)
             limit (int): Maximum number of results to return
+            field_boosts (dict, optional): Per-field boosts overriding FIELD_BOOSTS
             
         Returns:
-            list: Matching memories
+            list: Matching memories, best first
         """
-        if not query and not filters:
+        if (not query and not filters) or limit <= 0:
             return []
         
         # Extract keywords from query
         query_keywords = self._extract_keywords(query) if query else []
+        boosts = dict(FIELD_BOOSTS)
+        if field_boosts:
+            boosts.update(field_boosts)
         
-        # Find memory IDs matching the keywords
-        matching_ids = set()
-        
-        if query_keywords:
-            # Get memory IDs for each keyword
-            for keyword in query_keywords:
-                keyword_ids = set(self.index_data['keyword_index'].get(keyword, []))
-                
-                if not matching_ids:
-                    # First keyword, initialize the set
-                    matching_ids = keyword_ids
-                else:
-                    # Subsequent keywords, find intersection (AND logic)
-                    matching_ids &= keyword_ids
-        
-        # Apply filters
-        if filters:
-            filtered_ids = self._apply_filters(matching_ids, filters)
-            
-            if query_keywords:
-                # If we had query keywords, intersect with filtered IDs
-                matching_ids &= filtered_ids
-            else:
-                # If we only had filters, use the filtered IDs
-                matching_ids = filtered_ids
-        
-        # If no matches found, return empty list
-        if not matching_ids:
-            return []
+        # Keyword order and duplicates do not change the results
+        cache_key = ('search', tuple(sorted(set(query_keywords))), self._filter_key(filters), limit,
+                     tuple(sorted(boosts.items())))
         
-        # Retrieve the actual memories
+        def find_top_ids():
+            # Posting lists of every keyword and filter, intersected from the rarest
+            postings = [self.index_data['keyword_index'].get(keyword, []) for keyword in set(query_keywords)]
+            if filters:
+                postings.extend(self._filter_postings(filters))
+            matching_ids = intersect_postings(postings)
+            return self._top_matches(matching_ids, query_keywords, limit, boosts)
+        
+        top_ids = self._cached(cache_key, find_top_ids)
+        
+        # Retrieve only the memories that are returned
         memories = []
-        for memory_id in matching_ids:
+        for memory_id in top_ids:
             memory = self.memory_store.get_memory_by_id(memory_id)
             if memory:
                 memories.append(memory)
+        return memories
+    
+    def _cached(self, key, compute):
+        """
+        Look up a result in the search cache, computing it on a miss
         
-        # Sort by timestamp (newest first) and limit results
-        sorted_memories = sorted(memories, key=lambda x: x.get('timestamp', ''), reverse=True)
-        return sorted_memories[:limit]
+        Hits and misses are reported to the metrics collector, if any.
+        
+        Args:
+            key (tuple): Normalized request
+            compute (callable): Computes the result from the index
+            
+        Returns:
+            The cached or computed result
+        """
+        start_time = time.time()
+        with self.lock:
+            key = (self.revision,) + key
+            result = self.search_cache.get(key)
+            hit = result is not None
+            if not hit:
+                result = compute()
+                self.search_cache.put(key, result)
+        
+        if self.metrics is not None:
+            execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+            self.metrics.record_module_activation(
+                'memory_search_cache_hit' if hit else 'memory_search_cache_miss', execution_time)
+        return result
+    
+    @staticmethod
+    def _filter_key(filters):
+        """Normalize search filters into a hashable cache key"""
+        return tuple(sorted((name, str(value)) for name, value in (filters or {}).items()))
     
-    def _apply_filters(self, memory_ids, filters):
+    def _top_matches(self, memory_ids, keywords, limit, field_boosts=None):
         """
-        Apply filters to a set of memory IDs
+        Score memories from the index and select the best ones
         
         Args:
-            memory_ids (set): Set of memory IDs to filter
-            filters (dict): Filters to apply
+            memory_ids (list): IDs of the matching memories
+            keywords (list): Query keywords
+            limit (int): Number of memories to select
+            field_boosts (dict, optional): Per-field boosts overriding FIELD_BOOSTS
             
         Returns:
-            set: Filtered memory IDs
+            list: IDs of the best memories, best first (newest first among equal scores)
         """
-        filtered_ids = set(memory_ids) if memory_ids else set()
+        if not memory_ids:
+            return []
+        
+        boosts = dict(FIELD_BOOSTS)
+        if field_boosts:
+            boosts.update(field_boosts)
+        
+        stats = self.index_data['memory_stats']
+        memory_count = len(stats) or 1
+        average_length = self.index_data['total_length'] / memory_count or 1
+        
+        # IDF and the boosted field postings of each keyword, looked up once
+        terms = []
+        for keyword in set(keywords):
+            document_frequency = len(self.index_data['keyword_index'].get(keyword, []))
+            idf = math.log(1 + (memory_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            field_postings = [(boost, self.index_data['field_index'].get(field, {}).get(keyword))
+                              for field, boost in boosts.items() if boost]
+            terms.append((idf, [(boost, posting) for boost, posting in field_postings if posting]))
         
-        # Filter by emotion
-        if 'emotion' in filters:
-            emotion = filters['emotion']
-            emotion_ids = set(self.index_data['emotion_index'].get(emotion, []))
+        now = datetime.now().timestamp()
+        
+        def ranked(memory_id):
+            memory_time, importance, length = (stats.get(memory_id) or (None, 0.5, 0))[:3]
+            
+            relevance = 1.0
+            if terms:
+                relevance = 0.0
+                length_norm = 1 - BM25_B + BM25_B * length / average_length
+                for idf, field_postings in terms:
+                    frequency = 0
+                    for boost, posting in field_postings:
+                        count = posting.get(memory_id)
+                        if count:
+                            frequency += boost * count
+                    if frequency > 0:
+                        relevance += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+            
+            # Memories without a timestamp are not decayed
+            recency = 1.0
+            if memory_time is not None:
+                age_in_days = max(now - memory_time, 0) / 86400
+                recency = 0.5 ** (age_in_days / RECENCY_HALF_LIFE_DAYS)
             
-            if filtered_ids:
-                filtered_ids &= emotion_ids
-            else:
-                filtered_ids = emotion_ids
+            return (relevance * recency * importance,
+                    memory_time if memory_time is not None else float('-inf'), memory_id)
+        
+        return [memory_id for _, _, memory_id in heapq.nlargest(limit, map(ranked, memory_ids))]
+    
+    def _filter_postings(self, filters, include_time_range=True):
+        """
+        Get the posting lists selected by search filters
         
-        # Filter by time period
-        if 'time_period' in filters:
-            time_period = filters['time_period']
-            period_ids = set(self.index_data['temporal_index'].get(time_period, []))
+        Args:
+            filters (dict): Filters to apply (emotion, time_period, priority, category,
+                time_from, time_to, last_days)
+            include_time_range (bool): Whether to add a posting list for the time range
             
-            if filtered_ids:
-                filtered_ids &= period_ids
-            else:
-                filtered_ids = period_ids
+        Returns:
+            list: One sorted posting list per filter
+        """
+        filter_indexes = {
+            'emotion': 'emotion_index',
+            'time_period': 'temporal_index',
+            'priority': 'priority_index',
+            'category': 'category_index'
+        }
+        postings = [self.index_data[index_name].get(filters[name], [])
+                    for name, index_name in filter_indexes.items() if name in filters]
         
-        # Filter by priority
-        if 'priority' in filters:
-            priority = filters['priority']
-            priority_ids = set(self.index_data['priority_index'].get(priority, []))
+        time_from, time_to = self._time_bounds(filters)
+        if include_time_range and (time_from is not None or time_to is not None):
+            start, end = self._time_slice(time_from, time_to)
+            postings.append(sorted(memory_id for _, memory_id in self._get_time_index()[start:end]))
+        return postings
+    
+    @staticmethod
+    def _parse_time(value):
+        """
+        Convert a time filter value to Unix time
+        
+        Args:
+            value (str|int|float|datetime): ISO timestamp, Unix time or datetime
             
-            if filtered_ids:
-                filtered_ids &= priority_ids
-            else:
-                filtered_ids = priority_ids
+        Returns:
+            float: Unix time
+            
+        Raises:
+            ValueError: If the value is not a valid time
+        """
+        if isinstance(value, datetime):
+            return value.timestamp()
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return datetime.fromisoformat(str(value)).timestamp()
+    
+    def _time_bounds(self, filters):
+        """
+        Get the [from, to) time range selected by search filters
         
-        # Filter by category
-        if 'category' in filters:
-            category = filters['category']
-            category_ids = set(self.index_data['category_index'].get(category, []))
+        Args:
+            filters (dict): Filters with optional time_from, time_to and last_days
             
-            if filtered_ids:
-                filtered_ids &= category_ids
-            else:
-                filtered_ids = category_ids
+        Returns:
+            tuple: (from, to) Unix times, either of which may be None
+            
+        Raises:
+            ValueError: If a time filter is invalid
+        """
+        time_from = self._parse_time(filters['time_from']) if filters.get('time_from') is not None else None
+        time_to = self._parse_time(filters['time_to']) if filters.get('time_to') is not None else None
+        if filters.get('last_days') is not None:
+            since = datetime.now().timestamp() - float(filters['last_days']) * 86400
+            time_from = since if time_from is None else max(time_from, since)
+        return time_from, time_to
+    
+    def _get_time_index(self):
+        """
+        Get the sorted time index, building it from memory_stats on first use
         
-        return filtered_ids
+        Returns:
+            list: Sorted (time, memory ID) pairs
+        """
+        if self.time_index is None:
+            self.time_index = sorted((stats[0], memory_id) for memory_id, stats in
+                                     self.index_data['memory_stats'].items() if stats[0] is not None)
+        return self.time_index
+    
+    def _time_slice(self, time_from=None, time_to=None):
+        """
+        Locate a [from, to) time range in the time index
+        
+        Args:
+            time_from (float, optional): Start of the range (inclusive), Unix time
+            time_to (float, optional): End of the range (exclusive), Unix time
+            
+        Returns:
+            tuple: (start, end) positions in the time index
+        """
+        time_index = self._get_time_index()
+        start = bisect_left(time_index, (time_from,)) if time_from is not None else 0
+        end = bisect_left(time_index, (time_to,)) if time_to is not None else len(time_index)
+        return start, max(start, end)
+    
+    def browse_memories(self, query='', filters=None, limit=50, cursor=None):
+        """
+        Page through matching memories newest first
+        
+        Unlike search_memories, results are ordered by time only, so a
+        dashboard can walk months of history page by page. The cursor returned
+        with a page continues right after its last memory, even while new
+        memories are being stored.
+        
+        Args:
+            query (str): Optional search query; every keyword must match
+            filters (dict, optional): Filters as in search_memories
+            limit (int): Maximum number of memories per page
+            cursor (str, optional): Cursor returned with the previous page
+            
+        Returns:
+            dict: 'memories' (newest first) and 'next_cursor' (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor or a time filter is invalid
+        """
+        filters = filters or {}
+        query_keywords = self._extract_keywords(query) if query else []
+        
+        with self.lock:
+            time_index = self._get_time_index()
+            start, end = self._time_slice(*self._time_bounds(filters))
+            if cursor:
+                end = min(end, bisect_left(time_index, _parse_cursor(cursor)))
+            
+            # Other filters and keywords are checked against the time range
+            postings = [self.index_data['keyword_index'].get(keyword, []) for keyword in set(query_keywords)]
+            postings.extend(self._filter_postings(filters, include_time_range=False))
+            matching_ids = set(intersect_postings(postings)) if postings else None
+            
+            # One match beyond the page tells whether another page follows
+            page = []
+            position = end - 1
+            while position >= start and len(page) <= limit:
+                if matching_ids is None or time_index[position][1] in matching_ids:
+                    page.append(time_index[position])
+                position -= 1
+            has_more = len(page) > limit
+            page = page[:limit]
+        
+        memories = []
+        for _, memory_id in page:
+            memory = self.memory_store.get_memory_by_id(memory_id)
+            if memory:
+                memories.append(memory)
+        return {
+            'memories': memories,
+            'next_cursor': _format_cursor(page[-1]) if has_more else None
+        }
     
     def get_related_memories(self, memory_id, limit=5):
         """
@@ -451,24 +1238,119 @@ class MemoryIndexer:
             limit (int): Maximum number of related memories to return
             
         Returns:
-            list: Related memories
+            list: Related memories, most strongly related first
         """
-        # Get related memory IDs from cross-references
-        related_ids = self.index_data['cross_references'].get(memory_id, [])
+        # Get related memory IDs from cross-references, strongest first
+        def rank_related():
+            related = self.index_data['cross_references'].get(memory_id, {})
+            return sorted(related.items(), key=lambda item: item[1], reverse=True)
         
-        if not related_ids:
-            return []
+        ranked = self._cached(('related', memory_id), rank_related)
         
-        # Retrieve the actual memories
+        # Retrieve only as many memories as are returned
         related_memories = []
-        for related_id in related_ids:
+        for related_id, weight in ranked:
             memory = self.memory_store.get_memory_by_id(related_id)
             if memory:
+                memory['relation_weight'] = weight
                 related_memories.append(memory)
+                if len(related_memories) == limit:
+                    break
         
-        # Sort by relevance (currently just by timestamp, newest first)
-        sorted_memories = sorted(related_memories, key=lambda x: x.get('timestamp', ''), reverse=True)
-        return sorted_memories[:limit]
+        return related_memories
+    
+    def _get_vector_index(self):
+        """
+        Get the vector index, building it from the store on first use
+        
+        Must be called without holding the indexer lock: the index is built
+        under the store's read lock and then the indexer lock, the order in
+        which store changes reach handle_memory_event.
+        
+        Returns:
+            VectorIndex: The vector index, or None if vector search is disabled
+        """
+        if not self.use_vectors:
+            return None
+        vector_index = self.vector_index
+        if vector_index is not None:
+            return vector_index
+        
+        with self.memory_store.lock.read(), self.lock:
+            if self.vector_index is None:
+                vector_index = VectorIndex()
+                memory_keys = self.index_data['memory_keys'] or {}
+                for memory in self.memory_store.get_all_memories():
+                    if memory['id'] in memory_keys:
+                        vector_index.add(memory['id'], ' '.join(self._memory_fields(memory).values()))
+                self.vector_index = vector_index
+            return self.vector_index
+    
+    def _load_similar(self, ranked, limit):
+        """Load ranked (memory ID, similarity) pairs from the store"""
+        memories = []
+        for memory_id, similarity in ranked:
+            memory = self.memory_store.get_memory_by_id(memory_id)
+            if memory:
+                memory['similarity'] = similarity
+                memories.append(memory)
+                if len(memories) == limit:
+                    break
+        return memories
+    
+    def search_similar(self, text, limit=5, exclude=()):
+        """
+        Find memories whose text is similar to a text, without exact keyword matches
+        
+        Uses the hashed character n-gram vector index, so related wordings and
+        word forms are found too.
+        
+        Args:
+            text (str): The text to compare against
+            limit (int): Maximum number of memories to return
+            exclude (iterable): Memory IDs to leave out
+            
+        Returns:
+            list: Memories with a 'similarity' field, most similar first;
+                empty if vector search is disabled
+        """
+        if not self.use_vectors or not text:
+            return []
+        exclude = tuple(sorted(exclude))
+        vector_index = self._get_vector_index()
+        
+        def find_similar():
+            return vector_index.search(text_vector(text, vector_index.dimensions), limit, exclude)
+        
+        return self._load_similar(self._cached(('similar_text', normalize_text(text), limit, exclude),
+                                               find_similar), limit)
+    
+    def get_similar_memories(self, memory_id, limit=5):
+        """
+        Get the nearest neighbours of a memory in the vector index
+        
+        Unlike get_related_memories this is not limited to memories stored
+        around the same time.
+        
+        Args:
+            memory_id (str): ID of the memory
+            limit (int): Maximum number of memories to return
+            
+        Returns:
+            list: Memories with a 'similarity' field, most similar first;
+                empty if vector search is disabled or the memory is unknown
+        """
+        if not self.use_vectors:
+            return []
+        vector_index = self._get_vector_index()
+        
+        def find_similar():
+            vector = vector_index.vector(memory_id)
+            if vector is None:
+                return []
+            return vector_index.search(vector, limit, exclude=(memory_id,))
+        
+        return self._load_similar(self._cached(('similar', memory_id, limit), find_similar), limit)
     
     def get_memories_by_emotion(self, emotion, limit=10):
         """
@@ -510,25 +1392,9 @@ class MemoryIndexer:
         Returns:
             list: Memories from the specified time period
         """
-        # Format the time period
-        time_period = f"{year:04d}-{month:02d}"
-        
-        # Get memory IDs for the time period
-        memory_ids = self.index_data['temporal_index'].get(time_period, [])
-        
-        if not memory_ids:
-            return []
-        
-        # Retrieve the actual memories
-        memories = []
-        for memory_id in memory_ids:
-            memory = self.memory_store.get_memory_by_id(memory_id)
-            if memory:
-                memories.append(memory)
-        
-        # Sort by timestamp (newest first) and limit results
-        sorted_memories = sorted(memories, key=lambda x: x.get('timestamp', ''), reverse=True)
-        return sorted_memories[:limit]
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+        return self.browse_memories(filters={'time_from': start, 'time_to': end}, limit=limit)['memories']
     
     def get_index_stats(self):
         """
@@ -544,10 +1410,46 @@ class MemoryIndexer:
             'emotion_count': len(self.index_data['emotion_index']),
             'priority_count': len(self.index_data['priority_index']),
             'cross_reference_count': len(self.index_data['cross_references']),
+            'search_cache': self.search_cache.get_stats(),
+            'vector_count': len(self.vector_index) if self.vector_index is not None else 0,
             'last_indexed': self.index_data['last_indexed'],
             'last_updated': self.index_data['last_updated']
         }
 
+
+def get_memory_indexer(memory_store=None, index_path='data/memory_index.bin', **options):
+    """
+    Get the memory indexer shared by the whole process for an index path
+    
+    Modules should use this instead of creating their own MemoryIndexer, since
+    every instance indexes each stored memory again and separate instances
+    overwrite each other's index file. The first call for an index path
+    creates the indexer; later calls return the same instance.
+    
+    Args:
+        memory_store (MemoryStore, optional): The store to index; the shared store if omitted
+        index_path (str): Path of the binary index file
+        **options: Further MemoryIndexer arguments, used when the indexer is created
+        
+    Returns:
+        MemoryIndexer: The shared memory indexer
+    """
+    key = os.path.abspath(index_path)
+    with _shared_indexers_lock:
+        indexer = _shared_indexers.get(key)
+        if indexer is None:
+            indexer = MemoryIndexer(memory_store, index_path=index_path, **options)
+            _shared_indexers[key] = indexer
+        return indexer
+
+
+def _forget_shared_indexer(indexer):
+    """Remove a closed indexer from the shared registry"""
+    with _shared_indexers_lock:
+        for key, shared in list(_shared_indexers.items()):
+            if shared is indexer:
+                del _shared_indexers[key]
+
 # Example usage
 if __name__ == "__main__":
     indexer = MemoryIndexer()
@@ -3,8 +3,9 @@ import os
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
-from memory_store import MemoryStore
-from memory_indexer import MemoryIndexer
+from memory_store import MemoryStore, get_memory_store
+from memory_indexer import MemoryIndexer, get_memory_indexer
+from memory_shards import MemoryShardManager, user_memory
 from persona_mesh import PersonaMesh
 from emotional_memory import get_last_emotion
 
@@ -26,7 +27,8 @@ class MemoryPersonaBridge:
     
     def __init__(self, memory_store: Optional[MemoryStore] = None, 
                  memory_indexer: Optional[MemoryIndexer] = None,
-                 persona_mesh: Optional[PersonaMesh] = None):
+                 persona_mesh: Optional[PersonaMesh] = None,
+                 memory_shards: Optional[MemoryShardManager] = None):
         """
         Initialize the MemoryPersonaBridge with connections to memory and persona systems
         
@@ -34,9 +36,12 @@ class MemoryPersonaBridge:
             memory_store: The memory store for accessing episodic and semantic memories
             memory_indexer: The memory indexer for searching and categorizing memories
             persona_mesh: The persona mesh for unified persona responses
+            memory_shards: Per-user memory shards; memories of a known user are read from and stored in their shard
         """
-        self.memory_store = memory_store if memory_store else MemoryStore()
-        self.memory_indexer = memory_indexer if memory_indexer else MemoryIndexer(self.memory_store)
+        self.memory_store = memory_store if memory_store else get_memory_store()
+        # The indexer follows the store, so a second one would index every memory twice
+        self.memory_indexer = memory_indexer if memory_indexer else get_memory_indexer(self.memory_store)
+        self.memory_shards = memory_shards
         self.persona_mesh = persona_mesh if persona_mesh else PersonaMesh(self.memory_store)
         
         # Topic-persona affinity map
@@ -92,18 +97,26 @@ class MemoryPersonaBridge:
         except Exception as e:
             print(f"Error saving memory-persona associations: {e}")
     
-    def analyze_user_input(self, user_input: str) -> Dict[str, Any]:
+    def analyze_user_input(self, user_input: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze user input to determine relevant memories and topics
         
         Args:
             user_input: The user's input text
+            user_id: The user whose memories are searched (the shared memories if not given)
             
         Returns:
             Dictionary with analysis results including topics and relevant memories
         """
-        # Search for relevant memories
-        relevant_memories = self.memory_indexer.search_memories(user_input, limit=5)
+        with user_memory(self.memory_shards, user_id, self.memory_store, self.memory_indexer) as (_, memory_indexer):
+            # Search for relevant memories
+            relevant_memories = memory_indexer.search_memories(user_input, limit=5)
+            
+            # Fill up with similar wordings when the vector index is enabled
+            if len(relevant_memories) < 5:
+                relevant_memories += memory_indexer.search_similar(
+                    user_input, limit=5 - len(relevant_memories),
+                    exclude=[memory['id'] for memory in relevant_memories])
         
         # Determine the topic category
         topic = self._categorize_topic(user_input, relevant_memories)
@@ -235,19 +248,21 @@ class MemoryPersonaBridge:
         
         return emotion_scores
     
-    def determine_persona_weights(self, user_input: str, session_id: str = "default") -> Dict[str, float]:
+    def determine_persona_weights(self, user_input: str, session_id: str = "default",
+                                  user_id: Optional[str] = None) -> Dict[str, float]:
         """
         Determine the optimal persona weights based on memory and context
         
         Args:
             user_input: The user's input text
             session_id: The session identifier for emotion tracking
+            user_id: The user whose memories are consulted (the shared memories if not given)
             
         Returns:
             Dictionary mapping persona names to weights
         """
         # Analyze the user input
-        analysis = self.analyze_user_input(user_input)
+        analysis = self.analyze_user_input(user_input, user_id)
         
         # Get current emotion
         current_emotion = get_last_emotion(session_id)
@@ -303,19 +318,21 @@ class MemoryPersonaBridge:
         
         return persona_weights
     
-    def get_memory_guided_response(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
+    def get_memory_guided_response(self, user_input: str, session_id: str = "default",
+                                   user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get a response guided by memory analysis
         
         Args:
             user_input: The user's input text
             session_id: The session identifier for emotion tracking
+            user_id: The user whose memories are consulted and extended (the shared memories if not given)
             
         Returns:
             A dictionary containing the response and metadata
         """
         # Determine persona weights based on memory and context
-        persona_weights = self.determine_persona_weights(user_input, session_id)
+        persona_weights = self.determine_persona_weights(user_input, session_id, user_id)
         
         # Apply these weights to the persona mesh
         self.persona_mesh.adjust_persona_weights({p: w - 0.5 for p, w in persona_weights.items()})
@@ -324,20 +341,22 @@ class MemoryPersonaBridge:
         response = self.persona_mesh.get_unified_response(user_input, session_id)
         
         # Store this interaction in memory
+        topic = self.analyze_user_input(user_input, user_id)["topic"]
         if self.memory_store:
-            self.memory_store.store_episodic_memory({
-                "input": user_input,
-                "response": response["text"],
-                "emotion": get_last_emotion(session_id),
-                "context": {
-                    "persona_weights": persona_weights,
-                    "topic": self.analyze_user_input(user_input)["topic"]
-                }
-            })
+            with user_memory(self.memory_shards, user_id, self.memory_store) as (memory_store, _):
+                memory_store.store_episodic_memory({
+                    "input": user_input,
+                    "response": response["text"],
+                    "emotion": get_last_emotion(session_id),
+                    "context": {
+                        "persona_weights": persona_weights,
+                        "topic": topic
+                    }
+                })
         
         # Add memory analysis to response metadata
         response["memory_analysis"] = {
-            "topic": self.analyze_user_input(user_input)["topic"],
+            "topic": topic,
             "persona_weights": persona_weights
         }
         
@@ -0,0 +1,335 @@
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class ReadWriteLock:
+    """
+    Reader/writer lock for memory stores
+
+    Any number of threads may read at once, while a writer has exclusive
+    access. Waiting writers block new readers, so a stream of requests cannot
+    starve consolidation or inserts. Writers are reentrant and may also take
+    the read lock; upgrading a read lock to a write lock is not supported.
+
+    Using the lock directly as a context manager takes the write lock, so it
+    can replace a plain threading.RLock.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock"""
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = None
+        self.write_depth = 0
+        self.waiting_writers = 0
+        self.local = threading.local()  # Read depth of the current thread
+
+    def acquire_read(self):
+        """Acquire the lock for reading"""
+        depth = getattr(self.local, 'read_depth', 0)
+        if depth or self.writer == threading.get_ident():
+            # Nested read, or a read inside this thread's own write
+            self.local.read_depth = depth + 1
+            return
+
+        with self.condition:
+            while self.writer is not None or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        self.local.read_depth = 1
+        self.local.counted = True
+
+    def release_read(self):
+        """Release a read lock taken by the current thread"""
+        self.local.read_depth -= 1
+        if self.local.read_depth or not getattr(self.local, 'counted', False):
+            return
+
+        self.local.counted = False
+        with self.condition:
+            self.readers -= 1
+            if not self.readers:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        """Acquire the lock for writing"""
+        me = threading.get_ident()
+        if self.writer == me:
+            self.write_depth += 1
+            return
+        if getattr(self.local, 'read_depth', 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+        with self.condition:
+            self.waiting_writers += 1
+            try:
+                while self.writer is not None or self.readers:
+                    self.condition.wait()
+            finally:
+                self.waiting_writers -= 1
+            self.writer = me
+            self.write_depth = 1
+
+    def release_write(self):
+        """Release a write lock taken by the current thread"""
+        self.write_depth -= 1
+        if self.write_depth:
+            return
+
+        with self.condition:
+            self.writer = None
+            self.condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Context manager holding the read lock"""
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Context manager holding the write lock"""
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+    def __enter__(self):
+        self.acquire_write()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release_write()
+
+
+class ConsolidationLoop(threading.Thread):
+    """
+    Background thread consolidating the memory stores of one storage path or group
+
+    Stores are held through weak references, so a store that is dropped
+    without being closed is not kept alive by the thread. The thread sleeps
+    until the earliest store is due and is stopped by the scheduler once the
+    last store is unregistered.
+    """
+
+    def __init__(self, storage_path):
+        """
+        Initialize the loop
+
+        Args:
+            storage_path (str): Absolute storage path (or consolidation group) served by this loop
+        """
+        super().__init__(name=f"memory-consolidation:{storage_path}", daemon=True)
+        self.storage_path = storage_path
+        self.stores = weakref.WeakSet()
+        self.wake_event = threading.Event()
+        self.stopped = False
+
+    def next_due(self, store):
+        """
+        Get the time at which a store is due for consolidation
+
+        Args:
+            store (MemoryStore): The store
+
+        Returns:
+            float: Unix timestamp
+        """
+        last_consolidation = datetime.fromisoformat(store.last_consolidation).timestamp()
+        return last_consolidation + store.config['consolidation_interval']
+
+    def run(self):
+        """Consolidate each store whenever it is due"""
+        while not self.stopped:
+            self.wake_event.clear()
+            wait = self.consolidate_due_stores()
+            # Re-check at least hourly so clock changes are picked up
+            self.wake_event.wait(min(max(wait, 1), 60 * 60))
+
+    def consolidate_due_stores(self):
+        """
+        Consolidate every store that is due
+
+        Returns:
+            float: Seconds until the next store is due
+        """
+        wait = 60 * 60
+        for store in list(self.stores):
+            if self.stopped:
+                break
+            try:
+                if self.next_due(store) <= time.time():
+                    store.consolidate_memories()
+                wait = min(wait, self.next_due(store) - time.time())
+            except Exception as e:
+                print(f"Error consolidating memories in {self.storage_path}: {e}")
+        return wait
+
+    def stop(self):
+        """Stop the loop after the current consolidation"""
+        self.stopped = True
+        self.wake_event.set()
+
+
+class ConsolidationScheduler:
+    """
+    Process-wide consolidation scheduler
+
+    Several modules create their own MemoryStore, so the scheduler makes sure
+    only one consolidation thread runs per storage path, however many stores
+    are registered for it. Stores configured with the same
+    'consolidation_group' (such as the shards of a MemoryShardManager) share
+    one thread even though their paths differ.
+    """
+
+    def __init__(self):
+        """Initialize the scheduler with no loops"""
+        self.lock = threading.Lock()
+        self.loops = {}  # Maps absolute storage paths (or consolidation groups) to their ConsolidationLoop
+
+    @staticmethod
+    def _loop_key(store):
+        """Get the loop serving a store: its consolidation group, or its storage path"""
+        return store.config.get('consolidation_group') or os.path.abspath(store.config['storage_path'])
+
+    def register(self, store):
+        """
+        Schedule periodic consolidation of a memory store
+
+        Args:
+            store (MemoryStore): The store to consolidate
+        """
+        key = self._loop_key(store)
+
+        with self.lock:
+            loop = self.loops.get(key)
+            if loop is None or not loop.is_alive():
+                loop = ConsolidationLoop(key)
+                self.loops[key] = loop
+                loop.stores.add(store)
+                loop.start()
+            else:
+                loop.stores.add(store)
+                loop.wake_event.set()
+
+    def unregister(self, store):
+        """
+        Stop consolidating a memory store
+
+        Args:
+            store (MemoryStore): The store to remove
+        """
+        key = self._loop_key(store)
+
+        with self.lock:
+            loop = self.loops.get(key)
+            if loop is None:
+                return
+            loop.stores.discard(store)
+            if not loop.stores:
+                loop.stop()
+                del self.loops[key]
+
+    def loop_count(self):
+        """
+        Get the number of running consolidation threads
+
+        Returns:
+            int: Number of live loops
+        """
+        with self.lock:
+            return sum(1 for loop in self.loops.values() if loop.is_alive())
+
+
+class FlushScheduler:
+    """
+    Process-wide thread running deferred flushes
+
+    Memory stores buffer retrieval counts and log storages batch their
+    fsyncs. Instead of each starting a thread or timer of its own, they
+    schedule the flush here and a single thread runs every flush once it is
+    due, so the number of threads does not grow with the number of open
+    stores.
+    """
+
+    def __init__(self):
+        """Initialize the scheduler with nothing scheduled"""
+        self.condition = threading.Condition()
+        self.due = {}  # Maps scheduled callables to the monotonic time they are due
+        self.thread = None
+
+    def schedule(self, callback, delay):
+        """
+        Run a callable once delay seconds have passed
+
+        Scheduling a callable that is already pending keeps the earlier run,
+        so repeated calls do not postpone it.
+
+        Args:
+            callback (callable): The flush to run, without arguments
+            delay (float): Seconds to wait
+        """
+        due = time.monotonic() + max(delay, 0)
+        with self.condition:
+            if self.due.get(callback, due) < due:
+                return
+            self.due[callback] = due
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="memory-flush", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def cancel(self, callback):
+        """
+        Drop a pending run of a callable
+
+        Args:
+            callback (callable): The scheduled flush
+        """
+        with self.condition:
+            self.due.pop(callback, None)
+
+    def is_scheduled(self, callback):
+        """
+        Check whether a callable has a pending run
+
+        Args:
+            callback (callable): The flush
+
+        Returns:
+            bool: True if the callable is scheduled
+        """
+        with self.condition:
+            return callback in self.due
+
+    def _run(self):
+        """Wait for the earliest flush and run every flush that is due"""
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                ready = [callback for callback, due in self.due.items() if due <= now]
+                if not ready:
+                    self.condition.wait(min(self.due.values()) - now if self.due else None)
+                    continue
+                for callback in ready:
+                    del self.due[callback]
+
+            # Flushes take their own locks, so they run without the scheduler lock
+            for callback in ready:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error running scheduled memory flush: {e}")
+
+
+# Shared by every memory store in the process
+consolidation_scheduler = ConsolidationScheduler()
+flush_scheduler = FlushScheduler()
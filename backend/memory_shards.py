@@ -0,0 +1,330 @@
+import copy
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from memory_indexer import get_memory_indexer
+from memory_store import get_memory_store
+
+_SAFE_USER_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class MemoryShardManager:
+    """
+    Per-user partitioning of the memory store
+
+    Every user gets their own shard, a MemoryStore with its own file (or
+    SQLite database) and its own MemoryIndexer, so retrieval, search,
+    consolidation and the user summary only ever touch that user's memories.
+    Shards are loaded lazily on first access and kept in LRU order; once the
+    open shards exceed the memory budget or the shard limit, the least
+    recently used ones are flushed and closed. All shards share one
+    consolidation thread, and retrieval counts and log syncs run on the
+    process-wide flush thread, so open shards add no threads of their own.
+    Requests lease the shard they use (see lease), and a leased shard is
+    never closed, so no request keeps writing to a store that was closed
+    under it.
+    """
+
+    def __init__(self, base_config=None, shard_dir='data/memory_shards',
+                 memory_budget=64 * 1024 * 1024, max_open_shards=256, indexer_options=None):
+        """
+        Initialize the shard manager
+
+        Args:
+            base_config (dict, optional): MemoryStore configuration shared by all shards
+            shard_dir (str): Directory holding one storage file and one index file per user
+            memory_budget (int): Approximate bytes the open shards may hold
+            max_open_shards (int): Maximum number of shards kept open
+            indexer_options (dict, optional): MemoryIndexer arguments for the shard indexers
+        """
+        self.base_config = dict(base_config or {})
+        self.shard_dir = shard_dir
+        self.memory_budget = memory_budget
+        self.max_open_shards = max_open_shards
+        self.indexer_options = dict(indexer_options or {})
+
+        self.shards = OrderedDict()  # Maps user IDs to open stores, least recently used first
+        self.indexers = {}  # Maps user IDs to the indexers of their open shards
+        self.bytes_per_memory = {}  # Maps user IDs to the footprint per memory measured on load
+        self.leases = {}  # Maps user IDs to the number of requests holding their shard
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _shard_name(user_id):
+        """Get the file name stem of a user's shard; IDs that are not safe file names are hashed"""
+        user_id = str(user_id)
+        return user_id if _SAFE_USER_ID.match(user_id) else hashlib.sha256(user_id.encode('utf-8')).hexdigest()
+
+    def shard_path(self, user_id):
+        """
+        Get the storage path of a user's shard
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            str: Storage path of the shard
+        """
+        extension = 'db' if self.base_config.get('storage_backend') == 'sqlite' else 'json'
+        return os.path.join(self.shard_dir, f"{self._shard_name(user_id)}.{extension}")
+
+    def index_path(self, user_id):
+        """
+        Get the index file path of a user's shard
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            str: Path of the shard's binary index file
+        """
+        return os.path.join(self.shard_dir, f"{self._shard_name(user_id)}.index.bin")
+
+    def get_store(self, user_id):
+        """
+        Get the memory store of a user, loading it on first access
+
+        The shard is not leased, so it may be closed once it becomes the least
+        recently used one; callers that keep using it should lease it instead.
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            MemoryStore: The user's shard
+        """
+        with self.lock:
+            store = self._open_shard(user_id)
+            self._evict_idle_shards()
+            return store
+
+    def acquire(self, user_id):
+        """
+        Lease the memory store of a user, loading it on first access
+
+        The shard stays open until every lease on it is released.
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            MemoryStore: The user's shard
+        """
+        with self.lock:
+            store = self._open_shard(user_id)
+            self.leases[user_id] = self.leases.get(user_id, 0) + 1
+            self._evict_idle_shards()
+            return store
+
+    def release(self, user_id):
+        """
+        Release a lease taken with acquire
+
+        Args:
+            user_id (str): The user ID
+        """
+        with self.lock:
+            remaining = self.leases.get(user_id, 0) - 1
+            if remaining > 0:
+                self.leases[user_id] = remaining
+            else:
+                self.leases.pop(user_id, None)
+            # Shards kept open only by their lease can be closed now
+            self._evict_idle_shards()
+
+    @contextmanager
+    def lease(self, user_id):
+        """
+        Lease the memory store of a user for the duration of a with block
+
+        Args:
+            user_id (str): The user ID
+
+        Yields:
+            MemoryStore: The user's shard
+        """
+        store = self.acquire(user_id)
+        try:
+            yield store
+        finally:
+            self.release(user_id)
+
+    def _open_shard(self, user_id):
+        """Get an open shard as the most recently used one, loading it if needed (the caller holds the lock)"""
+        store = self.shards.get(user_id)
+        if store is not None:
+            self.shards.move_to_end(user_id)
+            return store
+        return self._load_shard(user_id)
+
+    def get_indexer(self, user_id):
+        """
+        Get the memory indexer of a user's shard, loading the shard on first access
+
+        Like get_store, this does not lease the shard; callers serving a
+        request should hold a lease on it while searching.
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            MemoryIndexer: The indexer following the user's shard
+        """
+        with self.lock:
+            self._open_shard(user_id)
+            self._evict_idle_shards()
+            return self.indexers[user_id]
+
+    def _load_shard(self, user_id):
+        """Open a user's shard with its indexer and measure its footprint"""
+        config = dict(self.base_config)
+        config['storage_path'] = self.shard_path(user_id)
+        # A new SQLite shard must not import the shared JSON store
+        config['import_json_path'] = None
+        # All shards are consolidated by one thread
+        config['consolidation_group'] = f"shards:{os.path.abspath(self.shard_dir)}"
+
+        store = get_memory_store(config)
+        indexer = get_memory_indexer(store, index_path=self.index_path(user_id), **self.indexer_options)
+        indexer.sync_index()
+        self.shards[user_id] = store
+        self.indexers[user_id] = indexer
+
+        footprint = store.memory_footprint()
+        self.bytes_per_memory[user_id] = footprint['bytes'] / max(footprint['episodic_memories'], 1)
+        return store
+
+    def _estimate_bytes(self, user_id, store):
+        """Estimate the footprint of a shard from its size, without walking its memories"""
+        episodic_count = len(getattr(store, 'episodic_by_id', ()))
+        return self.bytes_per_memory[user_id] * max(episodic_count, 1)
+
+    def open_bytes(self):
+        """
+        Estimate the bytes held by all open shards
+
+        Returns:
+            float: Approximate bytes
+        """
+        return sum(self._estimate_bytes(user_id, store) for user_id, store in self.shards.items())
+
+    def _evict_idle_shards(self):
+        """Close least recently used shards until the open shards fit the budget"""
+        total = self.open_bytes()
+        # The most recently used shard and leased shards always stay open
+        candidates = [user_id for user_id in list(self.shards)[:-1] if not self.leases.get(user_id)]
+        for user_id in candidates:
+            if len(self.shards) <= self.max_open_shards and total <= self.memory_budget:
+                break
+            store = self.shards.pop(user_id)
+            total -= self._estimate_bytes(user_id, store)
+            del self.bytes_per_memory[user_id]
+            self._close_shard(user_id, store)
+
+    def _close_shard(self, user_id, store):
+        """Save the index of a shard that was removed from the open shards and close its store"""
+        try:
+            self.indexers.pop(user_id).close()
+            store.close()
+        except Exception as e:
+            print(f"Error closing memory shard for {user_id}: {e}")
+
+    def migrate_shared_memories(self, shared_store, user_id):
+        """
+        Copy the memories of the shared store into a user's shard
+
+        Memories stored before partitioning was enabled carry no owner, so a
+        deployment moving to per-user shards assigns them to one user (usually
+        its single existing account). Memories already in the shard are kept,
+        so running the migration again is harmless. The shared store is left
+        unchanged.
+
+        Args:
+            shared_store (MemoryStore): The shared store
+            user_id (str): The user receiving the memories
+
+        Returns:
+            int: Number of episodic memories in the shard afterwards
+        """
+        with shared_store.lock.read():
+            snapshot = copy.deepcopy(shared_store._snapshot())
+
+        with self.lease(user_id) as store:
+            store.import_memories(snapshot)
+            return store.memory_footprint()['episodic_memories']
+
+    def close(self):
+        """Flush and close every open shard"""
+        with self.lock:
+            while self.shards:
+                user_id, store = self.shards.popitem(last=False)
+                self._close_shard(user_id, store)
+            self.bytes_per_memory = {}
+            self.leases = {}
+
+    def get_stats(self):
+        """
+        Get shard statistics
+
+        Returns:
+            dict: Open shard count, estimated bytes and limits
+        """
+        with self.lock:
+            return {
+                'open_shards': len(self.shards),
+                'leased_shards': len(self.leases),
+                'open_bytes': int(self.open_bytes()),
+                'memory_budget': self.memory_budget,
+                'max_open_shards': self.max_open_shards
+            }
+
+
+@contextmanager
+def user_memory(memory_shards, user_id, memory_store, memory_indexer=None):
+    """
+    Get the store and indexer holding a user's memories for a with block
+
+    Components that read and write memories on behalf of a user go through
+    this, so they follow the same partitioning as the API: with a shard
+    manager and a known user, the user's shard is leased for the block;
+    otherwise the shared store and indexer are used.
+
+    Args:
+        memory_shards (MemoryShardManager): The shard manager, or None when memories are not partitioned
+        user_id (str): The user ID, or None when unknown
+        memory_store (MemoryStore): The shared store
+        memory_indexer (MemoryIndexer, optional): The shared indexer
+
+    Yields:
+        tuple: (MemoryStore, MemoryIndexer) of the user
+    """
+    if memory_shards is None or not user_id:
+        yield memory_store, memory_indexer
+        return
+
+    with memory_shards.lease(user_id) as store:
+        yield store, memory_shards.get_indexer(user_id)
+
+
+if __name__ == "__main__":
+    # Usage: python memory_shards.py <user_id>
+    # Copies the shared store into a user's shard before MEMORY_PARTITIONING=user is enabled
+    if len(sys.argv) != 2:
+        print("Usage: python memory_shards.py <user_id>")
+        sys.exit(1)
+
+    shared_config = {'storage_backend': os.getenv('MEMORY_STORAGE_BACKEND', 'log')}
+    if os.getenv('MEMORY_STORAGE_PATH'):
+        shared_config['storage_path'] = os.getenv('MEMORY_STORAGE_PATH')
+    shared_store = get_memory_store(shared_config)
+    shards = MemoryShardManager({'storage_backend': shared_config['storage_backend']})
+
+    count = shards.migrate_shared_memories(shared_store, sys.argv[1])
+    print(f"The memory shard of {sys.argv[1]} holds {count} episodic memories")
+    shards.close()
+    shared_store.close()
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from memory_scheduler import flush_scheduler
+
+logger = logging.getLogger("memory_storage")
+
+
+class JSONFileStorage:
+    """
+    Whole-file JSON storage for MemoryStore
+
+    Every flush rewrites the complete memory snapshot. This is the original
+    persistence behaviour of MemoryStore and remains the default backend.
+    """
+
+    def __init__(self, storage_path):
+        """
+        Initialize the storage
+
+        Args:
+            storage_path (str): Path of the JSON snapshot file
+        """
+        self.storage_path = storage_path
+
+    def load(self):
+        """
+        Load the stored snapshot
+
+        Returns:
+            tuple: (snapshot dict or None, list of log records to replay)
+        """
+        if not os.path.exists(self.storage_path):
+            return None, []
+
+        with open(self.storage_path, 'r', encoding='utf-8') as f:
+            return json.load(f), []
+
+    def append(self, record):
+        """Record a mutation (the whole snapshot is written on flush instead)"""
+
+    def flush(self, snapshot_fn):
+        """
+        Persist pending changes
+
+        Args:
+            snapshot_fn (callable): Returns the full snapshot dict
+        """
+        self.compact(snapshot_fn())
+
+    def compact(self, snapshot):
+        """
+        Write a full snapshot
+
+        Args:
+            snapshot (dict): The complete memory state
+        """
+        with open(self.storage_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+
+    def close(self):
+        """Release any resources held by the storage"""
+
+
+class AppendLogStorage:
+    """
+    Append-only log storage for MemoryStore
+
+    Each mutation is appended to a log file next to the snapshot as one compact
+    JSON record per line, so persisting a request costs O(1) regardless of how
+    many memories are stored. The log is fsynced in batches, and the shared
+    flush thread syncs records left unsynced once fsync_interval has passed. It is replayed on
+    load and periodically compacted into the snapshot file, which keeps the
+    same format as JSONFileStorage. Compaction waits until the log is at least as
+    long as the snapshot, so its cost stays amortized O(1) per record.
+    """
+
+    def __init__(self, storage_path, fsync_batch_size=32, fsync_interval=1.0,
+                 compact_threshold=1000):
+        """
+        Initialize the storage
+
+        Args:
+            storage_path (str): Path of the JSON snapshot file
+            fsync_batch_size (int): Number of records written before forcing an fsync
+            fsync_interval (float): Maximum seconds a written record stays unsynced
+            compact_threshold (int): Minimum number of log records that triggers compaction
+        """
+        self.storage_path = storage_path
+        self.log_path = f"{storage_path}.log"
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+
+        self.pending = []
+        self.log_records = 0
+        self.snapshot_records = 0
+        self.unsynced_records = 0
+        self.last_fsync = time.monotonic()
+        self.log_file = None
+
+        # Guards the log file against the scheduled sync of records left unsynced
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def _count_snapshot_records(snapshot):
+        """Approximate the number of records held by a snapshot"""
+        if not snapshot:
+            return 0
+        return len(snapshot.get('episodic_memories', [])) + sum(
+            len(entries) for entries in snapshot.get('semantic_memories', {}).values())
+
+    def load(self):
+        """
+        Load the snapshot and the records appended since it was written
+
+        Returns:
+            tuple: (snapshot dict or None, list of log records to replay)
+        """
+        snapshot = None
+        if os.path.exists(self.storage_path):
+            with open(self.storage_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        self.snapshot_records = self._count_snapshot_records(snapshot)
+
+        records = []
+        if os.path.exists(self.log_path):
+            valid_end = 0  # Byte offset just past the last intact record
+            torn = False
+            line = b'\n'
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            torn = True
+                            break
+                    valid_end += len(line)
+            if torn or not line.endswith(b'\n'):
+                self._repair_log(valid_end, torn)
+
+        self.log_records = len(records)
+        return snapshot, records
+
+    def _repair_log(self, valid_end, torn):
+        """
+        Cut a torn final record off the log, so later appends are replayed too
+
+        Args:
+            valid_end (int): Byte offset just past the last intact record
+            torn (bool): Whether a torn record follows that offset
+        """
+        with open(self.log_path, 'rb+') as f:
+            if torn:
+                # A torn final write after a crash; everything before it is intact
+                logger.error(f"Truncating corrupt memory log record in {self.log_path} at byte {valid_end}")
+                f.truncate(valid_end)
+            # Appends must start on a fresh line
+            if valid_end:
+                f.seek(valid_end - 1)
+                if f.read(1) != b'\n':
+                    f.seek(valid_end)
+                    f.write(b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, record):
+        """
+        Queue a mutation record to be written on the next flush
+
+        Args:
+            record (dict): The mutation record
+        """
+        self.pending.append(record)
+
+    def flush(self, snapshot_fn):
+        """
+        Append pending records to the log, compacting it when it grows too large
+
+        Args:
+            snapshot_fn (callable): Returns the full snapshot dict, used for compaction
+        """
+        with self.lock:
+            log_size = self.log_records + len(self.pending)
+            if log_size >= max(self.compact_threshold, self.snapshot_records):
+                self.compact(snapshot_fn())
+                return
+
+            if not self.pending:
+                return
+
+            if self.log_file is None:
+                self.log_file = open(self.log_path, 'a', encoding='utf-8')
+
+            lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in self.pending]
+            self.log_file.write('\n'.join(lines) + '\n')
+            self.log_file.flush()
+
+            self.log_records += len(self.pending)
+            self.unsynced_records += len(self.pending)
+            self.pending = []
+
+            if (self.unsynced_records >= self.fsync_batch_size or
+                    time.monotonic() - self.last_fsync >= self.fsync_interval):
+                self.sync()
+            else:
+                self._schedule_sync()
+
+    def _schedule_sync(self):
+        """Schedule a sync of the written records once fsync_interval has passed"""
+        delay = self.fsync_interval - (time.monotonic() - self.last_fsync)
+        flush_scheduler.schedule(self._timed_sync, delay)
+
+    def _timed_sync(self):
+        """Sync records that no later write has synced"""
+        with self.lock:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Error syncing memory log {self.log_path}: {e}")
+
+    def sync(self):
+        """Force written log records to disk"""
+        with self.lock:
+            if self.log_file is not None and self.unsynced_records:
+                os.fsync(self.log_file.fileno())
+            self.unsynced_records = 0
+            self.last_fsync = time.monotonic()
+
+    def compact(self, snapshot):
+        """
+        Write a full snapshot and truncate the log
+
+        Args:
+            snapshot (dict): The complete memory state
+        """
+        # Write the snapshot atomically so a crash never leaves a half-written file
+        temp_path = f"{self.storage_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.storage_path)
+
+        with self.lock:
+            # Records up to now are contained in the snapshot
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+            with open(self.log_path, 'w', encoding='utf-8'):
+                pass
+
+            self.pending = []
+            self.log_records = 0
+            self.snapshot_records = self._count_snapshot_records(snapshot)
+            self.unsynced_records = 0
+            self.last_fsync = time.monotonic()
+
+    def close(self):
+        """Flush outstanding log writes to disk and close the log file"""
+        with self.lock:
+            flush_scheduler.cancel(self._timed_sync)
+            self.sync()
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+
+
+# Available storage backends by configuration name
+STORAGE_BACKENDS = {
+    'json': JSONFileStorage,
+    'log': AppendLogStorage,
+}
+
+
+def create_storage(config):
+    """
+    Create the storage backend selected by a MemoryStore configuration
+
+    Args:
+        config (dict): MemoryStore configuration
+
+    Returns:
+        object: The storage backend instance
+    """
+    backend = config.get('storage_backend', 'json')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown memory storage backend: {backend}")
+
+    if backend == 'log':
+        return AppendLogStorage(
+            config['storage_path'],
+            fsync_batch_size=config.get('log_fsync_batch_size', 32),
+            fsync_interval=config.get('log_fsync_interval', 1.0),
+            compact_threshold=config.get('log_compact_threshold', 1000)
+        )
+
+    return STORAGE_BACKENDS[backend](config['storage_path'])
@@ -1,9 +1,24 @@
-import json
+import heapq
 import os
-import time
+import sys
 import threading
+import uuid
+import weakref
+from collections import Counter
+from itertools import islice
 from datetime import datetime
-import re
+from memory_storage import create_storage
+from memory_scheduler import ReadWriteLock, consolidation_scheduler, flush_scheduler
+from text_index import TextIndex, tokenize
+from semantic_rules import SemanticRuleEngine
+
+# Shared stores by absolute storage path (see get_memory_store)
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
+_default_store_path = None
+
+# Every live store, shared or not, for instrumentation
+_live_stores = weakref.WeakSet()
 
 class MemoryStore:
     """
@@ -18,24 +33,48 @@ class MemoryStore:
 
     def __init__(self, config=None):
         """Initialize the memory store with default configuration"""
-        self.episodic_memories = []
+        self.episodic_by_id = {}  # Maps memory IDs to episodic memories, oldest first
+        self.eviction_heap = []  # Min-heap of (importance, timestamp, id) eviction candidates
+        self.text_index = TextIndex()  # Inverted index over episodic input and response text
         self.semantic_memories = {}
         self.last_consolidation = datetime.now().isoformat()
 
+        # Guards the memories: requests read concurrently, writes and consolidation slices are exclusive
+        self.lock = ReadWriteLock()
+
+        # Callbacks notified of memory changes (see subscribe)
+        self.listeners = []
+
         # Default configuration
         self.config = {
             'storage_path': 'data/memory_store.json',
             'max_episodic_memories': 100,
             'consolidation_interval': 24 * 60 * 60,  # 24 hours in seconds
+            'consolidation_slice_size': 500,  # Memories updated per write lock during consolidation
+            'consolidation_group': None,  # Stores sharing a group share one consolidation thread
+            'storage_backend': 'json',  # 'json' rewrites the file, 'log' appends mutations
+            'retrieval_stats_durability': 'batched',  # 'batched' flushes in the background, 'sync' on every read
+            'retrieval_flush_interval': 5.0,  # Seconds a retrieval count may stay buffered
+            'retrieval_flush_threshold': 100,  # Pending retrievals that trigger an early flush
+            'text_search': 'index',  # 'index' uses the inverted index, 'substring' scans every memory
+            'semantic_rules_path': 'data/semantic_rules.json',  # Extra extraction rules, if present
         }
 
         # Update with provided config
         if config:
             self.config.update(config)
 
+        self.semantic_rules = SemanticRuleEngine(rules_path=self.config['semantic_rules_path'])
+
+        self._init_retrieval_stats()
+        _live_stores.add(self)
+
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(self.config['storage_path']), exist_ok=True)
 
+        # Set up the storage backend
+        self.storage = create_storage(self.config)
+
         # Load existing memories
         self.load_memories()
 
@@ -43,53 +82,328 @@ class MemoryStore:
         self.setup_consolidation_timer()
 
     def load_memories(self):
-        """Load memories from storage file"""
+        """Load memories from storage, replaying any logged mutations"""
         try:
-            if os.path.exists(self.config['storage_path']):
-                with open(self.config['storage_path'], 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.episodic_memories = data.get('episodic_memories', [])
-                    self.semantic_memories = data.get('semantic_memories', {})
-                    self.last_consolidation = data.get('last_consolidation', datetime.now().isoformat())
+            data, records = self.storage.load()
+            data = data or {}
+            self._load_episodic_memories(data.get('episodic_memories', []))
+            self.semantic_memories = data.get('semantic_memories', {})
+            self.last_consolidation = data.get('last_consolidation', datetime.now().isoformat())
+
+            for record in records:
+                self._apply_record(record)
         except Exception as e:
             print(f"Error loading memories: {e}")
             # Initialize with empty memories if loading fails
-            self.episodic_memories = []
+            self.episodic_by_id = {}
+            self.eviction_heap = []
+            self.text_index.clear()
             self.semantic_memories = {}
             self.last_consolidation = datetime.now().isoformat()
 
+    @property
+    def episodic_memories(self):
+        """All episodic memories, newest first"""
+        return list(reversed(self.episodic_by_id.values()))
+
+    def _iter_episodic_memories(self):
+        """Iterate over episodic memories, newest first, without copying them"""
+        return reversed(self.episodic_by_id.values())
+
+    def _load_episodic_memories(self, memories):
+        """
+        Rebuild the ID map and eviction heap from stored episodic memories
+
+        Args:
+            memories (list): Episodic memories in any order
+        """
+        self.episodic_by_id = {}
+        # The map is kept in chronological order, so iterating it backwards is newest first
+        for memory in sorted(memories, key=lambda x: x.get('timestamp', '')):
+            if 'id' not in memory:
+                # Older memories were identified by their timestamp
+                memory['id'] = memory.get('timestamp') or uuid.uuid4().hex
+            if memory['id'] in self.episodic_by_id:
+                memory['id'] = f"{memory['id']}-{uuid.uuid4().hex[:8]}"
+            self.episodic_by_id[memory['id']] = memory
+        self._rebuild_eviction_heap()
+
+        self.text_index.clear()
+        for memory in self.episodic_by_id.values():
+            self._index_text(memory)
+
+    def _index_text(self, memory):
+        """
+        Add the text of an episodic memory to the inverted index
+
+        Args:
+            memory (dict): The episodic memory
+        """
+        self.text_index.add(memory['id'], f"{memory.get('input', '')} {memory.get('response', '')}")
+
+    def _add_episodic_memory(self, memory):
+        """
+        Add an episodic memory to the ID map, eviction heap and text index
+
+        Args:
+            memory (dict): The episodic memory
+        """
+        self.episodic_by_id[memory['id']] = memory
+        self._push_eviction_candidate(memory)
+        self._index_text(memory)
+
+    def _remove_episodic_memory(self, memory_id):
+        """
+        Remove an episodic memory from the ID map and text index
+
+        Its eviction heap entries become stale and are skipped when popped.
+
+        Args:
+            memory_id (str): The memory ID
+
+        Returns:
+            dict: The removed memory, or None if it was not stored
+        """
+        memory = self.episodic_by_id.pop(memory_id, None)
+        if memory is not None:
+            self.text_index.remove(memory_id)
+        return memory
+
+    def _rebuild_eviction_heap(self):
+        """Rebuild the eviction heap from the current importance of every memory"""
+        self.eviction_heap = [(memory['importance'], memory['timestamp'], memory_id)
+                              for memory_id, memory in self.episodic_by_id.items()]
+        heapq.heapify(self.eviction_heap)
+
+    def _push_eviction_candidate(self, memory):
+        """
+        Add a memory to the eviction heap after it was inserted or its importance changed
+
+        Outdated entries for the same memory stay in the heap and are skipped
+        when popped; the heap is rebuilt when they make up most of it.
+
+        Args:
+            memory (dict): The episodic memory
+        """
+        heapq.heappush(self.eviction_heap, (memory['importance'], memory['timestamp'], memory['id']))
+        if len(self.eviction_heap) > 2 * len(self.episodic_by_id) + 64:
+            self._rebuild_eviction_heap()
+
+    def _snapshot(self):
+        """
+        Build the full snapshot of the memory state
+
+        Returns:
+            dict: Serializable memory state
+        """
+        return {
+            'episodic_memories': self.episodic_memories,
+            'semantic_memories': self.semantic_memories,
+            'last_consolidation': self.last_consolidation
+        }
+
     def save_memories(self):
-        """Save memories to storage file"""
+        """Persist pending memory changes to storage"""
         try:
-            data = {
-                'episodic_memories': self.episodic_memories,
-                'semantic_memories': self.semantic_memories,
-                'last_consolidation': self.last_consolidation
-            }
-
-            with open(self.config['storage_path'], 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.storage.flush(self._snapshot)
         except Exception as e:
             print(f"Error saving memories: {e}")
 
-    def setup_consolidation_timer(self):
-        """Set up a timer for periodic memory consolidation"""
-        # Check if consolidation is needed
-        last_consolidation_time = datetime.fromisoformat(self.last_consolidation).timestamp()
-        current_time = datetime.now().timestamp()
+    def compact_memories(self):
+        """Write a full snapshot of all memories to storage"""
+        try:
+            self.storage.compact(self._snapshot())
+        except Exception as e:
+            print(f"Error compacting memories: {e}")
+
+    def close(self):
+        """Flush pending changes and release the storage backend"""
+        consolidation_scheduler.unregister(self)
+        _forget_shared_store(self)
+        self._stop_stats_flusher()
+        with self.lock:
+            self.save_memories()
+            self.storage.close()
+
+    def memory_footprint(self):
+        """
+        Estimate how much process memory the store holds
+
+        Returns:
+            dict: Number of episodic memories and approximate bytes of memories and text index
+        """
+        with self.lock.read():
+            size = (_deep_sizeof(self.episodic_by_id) + _deep_sizeof(self.semantic_memories) +
+                    _deep_sizeof(self.text_index.postings) + _deep_sizeof(self.text_index.doc_terms))
+            return {'episodic_memories': len(self.episodic_by_id), 'bytes': size}
+
+    def subscribe(self, listener):
+        """
+        Register a callback for memory changes
+
+        The callback is called as listener(event, memory) while the change is
+        being made, where event is 'insert', 'update' or 'evict' and memory is
+        a copy of the memory in the form returned by get_memory_by_id (for
+        'evict', the memory as it was when removed).
+
+        Args:
+            listener (callable): The callback
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Remove a callback registered with subscribe
+
+        Args:
+            listener (callable): The callback
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _publish(self, event, memory):
+        """
+        Notify listeners of a memory change
+
+        Args:
+            event (str): 'insert', 'update' or 'evict'
+            memory (dict): The changed memory
+        """
+        for listener in list(self.listeners):
+            try:
+                listener(event, memory.copy())
+            except Exception as e:
+                print(f"Error notifying memory listener of {event}: {e}")
+
+    def _init_retrieval_stats(self):
+        """Set up the buffer of retrieval counts awaiting a flush"""
+        self.pending_retrievals = Counter()
+        self.stats_lock = threading.Lock()
+
+    def _note_retrievals(self, memories):
+        """
+        Count retrievals of memories without writing on the read path
+
+        With 'sync' durability the counts are applied and persisted immediately.
+        Otherwise they are buffered and applied on the process-wide flush thread
+        once 'retrieval_flush_threshold' retrievals are pending or
+        'retrieval_flush_interval' seconds after the first buffered one.
+
+        Args:
+            memories (list): The retrieved memories
+        """
+        if not memories:
+            return
+
+        counts = Counter(memory['id'] for memory in memories)
+
+        if self.config['retrieval_stats_durability'] == 'sync':
+            self._apply_retrieval_stats(counts)
+            return
 
-        if current_time - last_consolidation_time >= self.config['consolidation_interval']:
-            self.consolidate_memories()
+        with self.stats_lock:
+            self.pending_retrievals.update(counts)
+            pending = len(self.pending_retrievals)
 
-        # Set up timer for next consolidation
-        def consolidation_task():
-            while True:
-                time.sleep(self.config['consolidation_interval'])
-                self.consolidate_memories()
+        urgent = pending >= self.config['retrieval_flush_threshold']
+        flush_scheduler.schedule(self.flush_retrieval_stats,
+                                 0 if urgent else self.config['retrieval_flush_interval'])
+
+    def _stop_stats_flusher(self):
+        """Cancel the scheduled flush and apply any remaining retrieval counts"""
+        flush_scheduler.cancel(self.flush_retrieval_stats)
+        self.flush_retrieval_stats()
+
+    def flush_retrieval_stats(self):
+        """Apply and persist buffered retrieval counts"""
+        with self.stats_lock:
+            counts = self.pending_retrievals
+            self.pending_retrievals = Counter()
+
+        if counts:
+            try:
+                self._apply_retrieval_stats(counts)
+            except Exception as e:
+                print(f"Error flushing retrieval stats: {e}")
+
+    def _apply_retrieval_stats(self, counts):
+        """
+        Increase retrieval count and importance of retrieved memories
+
+        Args:
+            counts (Counter): Number of retrievals per memory ID
+        """
+        with self.lock:
+            for memory_id, count in counts.items():
+                memory = self.episodic_by_id.get(memory_id)
+                if memory is None:
+                    continue  # Evicted since it was retrieved
+
+                memory['retrieval_count'] += count
+                # Increase importance when retrieved
+                memory['importance'] = min(memory['importance'] + 0.1 * count, 1.0)
+                self._push_eviction_candidate(memory)
+                self._record('episodic_update', id=memory_id,
+                             fields={'retrieval_count': memory['retrieval_count'],
+                                     'importance': memory['importance']})
+                self._publish('update', memory)
+
+            self.save_memories()
+
+    def _record(self, op, **payload):
+        """
+        Record a mutation with the storage backend
+
+        Args:
+            op (str): Mutation type
+            **payload: Mutation data
+        """
+        payload['op'] = op
+        self.storage.append(payload)
+
+    def _apply_record(self, record):
+        """
+        Apply a logged mutation to the in-memory state
+
+        Replaying a record twice leaves the state unchanged, so a crash between
+        compaction and log truncation cannot duplicate memories.
+
+        Args:
+            record (dict): The mutation record
+        """
+        op = record.get('op')
+
+        if op == 'episodic_insert':
+            memory = record['memory']
+            memory.setdefault('id', memory.get('timestamp'))
+            if memory['id'] not in self.episodic_by_id:
+                self._add_episodic_memory(memory)
+
+        elif op == 'episodic_remove':
+            self._remove_episodic_memory(record['id'])
+
+        elif op == 'episodic_update':
+            memory = self.episodic_by_id.get(record['id'])
+            if memory is not None:
+                memory.update(record['fields'])
+                self._push_eviction_candidate(memory)
+
+        elif op == 'semantic_set':
+            self.semantic_memories.setdefault(record['category'], {})[record['key']] = record['entry']
+
+        elif op == 'consolidated':
+            self.last_consolidation = record['timestamp']
+
+    def setup_consolidation_timer(self):
+        """
+        Schedule periodic memory consolidation
 
-        # Start consolidation thread
-        thread = threading.Thread(target=consolidation_task, daemon=True)
-        thread.start()
+        Consolidation runs on the process-wide scheduler, which keeps a single
+        background thread per storage path and consolidates straight away when
+        the last consolidation is overdue.
+        """
+        consolidation_scheduler.register(self)
 
     def store_episodic_memory(self, memory):
         """
@@ -103,12 +417,76 @@ class MemoryStore:
                 - context: Additional context
 
         Returns:
-            str: Timestamp of the stored memory
+            str: ID of the stored memory
         """
         if not memory or 'input' not in memory:
             return None
 
-        episodic_memory = {
+        episodic_memory = self._create_episodic_memory(memory)
+
+        with self.lock:
+            # Add to episodic memories
+            self._add_episodic_memory(episodic_memory)
+            self._record('episodic_insert', memory=episodic_memory)
+            self._publish('insert', episodic_memory)
+
+            # Limit the number of episodic memories
+            self._evict_excess_memories()
+
+            # Extract semantic information from the episodic memory
+            self.extract_semantic_information(episodic_memory)
+
+            # Save memories
+            self.save_memories()
+
+        return episodic_memory['id']
+
+    def import_memories(self, data):
+        """
+        Import memories in the JSON snapshot format, keeping the ones already stored
+
+        Args:
+            data (dict): Snapshot with episodic_memories, semantic_memories and last_consolidation
+        """
+        with self.lock:
+            for memory in data.get('episodic_memories', []):
+                memory = dict(memory)
+                memory.setdefault('id', memory.get('timestamp') or uuid.uuid4().hex)
+                if memory['id'] in self.episodic_by_id:
+                    continue
+                self._add_episodic_memory(memory)
+                self._record('episodic_insert', memory=memory)
+                self._publish('insert', memory)
+
+            # Imported memories may be older than the stored ones, and the map is kept oldest first
+            self.episodic_by_id = dict(sorted(self.episodic_by_id.items(),
+                                              key=lambda item: item[1].get('timestamp', '')))
+
+            for category, entries in data.get('semantic_memories', {}).items():
+                for key, entry in entries.items():
+                    if key in self.semantic_memories.get(category, {}):
+                        continue
+                    self.semantic_memories.setdefault(category, {})[key] = dict(entry)
+                    self._record('semantic_set', category=category, key=key, entry=entry)
+                    self._publish('insert', semantic_memory_view(category, key, entry))
+
+            self._evict_excess_memories()
+
+            # A full snapshot keeps the chronological order when the store is reloaded
+            self.compact_memories()
+
+    def _create_episodic_memory(self, memory):
+        """
+        Build the stored form of an episodic memory
+
+        Args:
+            memory (dict): The memory as passed to store_episodic_memory
+
+        Returns:
+            dict: The episodic memory record
+        """
+        return {
+            'id': uuid.uuid4().hex,
             'type': 'episodic',
             'input': memory.get('input', ''),
             'response': memory.get('response', ''),
@@ -119,22 +497,24 @@ class MemoryStore:
             'retrieval_count': 0
         }
 
-        # Add to episodic memories
-        self.episodic_memories.insert(0, episodic_memory)
-
-        # Limit the number of episodic memories
-        if len(self.episodic_memories) > self.config['max_episodic_memories']:
-            # Sort by importance before removing
-            self.episodic_memories.sort(key=lambda x: x['importance'], reverse=True)
-            self.episodic_memories = self.episodic_memories[:self.config['max_episodic_memories']]
+    def _evict_excess_memories(self):
+        """
+        Remove the least important episodic memories beyond the configured limit
 
-        # Extract semantic information from the episodic memory
-        self.extract_semantic_information(episodic_memory)
+        Memories are evicted in order of importance, oldest first among equals,
+        in O(log n) per eviction.
+        """
+        while len(self.episodic_by_id) > self.config['max_episodic_memories'] and self.eviction_heap:
+            importance, timestamp, memory_id = heapq.heappop(self.eviction_heap)
+            memory = self.episodic_by_id.get(memory_id)
 
-        # Save memories
-        self.save_memories()
+            # Skip entries for removed memories or outdated importance values
+            if memory is None or memory['importance'] != importance:
+                continue
 
-        return episodic_memory['timestamp']
+            self._remove_episodic_memory(memory_id)
+            self._record('episodic_remove', id=memory_id)
+            self._publish('evict', memory)
 
     def calculate_importance(self, memory):
         """
@@ -176,31 +556,12 @@ class MemoryStore:
         Args:
             episodic_memory (dict): The episodic memory to extract from
         """
-        # Simple extraction based on keywords
+        # All rules are matched in a single pass over the lower-cased input
         input_text = episodic_memory['input'].lower()
 
-        # Extract personal information
-        if 'اسمي' in input_text or 'my name is' in input_text:
-            name_match = re.search(r'اسمي\s+(\S+)', input_text) or re.search(r'my name is\s+(\S+)', input_text)
-            if name_match:
-                self.store_semantic_memory('personal_info', 'name', name_match.group(1))
-
-        # Extract preferences
-        if 'أحب' in input_text or 'i like' in input_text:
-            like_match = re.search(r'أحب\s+(.+)', input_text) or re.search(r'i like\s+(.+)', input_text)
-            if like_match:
-                self.store_semantic_memory('preferences', 'likes', like_match.group(1))
-
-        if 'لا أحب' in input_text or 'i don\'t like' in input_text or 'i dislike' in input_text:
-            dislike_match = re.search(r'لا أحب\s+(.+)', input_text) or re.search(r'i don\'t like\s+(.+)', input_text) or re.search(r'i dislike\s+(.+)', input_text)
-            if dislike_match:
-                self.store_semantic_memory('preferences', 'dislikes', dislike_match.group(1))
-
-        # Extract locations
-        if 'أعيش في' in input_text or 'i live in' in input_text:
-            location_match = re.search(r'أعيش في\s+(.+)', input_text) or re.search(r'i live in\s+(.+)', input_text)
-            if location_match:
-                self.store_semantic_memory('personal_info', 'location', location_match.group(1))
+        # Facts are saved together with the episodic memory that produced them
+        for category, key, value in self.semantic_rules.extract(input_text):
+            self._set_semantic_memory(category, key, value)
 
     def store_semantic_memory(self, category, key, value):
         """
@@ -214,10 +575,27 @@ class MemoryStore:
         if not category or not key or value is None:
             return
 
+        with self.lock:
+            self._set_semantic_memory(category, key, value)
+
+            # Save memories
+            self.save_memories()
+
+    def _set_semantic_memory(self, category, key, value):
+        """
+        Set a semantic memory without persisting it (the caller saves)
+
+        Args:
+            category (str): Category of the information
+            key (str): Key for the information
+            value (any): Value to store
+        """
         # Initialize category if it doesn't exist
         if category not in self.semantic_memories:
             self.semantic_memories[category] = {}
 
+        event = 'update' if key in self.semantic_memories[category] else 'insert'
+
         # Store the value
         self.semantic_memories[category][key] = {
             'value': value,
@@ -225,9 +603,9 @@ class MemoryStore:
             'confidence': 0.8,  # Initial confidence
             'sources': 1  # Number of sources confirming this information
         }
-
-        # Save memories
-        self.save_memories()
+        self._record('semantic_set', category=category, key=key,
+                     entry=self.semantic_memories[category][key])
+        self._publish(event, semantic_memory_view(category, key, self.semantic_memories[category][key]))
 
     def retrieve_episodic_memories(self, query=None):
         """
@@ -238,6 +616,11 @@ class MemoryStore:
                 - text: Text to search for
                 - emotion: Emotion to filter by
                 - limit: Maximum number of results
+                - match: 'index' (all query terms, via the inverted index) or
+                  'substring' (the whole text as a substring); defaults to
+                  the 'text_search' setting
+                - rank: Ordering of text matches, 'bm25' (default) or
+                  'recency' (recency x importance)
 
         Returns:
             list: Matching episodic memories
@@ -248,35 +631,67 @@ class MemoryStore:
         text = query.get('text')
         emotion = query.get('emotion')
         limit = query.get('limit', 5)
+        match = query.get('match') or self.config['text_search']
+
+        if text and match == 'index':
+            terms = tokenize(text)
+            if terms:
+                return self._search_episodic_text(terms, emotion, limit, query.get('rank') or 'bm25')
+
+        with self.lock.read():
+            # Filter memories based on query, walking newest first so we can stop at the limit
+            results = self._iter_episodic_memories()
 
-        # Filter memories based on query
-        results = self.episodic_memories.copy()
+            if text:
+                search_text = text.lower()
+                results = (memory for memory in results if
+                           search_text in memory['input'].lower() or
+                           search_text in memory['response'].lower())
 
-        if text:
-            search_text = text.lower()
-            results = [memory for memory in results if 
-                       search_text in memory['input'].lower() or 
-                       search_text in memory['response'].lower()]
+            if emotion:
+                results = (memory for memory in results if memory['emotion'] == emotion)
 
-        if emotion:
-            results = [memory for memory in results if memory['emotion'] == emotion]
+            # Limit results, copying so later updates do not change what the caller sees
+            results = [memory.copy() for memory in islice(results, limit)]
 
-        # Sort by timestamp (newest first)
-        results.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Update retrieval count for returned memories (buffered, not written on the read path)
+        self._note_retrievals(results)
 
-        # Limit results
-        results = results[:limit]
+        return results
 
-        # Update retrieval count for returned memories
-        for result in results:
-            for memory in self.episodic_memories:
-                if memory['timestamp'] == result['timestamp']:
-                    memory['retrieval_count'] += 1
-                    memory['importance'] += 0.1  # Increase importance when retrieved
-                    memory['importance'] = min(memory['importance'], 1.0)
+    def _search_episodic_text(self, terms, emotion, limit, rank):
+        """
+        Find episodic memories containing all query terms using the inverted index
 
-        # Save after updating retrieval counts
-        self.save_memories()
+        Args:
+            terms (list): Normalized query terms
+            emotion (str): Emotion to filter by, or None
+            limit (int): Maximum number of results
+            rank (str): 'bm25' or 'recency'
+
+        Returns:
+            list: Matching episodic memories, best first
+        """
+        with self.lock.read():
+            candidates = [self.episodic_by_id[memory_id] for memory_id in self.text_index.search(terms)]
+            if emotion:
+                candidates = [memory for memory in candidates if memory['emotion'] == emotion]
+
+            if rank == 'recency':
+                now = datetime.now().timestamp()
+
+                def score(memory):
+                    age_in_days = (now - datetime.fromisoformat(memory['timestamp']).timestamp()) / (24 * 60 * 60)
+                    return memory['importance'] / (1 + max(age_in_days, 0))
+            else:
+                def score(memory):
+                    return self.text_index.bm25(terms, memory['id'])
+
+            # Newer memories win ties
+            results = heapq.nlargest(limit, candidates, key=lambda memory: (score(memory), memory['timestamp']))
+            results = [memory.copy() for memory in results]
+
+        self._note_retrievals(results)
 
         return results
 
@@ -305,53 +720,91 @@ class MemoryStore:
         return self.semantic_memories[category].get(key)
 
     def consolidate_memories(self):
-        """Consolidate memories to improve recall and reduce storage"""
+        """
+        Consolidate memories to improve recall and reduce storage
+
+        Importance is updated in slices of 'consolidation_slice_size' memories,
+        releasing the write lock between slices so requests are never stalled
+        behind a pass over the whole store.
+        """
         print('Consolidating memories...')
 
-        # Update importance based on age and retrieval count
         current_time = datetime.now().timestamp()
+        with self.lock.read():
+            memory_ids = list(self.episodic_by_id)
+
+        slice_size = self.config['consolidation_slice_size']
+        for start in range(0, len(memory_ids), slice_size):
+            with self.lock:
+                for memory_id in memory_ids[start:start + slice_size]:
+                    memory = self.episodic_by_id.get(memory_id)
+                    if memory is None:
+                        continue  # Evicted since consolidation started
+
+                    importance = self._consolidated_importance(memory, current_time)
+                    if importance != memory['importance']:
+                        memory['importance'] = importance
+                        self._push_eviction_candidate(memory)
+                        self._record('episodic_update', id=memory_id, fields={'importance': importance})
+                        self._publish('update', memory)
+
+        with self.lock:
+            # Remove low-importance memories if we're over the limit
+            self._evict_excess_memories()
+
+            # Update semantic memories confidence based on multiple sources
+            for category in self.semantic_memories:
+                for key in self.semantic_memories[category]:
+                    memory = self.semantic_memories[category][key]
+                    if memory['sources'] > 3:
+                        confidence = 0.95
+                    elif memory['sources'] > 1:
+                        confidence = 0.9
+                    else:
+                        continue
+                    if memory.get('confidence') != confidence:
+                        memory['confidence'] = confidence
+                        self._record('semantic_set', category=category, key=key, entry=memory)
+                        self._publish('update', semantic_memory_view(category, key, memory))
+
+            # Update last consolidation timestamp
+            self.last_consolidation = datetime.now().isoformat()
+            self._record('consolidated', timestamp=self.last_consolidation)
 
-        for memory in self.episodic_memories:
-            memory_time = datetime.fromisoformat(memory['timestamp']).timestamp()
-            age_in_days = (current_time - memory_time) / (24 * 60 * 60)
-
-            # Reduce importance based on age
-            if age_in_days > 30:
-                memory['importance'] -= 0.2
-            elif age_in_days > 7:
-                memory['importance'] -= 0.1
-
-            # Increase importance based on retrieval count
-            if memory['retrieval_count'] > 5:
-                memory['importance'] += 0.3
-            elif memory['retrieval_count'] > 2:
-                memory['importance'] += 0.2
-
-            # Ensure importance is within bounds
-            memory['importance'] = max(0.1, min(memory['importance'], 1.0))
-
-        # Remove low-importance memories if we're over the limit
-        if len(self.episodic_memories) > self.config['max_episodic_memories']:
-            self.episodic_memories.sort(key=lambda x: x['importance'], reverse=True)
-            self.episodic_memories = self.episodic_memories[:self.config['max_episodic_memories']]
-
-        # Update semantic memories confidence based on multiple sources
-        for category in self.semantic_memories:
-            for key in self.semantic_memories[category]:
-                memory = self.semantic_memories[category][key]
-                if memory['sources'] > 3:
-                    memory['confidence'] = 0.95
-                elif memory['sources'] > 1:
-                    memory['confidence'] = 0.9
-
-        # Update last consolidation timestamp
-        self.last_consolidation = datetime.now().isoformat()
-
-        # Save consolidated memories
-        self.save_memories()
+            self.save_memories()
 
         print('Memory consolidation complete')
 
+    def _consolidated_importance(self, memory, current_time):
+        """
+        Calculate the importance of an episodic memory after consolidation
+
+        Args:
+            memory (dict): The episodic memory
+            current_time (float): Unix timestamp of the consolidation
+
+        Returns:
+            float: New importance score (0.1-1)
+        """
+        importance = memory['importance']
+        memory_time = datetime.fromisoformat(memory['timestamp']).timestamp()
+        age_in_days = (current_time - memory_time) / (24 * 60 * 60)
+
+        # Reduce importance based on age
+        if age_in_days > 30:
+            importance -= 0.2
+        elif age_in_days > 7:
+            importance -= 0.1
+
+        # Increase importance based on retrieval count
+        if memory['retrieval_count'] > 5:
+            importance += 0.3
+        elif memory['retrieval_count'] > 2:
+            importance += 0.2
+
+        # Ensure importance is within bounds
+        return max(0.1, min(importance, 1.0))
+
     def get_user_summary(self):
         """
         Get a summary of the user based on semantic memories
@@ -397,7 +850,8 @@ class MemoryStore:
         Returns:
             dict: Emotional trends
         """
-        emotions = [memory['emotion'] for memory in self.episodic_memories]
+        with self.lock.read():
+            emotions = [memory['emotion'] for memory in self.episodic_by_id.values()]
         emotion_counts = {}
 
         for emotion in emotions:
@@ -422,28 +876,15 @@ class MemoryStore:
         """
         all_memories = []
 
-        # Add episodic memories with IDs
-        for memory in self.episodic_memories:
-            memory_with_id = memory.copy()
-            # Use timestamp as ID if not already present
-            if 'id' not in memory_with_id:
-                memory_with_id['id'] = memory_with_id.get('timestamp')
-            all_memories.append(memory_with_id)
-
-        # Add semantic memories with IDs
-        for category in self.semantic_memories:
-            for key in self.semantic_memories[category]:
-                memory = self.semantic_memories[category][key]
-                memory_with_id = {
-                    'id': f"{category}:{key}",
-                    'type': 'semantic',
-                    'category': category,
-                    'key': key,
-                    'value': memory['value'],
-                    'timestamp': memory['timestamp'],
-                    'confidence': memory.get('confidence', 0.8)
-                }
-                all_memories.append(memory_with_id)
+        with self.lock.read():
+            # Add episodic memories (IDs are assigned when stored or loaded)
+            for memory in self._iter_episodic_memories():
+                all_memories.append(memory.copy())
+
+            # Add semantic memories with IDs
+            for category in self.semantic_memories:
+                for key in self.semantic_memories[category]:
+                    all_memories.append(semantic_memory_view(category, key, self.semantic_memories[category][key]))
 
         return all_memories
 
@@ -457,27 +898,157 @@ class MemoryStore:
         Returns:
             dict: The memory if found, None otherwise
         """
+        # Check the episodic ID map first (older IDs are timestamps, which contain ':')
+        memory = self.episodic_by_id.get(memory_id)
+        if memory is not None:
+            return memory.copy()
+
         # Check if it's a semantic memory ID (format: "category:key")
         if ':' in memory_id:
             category, key = memory_id.split(':', 1)
             if category in self.semantic_memories and key in self.semantic_memories[category]:
-                memory = self.semantic_memories[category][key]
-                return {
-                    'id': memory_id,
-                    'type': 'semantic',
-                    'category': category,
-                    'key': key,
-                    'value': memory['value'],
-                    'timestamp': memory['timestamp'],
-                    'confidence': memory.get('confidence', 0.8)
-                }
-
-        # Check if it's an episodic memory ID (using timestamp as ID)
-        for memory in self.episodic_memories:
-            if memory.get('timestamp') == memory_id:
-                memory_with_id = memory.copy()
-                memory_with_id['id'] = memory_id
-                return memory_with_id
+                return semantic_memory_view(category, key, self.semantic_memories[category][key])
 
         # Memory not found
         return None
+
+
+def semantic_memory_view(category, key, entry):
+    """
+    Build the standalone form of a semantic memory, with its "category:key" ID
+
+    Args:
+        category (str): Category of the information
+        key (str): Key for the information
+        entry (dict): The stored semantic memory
+
+    Returns:
+        dict: The semantic memory
+    """
+    return {
+        'id': f"{category}:{key}",
+        'type': 'semantic',
+        'category': category,
+        'key': key,
+        'value': entry['value'],
+        'timestamp': entry['timestamp'],
+        'confidence': entry.get('confidence', 0.8)
+    }
+
+
+def _deep_sizeof(value):
+    """
+    Approximate the size of a value and everything it contains
+
+    Args:
+        value (any): A JSON-like value
+
+    Returns:
+        int: Size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(key) + _deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_deep_sizeof(item) for item in value)
+    return size
+
+
+def create_memory_store(config=None):
+    """
+    Create a memory store for the configured storage backend
+
+    Args:
+        config (dict, optional): MemoryStore configuration. A 'storage_backend'
+            of 'sqlite' selects the SQLite-backed store.
+
+    Returns:
+        MemoryStore: The memory store
+    """
+    if config and config.get('storage_backend') == 'sqlite':
+        from sqlite_memory_store import SQLiteMemoryStore
+        return SQLiteMemoryStore(config)
+
+    return MemoryStore(config)
+
+
+def _storage_key(config):
+    """Absolute storage path a configuration resolves to"""
+    if config.get('storage_path'):
+        return os.path.abspath(config['storage_path'])
+    if config.get('storage_backend') == 'sqlite':
+        return os.path.abspath('data/memory_store.db')
+    return os.path.abspath('data/memory_store.json')
+
+
+def get_memory_store(config=None):
+    """
+    Get the memory store shared by the whole process for a storage path
+
+    Modules should use this instead of creating their own MemoryStore, since
+    every instance loads its own copy of the memories and separate instances
+    overwrite each other's changes. The first call for a storage path creates
+    the store from its configuration; later calls return the same instance.
+
+    Args:
+        config (dict, optional): MemoryStore configuration. Without one, the
+            store of the first configuration requested is returned.
+
+    Returns:
+        MemoryStore: The shared memory store
+    """
+    global _default_store_path
+
+    with _shared_stores_lock:
+        if config is None and _default_store_path in _shared_stores:
+            return _shared_stores[_default_store_path]
+
+        config = config or {}
+        storage_path = _storage_key(config)
+
+        store = _shared_stores.get(storage_path)
+        if store is None:
+            store = create_memory_store(config)
+            _shared_stores[storage_path] = store
+
+        if _default_store_path not in _shared_stores:
+            _default_store_path = storage_path
+
+        return store
+
+
+def _forget_shared_store(store):
+    """Remove a closed store from the shared registry"""
+    with _shared_stores_lock:
+        for storage_path, shared in list(_shared_stores.items()):
+            if shared is store:
+                del _shared_stores[storage_path]
+
+
+def get_memory_store_stats():
+    """
+    Report the memory stores alive in this process
+
+    Returns:
+        dict: Instance counts, total approximate bytes and per-store details
+    """
+    with _shared_stores_lock:
+        shared = {id(store): storage_path for storage_path, store in _shared_stores.items()}
+
+    stores = []
+    for store in list(_live_stores):
+        footprint = store.memory_footprint()
+        stores.append({
+            'storage_path': os.path.abspath(store.config['storage_path']),
+            'storage_backend': store.config.get('storage_backend', 'json'),
+            'shared': id(store) in shared,
+            'episodic_memories': footprint['episodic_memories'],
+            'bytes': footprint['bytes']
+        })
+
+    return {
+        'live_instances': len(stores),
+        'shared_instances': len(shared),
+        'total_bytes': sum(store['bytes'] for store in stores),
+        'stores': stores
+    }
@@ -2,9 +2,12 @@ import os
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
-from memory_store import MemoryStore
+from memory_store import MemoryStore, get_memory_store
+from memory_shards import MemoryShardManager, user_memory
 from persona_mesh import PersonaMesh
-from emotion_engine import detect_emotion, get_emotion_in_language
+from emotion_engine import analyze_emotion, detect_emotion, get_emotion_in_language
+from emotion_lexicon import BASE_INTENSITY
+from language_id import primary_language
 from voice_local import speak_ar
 
 class MemoryVoiceBridge:
@@ -24,15 +27,18 @@ class MemoryVoiceBridge:
     """
     
     def __init__(self, memory_store: Optional[MemoryStore] = None, 
-                 persona_mesh: Optional[PersonaMesh] = None):
+                 persona_mesh: Optional[PersonaMesh] = None,
+                 memory_shards: Optional[MemoryShardManager] = None):
         """
         Initialize the MemoryVoiceBridge with connections to memory and persona systems
         
         Args:
             memory_store: The memory store for accessing episodic and semantic memories
             persona_mesh: The persona mesh for unified persona responses
+            memory_shards: Per-user memory shards; spoken responses of a known user are stored in their shard
         """
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
+        self.memory_shards = memory_shards
         self.persona_mesh = persona_mesh if persona_mesh else PersonaMesh(self.memory_store)
         
         # Emotion-voice mapping
@@ -145,9 +151,11 @@ class MemoryVoiceBridge:
         Returns:
             Dictionary with voice parameters
         """
-        # Detect emotion if not provided
+        # Detect emotion if not provided, with its probabilities and intensity
         if not detected_emotion:
-            standardized_emotion, detected_lang = detect_emotion(text)
+            analysis = analyze_emotion(text)
+            standardized_emotion, detected_lang = analysis["emotion"], analysis["language"]
+            emotion_scores, text_intensity = analysis["scores"], analysis["intensity"]
         else:
             # If emotion is provided in Arabic, convert to standardized format
             if detected_emotion in ["حزن", "فرح", "غضب", "خوف", "حياد"]:
@@ -159,16 +167,23 @@ class MemoryVoiceBridge:
                     "حياد": "neutral"
                 }
                 standardized_emotion = emotion_map.get(detected_emotion, "neutral")
-                # Detect language
-                _, detected_lang = detect_emotion(text)
+                # Detect language without running emotion detection
+                detected_lang = primary_language(text)
             else:
                 # Assume the provided emotion is already standardized
                 standardized_emotion = detected_emotion
-                # Detect language
-                _, detected_lang = detect_emotion(text)
+                # Detect language without running emotion detection
+                detected_lang = primary_language(text)
+            emotion_scores, text_intensity = {standardized_emotion: 1.0}, BASE_INTENSITY
         
         # Get voice parameters for the detected emotion
-        voice_params = self.emotion_voice_map.get(standardized_emotion, self.emotion_voice_map["neutral"]).copy()
+        neutral_params = self.emotion_voice_map["neutral"]
+        voice_params = self.emotion_voice_map.get(standardized_emotion, neutral_params).copy()
+        
+        # Blend the numeric parameters of all emotions by their probabilities
+        for key in ("pitch", "rate", "volume"):
+            voice_params[key] = sum(self.emotion_voice_map.get(emotion, neutral_params)[key] * probability
+                                    for emotion, probability in emotion_scores.items())
         
         # Adjust parameters based on language
         if detected_lang in self.language_voice_profiles:
@@ -185,17 +200,17 @@ class MemoryVoiceBridge:
             voice_params["language"] = "ar"
             voice_params["voice_profile"] = voice_profile
         
-        # Apply emotion intensity
-        emotion_intensity = self.voice_preferences.get("emotion_intensity", 0.8)
+        # Apply emotion intensity: the preference, scaled by how intense the text is
+        emotion_intensity = min(1.0, self.voice_preferences.get("emotion_intensity", 0.8) * text_intensity / BASE_INTENSITY)
         if standardized_emotion != "neutral":
             # Adjust pitch and rate based on emotion intensity
-            neutral_params = self.emotion_voice_map["neutral"]
             voice_params["pitch"] = neutral_params["pitch"] + (voice_params["pitch"] - neutral_params["pitch"]) * emotion_intensity
             voice_params["rate"] = neutral_params["rate"] + (voice_params["rate"] - neutral_params["rate"]) * emotion_intensity
         
         return voice_params
     
-    def speak_with_emotion(self, text: str, emotion: Optional[str] = None, session_id: str = "default") -> Dict[str, Any]:
+    def speak_with_emotion(self, text: str, emotion: Optional[str] = None, session_id: str = "default",
+                           user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Speak text with appropriate emotion and store in memory
         
@@ -203,6 +218,7 @@ class MemoryVoiceBridge:
             text: The text to speak
             emotion: Optional emotion to use (if not provided, will be detected)
             session_id: The session identifier
+            user_id: The user whose memories receive the spoken text (the shared memories if not given)
             
         Returns:
             Dictionary with voice parameters used
@@ -216,28 +232,31 @@ class MemoryVoiceBridge:
             
             # Store in memory if available
             if self.memory_store:
-                self.memory_store.store_episodic_memory({
-                    "input": "",  # No input for voice output
-                    "response": text,
-                    "emotion": voice_params.get("emotion", "neutral"),
-                    "context": {
-                        "voice_params": voice_params,
-                        "session_id": session_id
-                    }
-                })
+                with user_memory(self.memory_shards, user_id, self.memory_store) as (memory_store, _):
+                    memory_store.store_episodic_memory({
+                        "input": "",  # No input for voice output
+                        "response": text,
+                        "emotion": voice_params.get("emotion", "neutral"),
+                        "context": {
+                            "voice_params": voice_params,
+                            "session_id": session_id
+                        }
+                    })
             
             return voice_params
         except Exception as e:
             print(f"Error speaking with emotion: {e}")
             return voice_params
     
-    def get_memory_guided_voice_response(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
+    def get_memory_guided_voice_response(self, user_input: str, session_id: str = "default",
+                                         user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get a voice response guided by memory and persona analysis
         
         Args:
             user_input: The user's input text
             session_id: The session identifier
+            user_id: The user whose memories receive the response (the shared memories if not given)
             
         Returns:
             Dictionary with response text and voice parameters
@@ -260,7 +279,7 @@ class MemoryVoiceBridge:
         voice_params = self.get_voice_parameters(response_text, emotion)
         
         # Speak the response
-        self.speak_with_emotion(response_text, emotion, session_id)
+        self.speak_with_emotion(response_text, emotion, session_id, user_id)
         
         return {
             "text": response_text,
@@ -3,10 +3,11 @@ import os
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 
-from memory_store import MemoryStore
+from memory_store import MemoryStore, get_memory_store
 from emotional_self_awareness import EmotionalSelfAwareness
 from persona_mesh import PersonaMesh
 from emotion_engine import detect_emotion, get_emotion_in_language
+from language_id import primary_language
 
 class PersonalRelationshipMemory:
     """
@@ -35,7 +36,7 @@ class PersonalRelationshipMemory:
             emotional_awareness: Optional emotional self-awareness engine
             persona_mesh: Optional persona mesh for persona selection
         """
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
         self.emotional_awareness = emotional_awareness if emotional_awareness else EmotionalSelfAwareness(self.memory_store)
         self.persona_mesh = persona_mesh if persona_mesh else PersonaMesh(self.memory_store)
 
@@ -629,7 +630,7 @@ class PersonalRelationshipMemory:
         insights = self.get_relationship_insights(session_id)
 
         # Detect language
-        _, detected_lang = detect_emotion(user_input)
+        detected_lang = primary_language(user_input)
 
         # Enhance response based on relationship insights
         enhanced_response = self._enhance_response(base_response, insights, detected_lang)
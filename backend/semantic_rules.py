@@ -0,0 +1,112 @@
+import json
+import os
+import re
+
+# Rules for extracting facts about the user from episodic memories. Each
+# pattern must capture the extracted value in its first group. Extra rules in
+# the same format can be added through a JSON file (see SemanticRuleEngine).
+DEFAULT_SEMANTIC_RULES = [
+    {
+        'category': 'personal_info',
+        'key': 'name',
+        'patterns': [r'اسمي\s+(\S+)', r'my name is\s+(\S+)']
+    },
+    {
+        'category': 'preferences',
+        'key': 'likes',
+        'patterns': [r'أحب\s+(.+)', r'i like\s+(.+)']
+    },
+    {
+        'category': 'preferences',
+        'key': 'dislikes',
+        'patterns': [r'لا أحب\s+(.+)', r"i don't like\s+(.+)", r'i dislike\s+(.+)']
+    },
+    {
+        'category': 'personal_info',
+        'key': 'location',
+        'patterns': [r'أعيش في\s+(.+)', r'i live in\s+(.+)']
+    },
+]
+
+
+class SemanticRuleEngine:
+    """
+    Declarative semantic extraction rules compiled into a single regex
+
+    All rule patterns are combined into one alternation inside a lookahead,
+    so a single scan over the text finds every rule match, including matches
+    that overlap each other. For each (category, key) the earliest match in
+    the text wins.
+    """
+
+    def __init__(self, rules=None, rules_path=None):
+        """
+        Compile the rule table
+
+        Args:
+            rules (list, optional): Rules to use instead of DEFAULT_SEMANTIC_RULES
+            rules_path (str, optional): JSON file with additional rules, appended if it exists
+        """
+        self.rules = list(rules if rules is not None else DEFAULT_SEMANTIC_RULES)
+
+        if rules_path and os.path.exists(rules_path):
+            try:
+                with open(rules_path, 'r', encoding='utf-8') as f:
+                    self.rules.extend(json.load(f))
+            except Exception as e:
+                print(f"Error loading semantic rules from {rules_path}: {e}")
+
+        self.pattern, self.group_targets = self._compile(self.rules)
+
+    @staticmethod
+    def _compile(rules):
+        """
+        Combine all rule patterns into one regex
+
+        Args:
+            rules (list): The rule table
+
+        Returns:
+            tuple: (compiled regex or None, map of wrapper group index to (category, key, value group index))
+        """
+        alternatives = []
+        group_targets = {}
+        group_index = 1
+
+        for rule in rules:
+            for pattern in rule['patterns']:
+                compiled = re.compile(pattern)
+                if compiled.groups < 1:
+                    raise ValueError(f"Semantic rule pattern needs a capturing group: {pattern}")
+
+                # Each pattern is wrapped in its own group, followed by the pattern's groups
+                alternatives.append(f"({pattern})")
+                group_targets[group_index] = (rule['category'], rule['key'], group_index + 1)
+                group_index += 1 + compiled.groups
+
+        if not alternatives:
+            return None, group_targets
+
+        return re.compile(f"(?=(?:{'|'.join(alternatives)}))"), group_targets
+
+    def extract(self, text):
+        """
+        Extract semantic facts from text
+
+        Args:
+            text (str): Lower-cased input text
+
+        Returns:
+            list: (category, key, value) tuples in the order they first appear in the text
+        """
+        if not text or self.pattern is None:
+            return []
+
+        facts = {}
+        for match in self.pattern.finditer(text):
+            # The wrapper group closes last, so lastindex identifies the matching pattern
+            category, key, value_group = self.group_targets[match.lastindex]
+            if (category, key) not in facts:
+                facts[(category, key)] = match.group(value_group)
+
+        return [(category, key, value) for (category, key), value in facts.items()]
@@ -0,0 +1,681 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from memory_scheduler import ReadWriteLock, consolidation_scheduler
+from memory_store import MemoryStore, _forget_shared_store, _live_stores, semantic_memory_view
+from semantic_rules import SemanticRuleEngine
+from text_index import tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodic_memories (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    input TEXT NOT NULL,
+    response TEXT NOT NULL DEFAULT '',
+    emotion TEXT NOT NULL DEFAULT 'neutral',
+    context TEXT NOT NULL DEFAULT '{}',
+    importance REAL NOT NULL DEFAULT 0.5,
+    retrieval_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_episodic_timestamp ON episodic_memories (timestamp);
+CREATE INDEX IF NOT EXISTS idx_episodic_emotion ON episodic_memories (emotion, timestamp);
+CREATE INDEX IF NOT EXISTS idx_episodic_importance ON episodic_memories (importance, timestamp);
+
+CREATE TABLE IF NOT EXISTS semantic_memories (
+    category TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    confidence REAL NOT NULL DEFAULT 0.8,
+    sources INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (category, key)
+);
+
+CREATE TABLE IF NOT EXISTS memory_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- Row count maintained by triggers, so eviction does not need COUNT(*) on every insert
+CREATE TABLE IF NOT EXISTS memory_counts (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS episodic_count_insert AFTER INSERT ON episodic_memories BEGIN
+    UPDATE memory_counts SET value = value + 1 WHERE name = 'episodic';
+END;
+CREATE TRIGGER IF NOT EXISTS episodic_count_delete AFTER DELETE ON episodic_memories BEGIN
+    UPDATE memory_counts SET value = value - 1 WHERE name = 'episodic';
+END;
+
+-- Full-text index over the terms of each memory, tokenized and normalized like
+-- MemoryStore's text index, keyed by the rowid of the memory
+CREATE VIRTUAL TABLE IF NOT EXISTS episodic_text USING fts5(terms);
+CREATE TRIGGER IF NOT EXISTS episodic_text_delete AFTER DELETE ON episodic_memories BEGIN
+    DELETE FROM episodic_text WHERE rowid = old.rowid;
+END;
+"""
+
+EPISODIC_COLUMNS = "id, timestamp, input, response, emotion, context, importance, retrieval_count"
+
+
+def _memory_terms(memory):
+    """Search terms of an episodic memory, as stored in the full-text index"""
+    return ' '.join(tokenize(f"{memory.get('input', '')} {memory.get('response', '')}"))
+
+
+def _match_expression(terms):
+    """FTS5 query matching documents that contain every term"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+class SQLiteMemoryStore(MemoryStore):
+    """
+    SQLite-backed Memory Store
+
+    Drop-in replacement for MemoryStore that keeps memories in an SQLite
+    database in WAL mode instead of a JSON file loaded wholesale into memory.
+    Episodic memories are indexed by timestamp, emotion and importance and
+    semantic memories are keyed on (category, key), so several worker
+    processes can share one store and startup does not parse any JSON.
+    """
+
+    def __init__(self, config=None):
+        """Initialize the SQLite memory store"""
+        self.config = {
+            'storage_path': 'data/memory_store.db',
+            'max_episodic_memories': 100,
+            'consolidation_interval': 24 * 60 * 60,  # 24 hours in seconds
+            'consolidation_slice_size': 500,  # Rows updated per transaction during consolidation
+            'consolidation_group': None,  # Stores sharing a group share one consolidation thread
+            'storage_backend': 'sqlite',
+            'import_json_path': 'data/memory_store.json',  # Migrated once into an empty database
+            'retrieval_stats_durability': 'batched',  # 'batched' flushes in the background, 'sync' on every read
+            'retrieval_flush_interval': 5.0,
+            'retrieval_flush_threshold': 100,
+            'text_search': 'index',  # 'index' uses the full-text index, 'substring' scans every memory
+            'semantic_rules_path': 'data/semantic_rules.json',
+        }
+
+        if config:
+            self.config.update(config)
+
+        self.semantic_rules = SemanticRuleEngine(rules_path=self.config['semantic_rules_path'])
+
+        self.lock = ReadWriteLock()
+        self.listeners = []
+        self._init_retrieval_stats()
+        _live_stores.add(self)
+
+        os.makedirs(os.path.dirname(self.config['storage_path']) or '.', exist_ok=True)
+
+        # One connection per thread; SQLite connections must not be shared
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute("INSERT OR REPLACE INTO memory_counts (name, value) "
+                         "SELECT 'episodic', COUNT(*) FROM episodic_memories")
+            self._backfill_text_index(conn)
+
+        self.load_memories()
+
+        self.setup_consolidation_timer()
+
+    def _connection(self):
+        """
+        Get the SQLite connection for the current thread
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.config['storage_path'], timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _backfill_text_index(self, conn):
+        """Index the text of memories stored before the full-text index existed"""
+        rows = conn.execute(
+            "SELECT rowid, input, response FROM episodic_memories "
+            "WHERE rowid NOT IN (SELECT rowid FROM episodic_text)").fetchall()
+        conn.executemany("INSERT INTO episodic_text (rowid, terms) VALUES (?, ?)",
+                         [(row['rowid'], _memory_terms(dict(row))) for row in rows])
+
+    @staticmethod
+    def _index_text(conn, rowid, memory):
+        """
+        Add an inserted memory to the full-text index
+
+        Args:
+            conn (sqlite3.Connection): Connection of the open transaction
+            rowid (int): Row ID of the inserted memory
+            memory (dict): The episodic memory
+        """
+        conn.execute("INSERT INTO episodic_text (rowid, terms) VALUES (?, ?)", (rowid, _memory_terms(memory)))
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Run a transaction under the store's write lock
+
+        Change events are queued while the transaction is open and published
+        once it commits, so listeners never see a change that is rolled back.
+        Nested calls join the outer transaction.
+
+        Yields:
+            sqlite3.Connection: The connection of the transaction
+        """
+        with self.lock.write():
+            if getattr(self._local, 'pending_events', None) is not None:
+                yield self._connection()
+                return
+
+            self._local.pending_events = []
+            try:
+                with self._connection() as conn:
+                    yield conn
+                events = self._local.pending_events
+            finally:
+                self._local.pending_events = None
+
+            for event, memory in events:
+                super()._publish(event, memory)
+
+    def _publish(self, event, memory):
+        """
+        Notify listeners of a memory change, once the open transaction commits
+
+        Args:
+            event (str): 'insert', 'update' or 'evict'
+            memory (dict): The changed memory
+        """
+        pending_events = getattr(self._local, 'pending_events', None)
+        if pending_events is not None:
+            pending_events.append((event, memory))
+        else:
+            super()._publish(event, memory)
+
+    @property
+    def last_consolidation(self):
+        """Timestamp of the last consolidation, shared by all processes"""
+        row = self._connection().execute(
+            "SELECT value FROM memory_meta WHERE name = 'last_consolidation'").fetchone()
+        return row['value'] if row else datetime.now().isoformat()
+
+    @last_consolidation.setter
+    def last_consolidation(self, value):
+        with self._write_transaction() as conn:
+            conn.execute(
+                "INSERT INTO memory_meta (name, value) VALUES ('last_consolidation', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value", (value,))
+
+    @property
+    def episodic_memories(self):
+        """All episodic memories, newest first"""
+        rows = self._connection().execute(
+            f"SELECT {EPISODIC_COLUMNS} FROM episodic_memories ORDER BY timestamp DESC").fetchall()
+        return [self._row_to_episodic(row) for row in rows]
+
+    @property
+    def semantic_memories(self):
+        """All semantic memories grouped by category"""
+        semantic = {}
+        for row in self._connection().execute("SELECT * FROM semantic_memories"):
+            semantic.setdefault(row['category'], {})[row['key']] = self._row_to_semantic(row)
+        return semantic
+
+    @staticmethod
+    def _row_to_episodic(row):
+        """Convert an episodic row to the MemoryStore memory format"""
+        return {
+            'id': row['id'],
+            'type': 'episodic',
+            'input': row['input'],
+            'response': row['response'],
+            'emotion': row['emotion'],
+            'context': json.loads(row['context']),
+            'timestamp': row['timestamp'],
+            'importance': row['importance'],
+            'retrieval_count': row['retrieval_count']
+        }
+
+    @staticmethod
+    def _row_to_semantic(row):
+        """Convert a semantic row to the MemoryStore semantic entry format"""
+        return {
+            'value': json.loads(row['value']),
+            'timestamp': row['timestamp'],
+            'confidence': row['confidence'],
+            'sources': row['sources']
+        }
+
+    def load_memories(self):
+        """Import the legacy JSON store into an empty database"""
+        import_path = self.config.get('import_json_path')
+        if not import_path or not os.path.exists(import_path):
+            return
+
+        conn = self._connection()
+        has_memories = conn.execute("SELECT 1 FROM episodic_memories LIMIT 1").fetchone() or \
+            conn.execute("SELECT 1 FROM semantic_memories LIMIT 1").fetchone()
+        if has_memories:
+            return
+
+        try:
+            with open(import_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.import_memories(data)
+        except Exception as e:
+            print(f"Error importing memories from {import_path}: {e}")
+
+    def import_memories(self, data):
+        """
+        Import memories in the JSON snapshot format
+
+        Args:
+            data (dict): Snapshot with episodic_memories, semantic_memories and last_consolidation
+        """
+        with self._write_transaction() as conn:
+            for memory in data.get('episodic_memories', []):
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO episodic_memories ({EPISODIC_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (memory.get('id', memory['timestamp']), memory['timestamp'], memory.get('input', ''),
+                     memory.get('response', ''), memory.get('emotion', 'neutral'),
+                     json.dumps(memory.get('context', {}), ensure_ascii=False),
+                     memory.get('importance', 0.5), memory.get('retrieval_count', 0)))
+                if cursor.rowcount:
+                    self._index_text(conn, cursor.lastrowid, memory)
+
+            for category, entries in data.get('semantic_memories', {}).items():
+                for key, entry in entries.items():
+                    conn.execute(
+                        "INSERT OR IGNORE INTO semantic_memories VALUES (?, ?, ?, ?, ?, ?)",
+                        (category, key, json.dumps(entry['value'], ensure_ascii=False), entry['timestamp'],
+                         entry.get('confidence', 0.8), entry.get('sources', 1)))
+
+        if data.get('last_consolidation'):
+            self.last_consolidation = data['last_consolidation']
+
+    def save_memories(self):
+        """Every change is committed as it happens, so there is nothing to save"""
+
+    def compact_memories(self):
+        """Checkpoint the write-ahead log into the database file"""
+        try:
+            self._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except Exception as e:
+            print(f"Error compacting memories: {e}")
+
+    def close(self):
+        """Flush buffered retrieval counts and close the connection of the current thread"""
+        consolidation_scheduler.unregister(self)
+        _forget_shared_store(self)
+        self._stop_stats_flusher()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def memory_footprint(self):
+        """
+        Estimate how much process memory the store holds
+
+        Returns:
+            dict: Number of episodic memories and approximate bytes (rows live in the database, not the process)
+        """
+        row = self._connection().execute("SELECT value FROM memory_counts WHERE name = 'episodic'").fetchone()
+        return {'episodic_memories': row['value'] if row else 0, 'bytes': 0}
+
+    def store_episodic_memory(self, memory):
+        """
+        Store an episodic memory (specific interaction or experience)
+
+        Args:
+            memory (dict): The memory to store (see MemoryStore.store_episodic_memory)
+
+        Returns:
+            str: ID of the stored memory
+        """
+        if not memory or 'input' not in memory:
+            return None
+
+        episodic_memory = self._create_episodic_memory(memory)
+
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO episodic_memories ({EPISODIC_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (episodic_memory['id'], episodic_memory['timestamp'], episodic_memory['input'],
+                 episodic_memory['response'], episodic_memory['emotion'],
+                 json.dumps(episodic_memory['context'], ensure_ascii=False),
+                 episodic_memory['importance'], episodic_memory['retrieval_count']))
+            self._index_text(conn, cursor.lastrowid, episodic_memory)
+            self._publish('insert', episodic_memory)
+            self._evict_excess_memories(conn)
+
+            # Extracted facts are committed in the same transaction as the memory
+            self.extract_semantic_information(episodic_memory)
+
+        return episodic_memory['id']
+
+    def _evict_excess_memories(self, conn=None):
+        """
+        Remove the least important episodic memories beyond the configured limit
+
+        The importance index makes this an O(log n) lookup per evicted row.
+
+        Args:
+            conn (sqlite3.Connection, optional): Connection of an open transaction
+        """
+        if conn is None:
+            with self._write_transaction() as conn:
+                self._evict_excess_memories(conn)
+            return
+
+        count = conn.execute("SELECT value FROM memory_counts WHERE name = 'episodic'").fetchone()[0]
+        excess = count - self.config['max_episodic_memories']
+        if excess > 0:
+            evicted = conn.execute(
+                f"SELECT {EPISODIC_COLUMNS} FROM episodic_memories ORDER BY importance ASC, timestamp ASC LIMIT ?",
+                (excess,)).fetchall()
+            conn.executemany("DELETE FROM episodic_memories WHERE id = ?", [(row['id'],) for row in evicted])
+            for row in evicted:
+                self._publish('evict', self._row_to_episodic(row))
+
+    def store_semantic_memory(self, category, key, value):
+        """
+        Store semantic memory (general knowledge about the user)
+
+        Args:
+            category (str): Category of the information
+            key (str): Key for the information
+            value (any): Value to store
+        """
+        if not category or not key or value is None:
+            return
+
+        with self._write_transaction():
+            self._set_semantic_memory(category, key, value)
+
+    def _set_semantic_memory(self, category, key, value):
+        """Upsert a semantic memory row without committing the current transaction"""
+        conn = self._connection()
+        existing = self.listeners and conn.execute(
+            "SELECT 1 FROM semantic_memories WHERE category = ? AND key = ?", (category, key)).fetchone()
+        entry = {'value': value, 'timestamp': datetime.now().isoformat(), 'confidence': 0.8, 'sources': 1}
+        conn.execute(
+            "INSERT INTO semantic_memories (category, key, value, timestamp, confidence, sources) "
+            "VALUES (?, ?, ?, ?, 0.8, 1) "
+            "ON CONFLICT(category, key) DO UPDATE SET value = excluded.value, "
+            "timestamp = excluded.timestamp, confidence = excluded.confidence, sources = excluded.sources",
+            (category, key, json.dumps(value, ensure_ascii=False), entry['timestamp']))
+        self._publish('update' if existing else 'insert', semantic_memory_view(category, key, entry))
+
+    def retrieve_episodic_memories(self, query=None):
+        """
+        Retrieve episodic memories based on query
+
+        Args:
+            query (dict): Query parameters (see MemoryStore.retrieve_episodic_memories)
+                - text: Text to search for
+                - emotion: Emotion to filter by
+                - limit: Maximum number of results
+                - match: 'index' (all query terms, via the full-text index) or
+                  'substring' (the whole text as a substring)
+                - rank: Ordering of text matches, 'bm25' (default) or
+                  'recency' (recency x importance)
+
+        Returns:
+            list: Matching episodic memories
+        """
+        if query is None:
+            query = {}
+
+        text = query.get('text')
+        match = query.get('match') or self.config['text_search']
+        conditions = []
+        params = []
+
+        if text and match == 'index':
+            terms = tokenize(text)
+            if terms:
+                return self._search_episodic_text(terms, query.get('emotion'), query.get('limit', 5),
+                                                  query.get('rank') or 'bm25')
+
+        if text:
+            search_text = text.lower()
+            conditions.append("(instr(lower(input), ?) > 0 OR instr(lower(response), ?) > 0)")
+            params.extend([search_text, search_text])
+
+        if query.get('emotion'):
+            conditions.append("emotion = ?")
+            params.append(query['emotion'])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(query.get('limit', 5))
+
+        rows = self._connection().execute(
+            f"SELECT {EPISODIC_COLUMNS} FROM episodic_memories {where} "
+            "ORDER BY timestamp DESC LIMIT ?", params).fetchall()
+        results = [self._row_to_episodic(row) for row in rows]
+
+        # Update retrieval count for returned memories (buffered, not written on the read path)
+        self._note_retrievals(results)
+
+        return results
+
+    def _search_episodic_text(self, terms, emotion, limit, rank):
+        """
+        Find episodic memories containing all query terms using the full-text index
+
+        Args:
+            terms (list): Normalized query terms
+            emotion (str): Emotion to filter by, or None
+            limit (int): Maximum number of results
+            rank (str): 'bm25' or 'recency'
+
+        Returns:
+            list: Matching episodic memories, best first
+        """
+        if rank == 'recency':
+            order = ("m.importance / (1 + MAX(julianday('now', 'localtime') - julianday(m.timestamp), 0)) DESC, "
+                     "m.timestamp DESC")
+        else:
+            # FTS5 scores better matches lower
+            order = "bm25(episodic_text), m.timestamp DESC"
+
+        columns = ', '.join(f"m.{column.strip()}" for column in EPISODIC_COLUMNS.split(','))
+        params = [_match_expression(terms)]
+        emotion_condition = ""
+        if emotion:
+            emotion_condition = "AND m.emotion = ?"
+            params.append(emotion)
+        params.append(limit)
+
+        rows = self._connection().execute(
+            f"SELECT {columns} FROM episodic_text JOIN episodic_memories m ON m.rowid = episodic_text.rowid "
+            f"WHERE episodic_text MATCH ? {emotion_condition} ORDER BY {order} LIMIT ?", params).fetchall()
+        results = [self._row_to_episodic(row) for row in rows]
+
+        self._note_retrievals(results)
+
+        return results
+
+    def _apply_retrieval_stats(self, counts):
+        """
+        Increase retrieval count and importance of retrieved memories in one transaction
+
+        Args:
+            counts (Counter): Number of retrievals per memory ID
+        """
+        with self._write_transaction() as conn:
+            conn.executemany(
+                "UPDATE episodic_memories SET retrieval_count = retrieval_count + ?, "
+                "importance = MIN(importance + 0.1 * ?, 1.0) WHERE id = ?",
+                [(count, count, memory_id) for memory_id, count in counts.items()])
+            if self.listeners:
+                for memory_id in counts:
+                    self._publish_episodic_update(conn, "id = ?", (memory_id,))
+
+    def _publish_episodic_update(self, conn, where, params):
+        """Publish 'update' events for the episodic rows matching a WHERE clause"""
+        for row in conn.execute(f"SELECT {EPISODIC_COLUMNS} FROM episodic_memories WHERE {where}", params):
+            self._publish('update', self._row_to_episodic(row))
+
+    def retrieve_semantic_memory(self, category, key=None):
+        """
+        Retrieve semantic memory
+
+        Args:
+            category (str): Category to retrieve
+            key (str, optional): Specific key to retrieve
+
+        Returns:
+            dict: The semantic memory
+        """
+        if not category:
+            return None
+
+        conn = self._connection()
+        if key is None:
+            rows = conn.execute("SELECT * FROM semantic_memories WHERE category = ?", (category,)).fetchall()
+            if not rows:
+                return None
+            return {row['key']: self._row_to_semantic(row) for row in rows}
+
+        row = conn.execute("SELECT * FROM semantic_memories WHERE category = ? AND key = ?",
+                           (category, key)).fetchone()
+        return self._row_to_semantic(row) if row else None
+
+    def consolidate_memories(self):
+        """
+        Consolidate memories to improve recall and reduce storage
+
+        Importance is updated in rowid ranges of 'consolidation_slice_size'
+        rows, one short transaction each, so inserts from request threads and
+        other processes are never blocked for a whole-table update.
+        """
+        print('Consolidating memories...')
+
+        conn = self._connection()
+        last_rowid = 0
+        while True:
+            row = conn.execute(
+                "SELECT MAX(rowid) AS last FROM (SELECT rowid FROM episodic_memories "
+                "WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                (last_rowid, self.config['consolidation_slice_size'])).fetchone()
+            if row['last'] is None:
+                break
+
+            with self._write_transaction():
+                # Update importance based on age and retrieval count, kept within bounds
+                conn.execute("""
+                    UPDATE episodic_memories SET importance = MAX(0.1, MIN(1.0,
+                        importance
+                        - CASE
+                            WHEN julianday('now', 'localtime') - julianday(timestamp) > 30 THEN 0.2
+                            WHEN julianday('now', 'localtime') - julianday(timestamp) > 7 THEN 0.1
+                            ELSE 0 END
+                        + CASE
+                            WHEN retrieval_count > 5 THEN 0.3
+                            WHEN retrieval_count > 2 THEN 0.2
+                            ELSE 0 END))
+                    WHERE rowid > ? AND rowid <= ?
+                """, (last_rowid, row['last']))
+                if self.listeners:
+                    self._publish_episodic_update(conn, "rowid > ? AND rowid <= ?", (last_rowid, row['last']))
+            last_rowid = row['last']
+
+        with self._write_transaction():
+            # Remove low-importance memories if we're over the limit
+            self._evict_excess_memories(conn)
+
+            # Update semantic memories confidence based on multiple sources
+            changed = """
+                (sources > 3 AND confidence != 0.95) OR (sources > 1 AND sources <= 3 AND confidence != 0.9)
+            """
+            changed_keys = conn.execute(
+                f"SELECT category, key FROM semantic_memories WHERE {changed}").fetchall() if self.listeners else []
+            conn.execute(f"""
+                UPDATE semantic_memories SET confidence = CASE
+                    WHEN sources > 3 THEN 0.95
+                    ELSE 0.9 END
+                WHERE {changed}
+            """)
+            for category, key in changed_keys:
+                row = conn.execute("SELECT * FROM semantic_memories WHERE category = ? AND key = ?",
+                                   (category, key)).fetchone()
+                self._publish('update', semantic_memory_view(category, key, self._row_to_semantic(row)))
+
+        self.last_consolidation = datetime.now().isoformat()
+        self.compact_memories()
+
+        print('Memory consolidation complete')
+
+    def get_emotional_trends(self):
+        """
+        Get emotional trends from episodic memories
+
+        Returns:
+            dict: Emotional trends
+        """
+        rows = self._connection().execute(
+            "SELECT emotion, COUNT(*) AS count FROM episodic_memories GROUP BY emotion").fetchall()
+        total = sum(row['count'] for row in rows)
+
+        trends = {}
+        if total > 0:
+            for row in rows:
+                trends[row['emotion']] = (row['count'] / total) * 100
+
+        return trends
+
+    def get_all_memories(self):
+        """
+        Get all memories (both episodic and semantic)
+
+        Returns:
+            list: All memories with IDs
+        """
+        all_memories = self.episodic_memories
+
+        for category, entries in self.semantic_memories.items():
+            for key, memory in entries.items():
+                all_memories.append(semantic_memory_view(category, key, memory))
+
+        return all_memories
+
+    def get_memory_by_id(self, memory_id):
+        """
+        Get a specific memory by ID
+
+        Args:
+            memory_id (str): The ID of the memory to retrieve
+
+        Returns:
+            dict: The memory if found, None otherwise
+        """
+        conn = self._connection()
+        row = conn.execute(f"SELECT {EPISODIC_COLUMNS} FROM episodic_memories WHERE id = ?",
+                           (memory_id,)).fetchone()
+        if row:
+            return self._row_to_episodic(row)
+
+        # Check if it's a semantic memory ID (format: "category:key")
+        if ':' in memory_id:
+            category, key = memory_id.split(':', 1)
+            row = conn.execute("SELECT * FROM semantic_memories WHERE category = ? AND key = ?",
+                               (category, key)).fetchone()
+            if row:
+                return semantic_memory_view(category, key, self._row_to_semantic(row))
+
+        # Memory not found
+        return None
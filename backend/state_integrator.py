@@ -6,7 +6,8 @@ from datetime import datetime
 from persona_mesh import PersonaMesh
 from memory_persona_bridge import MemoryPersonaBridge
 from emotion_decision_matrix import EmotionDecisionMatrix
-from memory_store import MemoryStore
+from memory_store import MemoryStore, get_memory_store
+from memory_shards import MemoryShardManager, user_memory
 from emotional_memory import get_last_emotion, log_emotion
 from emotional_self_awareness import EmotionalSelfAwareness
 from emotional_timeline import EmotionalTimeline
@@ -36,7 +37,8 @@ class StateIntegrator:
                  emotion_matrix: Optional[EmotionDecisionMatrix] = None,
                  emotional_self_awareness: Optional[EmotionalSelfAwareness] = None,
                  emotional_timeline: Optional[EmotionalTimeline] = None,
-                 relationship_memory: Optional[PersonalRelationshipMemory] = None):
+                 relationship_memory: Optional[PersonalRelationshipMemory] = None,
+                 memory_shards: Optional[MemoryShardManager] = None):
         """
         Initialize the StateIntegrator with connections to all system components
 
@@ -48,9 +50,11 @@ class StateIntegrator:
             emotional_self_awareness: The emotional self-awareness engine
             emotional_timeline: The emotional timeline system
             relationship_memory: The personal relationship memory system
+            memory_shards: Per-user memory shards; memories of a known user are read from and stored in their shard
         """
         # Initialize or use provided components
-        self.memory_store = memory_store if memory_store else MemoryStore()
+        self.memory_store = memory_store if memory_store else get_memory_store()
+        self.memory_shards = memory_shards
         self.persona_mesh = persona_mesh if persona_mesh else PersonaMesh(self.memory_store)
         self.emotion_matrix = emotion_matrix if emotion_matrix else EmotionDecisionMatrix(self.memory_store)
         self.emotional_self_awareness = emotional_self_awareness if emotional_self_awareness else EmotionalSelfAwareness(self.memory_store)
@@ -63,8 +67,9 @@ class StateIntegrator:
         else:
             self.memory_persona_bridge = MemoryPersonaBridge(
                 self.memory_store, 
-                None,  # Memory indexer will be created by the bridge
-                self.persona_mesh
+                None,  # The bridge uses the shared memory indexer
+                self.persona_mesh,
+                self.memory_shards
             )
 
         # Motivation system
@@ -185,13 +190,15 @@ class StateIntegrator:
             "dominant": dominant_motivation
         })
 
-    def determine_response_parameters(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
+    def determine_response_parameters(self, user_input: str, session_id: str = "default",
+                                      user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Determine parameters for response generation based on integrated state
 
         Args:
             user_input: The user's input text
             session_id: The session identifier
+            user_id: The user whose memories are consulted (the shared memories if not given)
 
         Returns:
             Dictionary with response parameters
@@ -207,7 +214,7 @@ class StateIntegrator:
         self.update_motivations(user_input, emotional_context)
 
         # Get persona weights from memory-persona bridge
-        persona_weights = self.memory_persona_bridge.determine_persona_weights(user_input, session_id)
+        persona_weights = self.memory_persona_bridge.determine_persona_weights(user_input, session_id, user_id)
 
         # Update current state
         self.current_state["active_emotion"] = emotional_context["current_emotion"]
@@ -217,7 +224,8 @@ class StateIntegrator:
 
         # Determine context awareness level based on relevant memories
         if self.memory_store:
-            relevant_memories = self.memory_store.retrieve_episodic_memories({"text": user_input, "limit": 3})
+            with user_memory(self.memory_shards, user_id, self.memory_store) as (memory_store, _):
+                relevant_memories = memory_store.retrieve_episodic_memories({"text": user_input, "limit": 3})
             context_awareness = min(1.0, 0.3 + (len(relevant_memories) * 0.2))
             self.current_state["context_awareness"] = context_awareness
 
@@ -243,25 +251,28 @@ class StateIntegrator:
             "current_state": self.current_state.copy()
         }
 
-    def generate_integrated_response(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
+    def generate_integrated_response(self, user_input: str, session_id: str = "default",
+                                     user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a response that integrates emotions, memory, and motivation
 
         Args:
             user_input: The user's input text
             session_id: The session identifier
+            user_id: The user whose memories are consulted and extended (the shared memories if not given)
 
         Returns:
             Dictionary with the integrated response and metadata
         """
         # Determine response parameters
-        params = self.determine_response_parameters(user_input, session_id)
+        params = self.determine_response_parameters(user_input, session_id, user_id)
 
         # Extract context from memory if available
         context = user_input
         if self.memory_store and params["context_awareness"] > 0.5:
             # Try to extract more context from memory
-            memories = self.memory_store.retrieve_episodic_memories({"text": user_input, "limit": 1})
+            with user_memory(self.memory_shards, user_id, self.memory_store) as (memory_store, _):
+                memories = memory_store.retrieve_episodic_memories({"text": user_input, "limit": 1})
             if memories:
                 context_memory = memories[0]
                 context = f"{user_input} (في سياق {context_memory.get('input', '')})"
@@ -276,7 +287,8 @@ class StateIntegrator:
         # Get memory-guided persona response
         persona_response = self.memory_persona_bridge.get_memory_guided_response(
             user_input, 
-            session_id
+            session_id,
+            user_id
         )
 
         # Detect language from user input
@@ -317,15 +329,16 @@ class StateIntegrator:
 
         # Store the interaction in memory
         if self.memory_store:
-            self.memory_store.store_episodic_memory({
-                "input": user_input,
-                "response": integrated_response["text"],
-                "emotion": params["emotional_context"]["current_emotion"],
-                "context": {
-                    "state": self.current_state,
-                    "motivation_focus": params["motivation_focus"]
-                }
-            })
+            with user_memory(self.memory_shards, user_id, self.memory_store) as (memory_store, _):
+                memory_store.store_episodic_memory({
+                    "input": user_input,
+                    "response": integrated_response["text"],
+                    "emotion": params["emotional_context"]["current_emotion"],
+                    "context": {
+                        "state": self.current_state,
+                        "motivation_focus": params["motivation_focus"]
+                    }
+                })
 
         return integrated_response
 
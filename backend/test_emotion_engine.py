@@ -0,0 +1,275 @@
+"""
+Test script for the local emotion engine.
+This script checks the lexicon classifier and that detect_emotion only asks
+Gemini when remote escalation is enabled and the lexicon is unsure.
+
+Usage:
+    python test_emotion_engine.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import emotion_engine
+from emotion_decision_matrix import EmotionDecisionMatrix
+from emotion_engine import (analyze_emotion, analyze_emotions, clear_emotion_cache, detect_emotion,
+                            detect_emotions, get_emotion_cache_stats)
+import emotional_self_awareness
+from emotion_lexicon import classify_emotion, scan_text, scan_texts, score_emotions
+from emotional_memory import get_emotion_timeline, log_emotion
+from emotional_timeline import EmotionalTimeline
+from language_id import identify_language, language_profile, primary_language
+
+
+def test_lexicon_classifier():
+    """Test lexicon matching with clitics, negation and intensifiers"""
+    print("\n=== Testing Lexicon Classifier ===")
+    cases = [
+        ("أنا سعيد جدا اليوم، لقد نجحت في الامتحان!", 'happiness'),
+        ("أشعر بالحزن الشديد بسبب ما حدث", 'sadness'),
+        ("هذا أمر مزعج للغاية، أشعر بالغضب", 'anger'),
+        ("أشعر بالقلق والخوف من هذا الموقف", 'fear'),
+        ("اليوم هو الخميس، الطقس معتدل", 'neutral'),
+        ("I'm feeling joyful and excited", 'happiness'),
+        ("I am so fed up with this", 'anger'),
+        ("I am not happy at all", 'sadness'),
+        ("I don't feel scared", 'neutral'),
+        ("أنا مش زعلان", 'neutral'),
+        ("I made it home", 'neutral'),
+    ]
+    for text, expected in cases:
+        emotion, confidence = classify_emotion(text)
+        print(f"{text} -> {emotion} ({confidence:.2f})")
+        assert emotion == expected, (text, emotion)
+
+    # Intensifiers before (English) or after (Arabic) the term raise its weight
+    assert score_emotions("very sad")['sadness'] > score_emotions("sad")['sadness']
+    assert score_emotions("حزين جدا")['sadness'] > score_emotions("حزين")['sadness']
+    assert score_emotions("slightly worried")['fear'] < score_emotions("worried")['fear']
+
+    # Conflicting or missing evidence gives low confidence
+    assert classify_emotion("happy but sad")[1] < classify_emotion("happy")[1]
+    assert classify_emotion("hello there") == ('neutral', 0.3)
+
+
+def test_remote_escalation():
+    """Test that Gemini is only asked about uncertain texts when enabled"""
+    print("\n=== Testing Remote Escalation ===")
+    calls = []
+
+    def fake_remote(text, language):
+        calls.append(text)
+        return 'fear'
+
+    original = emotion_engine._remote_emotion
+    emotion_engine._remote_emotion = fake_remote
+    clear_emotion_cache()
+    try:
+        os.environ.pop('EMOTION_REMOTE_ESCALATION', None)
+        assert detect_emotion("hello there") == ('neutral', 'en')
+        assert detect_emotion("أنا سعيد جدا") == ('happiness', 'ar')
+        assert calls == []
+
+        os.environ['EMOTION_REMOTE_ESCALATION'] = 'true'
+        clear_emotion_cache()
+        assert detect_emotion("I am very happy today") == ('happiness', 'en')
+        assert detect_emotion("hello there") == ('fear', 'en')
+        assert calls == ["hello there"]
+        print(f"Escalated texts: {calls}")
+    finally:
+        emotion_engine._remote_emotion = original
+        os.environ.pop('EMOTION_REMOTE_ESCALATION', None)
+        clear_emotion_cache()
+
+
+def test_emotion_cache():
+    """Test that equivalent texts are classified once"""
+    print("\n=== Testing Emotion Cache ===")
+    calls = []
+    original = emotion_engine._analyze
+
+    def counting_analyze(text, language):
+        calls.append(text)
+        return original(text, language)
+
+    emotion_engine._analyze = counting_analyze
+    clear_emotion_cache()
+    try:
+        before = get_emotion_cache_stats()
+        assert detect_emotion("I am VERY happy today") == ('happiness', 'en')
+        assert detect_emotion("i am  very happy today") == ('happiness', 'en')
+        assert detect_emotion("أنا سعيدة جداً") == ('happiness', 'ar')
+        assert detect_emotion("انا سعيده جدا") == ('happiness', 'ar')
+        # An explicit language is part of the key
+        assert detect_emotion("I am very happy today", 'en') == ('happiness', 'en')
+        assert len(calls) == 3
+
+        stats = get_emotion_cache_stats()
+        print(f"Emotion cache: {stats}")
+        assert stats['hits'] - before['hits'] == 2
+        assert stats['misses'] - before['misses'] == 3
+        assert stats['entries'] == 3
+    finally:
+        emotion_engine._analyze = original
+        clear_emotion_cache()
+
+
+def test_batch_detection():
+    """Test batch detection and that uncertain texts share one prompt per language"""
+    print("\n=== Testing Batch Detection ===")
+    texts = [
+        "I am very happy today",
+        "أنا حزين جدا",
+        "",
+        "I am very happy today",
+        "hello there",
+        "مرحبا بك",
+        "the meeting is at noon",
+    ]
+    clear_emotion_cache()
+    results = detect_emotions(texts)
+    print(f"Batch results: {results}")
+    assert [result[:2] for result in results] == [
+        ('happiness', 'en'), ('sadness', 'ar'), ('neutral', 'unknown'), ('happiness', 'en'),
+        ('neutral', 'en'), ('neutral', 'ar'), ('neutral', 'en')]
+    assert results[0][2] > 0.9 and results[4][2] < 0.5
+    # Batch results are shared with detect_emotion through the cache
+    assert [detect_emotion(text) for text in texts[:2]] == [result[:2] for result in results[:2]]
+
+    # One lexicon scan over the batch gives the same results as scanning each text
+    lexicon_texts = texts + ["I am so happy", "not\x00happy", "لست سعيدا ابدا!", None, "so\nmuch fun"]
+    assert scan_texts(lexicon_texts) == [scan_text(text) for text in lexicon_texts]
+    assert scan_texts(["not\x00happy"]) == [scan_text("not happy")]
+
+    # Analytics classify the records logged without an emotion in one batch
+    calls = []
+    original_detect = emotional_self_awareness.detect_emotions
+    emotional_self_awareness.detect_emotions = lambda batch: calls.append(list(batch)) or original_detect(batch)
+    try:
+        timeline = [{"emotion": "", "text": "work deadline makes me so angry"},
+                    {"emotion": "", "text": "another work deadline, I am furious"},
+                    {"emotion": "فرح", "text": "holiday plans"}]
+        triggers = emotional_self_awareness.EmotionalSelfAwareness()._identify_triggers(timeline)
+    finally:
+        emotional_self_awareness.detect_emotions = original_detect
+    print(f"Triggers: {triggers}")
+    assert calls == [[timeline[0]["text"], timeline[1]["text"]]]
+    assert triggers == {"work": {"anger": 1.0}}
+
+    batches = []
+
+    def fake_remote_batch(batch, language):
+        batches.append((language, list(batch)))
+        return ['fear'] * len(batch)
+
+    original = emotion_engine._remote_emotions
+    emotion_engine._remote_emotions = fake_remote_batch
+    os.environ['EMOTION_REMOTE_ESCALATION'] = 'true'
+    clear_emotion_cache()
+    try:
+        results = detect_emotions(texts)
+        assert sorted(batches) == [('ar', ["مرحبا بك"]), ('en', ["hello there", "the meeting is at noon"])]
+        assert [result[0] for result in results] == [
+            'happiness', 'sadness', 'neutral', 'happiness', 'fear', 'fear', 'fear']
+        assert results[4][2] == emotion_engine.REMOTE_SCORE
+    finally:
+        emotion_engine._remote_emotions = original
+        os.environ.pop('EMOTION_REMOTE_ESCALATION', None)
+        clear_emotion_cache()
+
+
+def test_emotion_analysis():
+    """Test the score vector and intensity and the modules that consume them"""
+    print("\n=== Testing Emotion Analysis ===")
+    clear_emotion_cache()
+    analysis = analyze_emotion("I am happy but also sad")
+    print(f"Analysis: {analysis}")
+    assert set(analysis['scores']) == {'sadness', 'happiness', 'anger', 'fear', 'neutral'}
+    assert abs(sum(analysis['scores'].values()) - 1.0) < 1e-9
+    assert analysis['scores']['happiness'] == analysis['scores']['sadness'] == 0.5
+    assert analyze_emotion("hello")['scores']['neutral'] == 1.0
+
+    # Modifiers and punctuation move the intensity
+    plain = analyze_emotion("أنا حزين")['intensity']
+    assert analyze_emotion("أنا حزين جدا!")['intensity'] > plain
+    assert analyze_emotion("I am slightly sad")['intensity'] < plain
+
+    # Returned analyses are copies, so the cached one stays intact
+    analysis['scores']['anger'] = 1.0
+    assert analyze_emotion("I am happy but also sad")['scores']['anger'] == 0.0
+    assert [a['emotion'] for a in analyze_emotions(["so happy!", "", "أنا خائف"])] == ['happiness', 'neutral', 'fear']
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous = os.getcwd()
+        os.chdir(directory)
+        try:
+            matrix = EmotionDecisionMatrix()
+            assert matrix.detect_emotion("أنا حزين جدا!") == ('حزن', analyze_emotion("أنا حزين جدا!")['intensity'])
+            context = matrix.analyze_emotional_context("I am extremely angry!", "analysis-session")
+            assert context['current_emotion'] == 'غضب' and context['intensity_level'] == 'high'
+            assert context['emotion_scores']['anger'] == 1.0
+
+            # Timeline valence uses the logged probabilities
+            log_emotion("analysis-session", 'حزن', "happy but sad",
+                        scores=analyze_emotion("happy but sad")['scores'], intensity=0.5)
+            log_emotion("analysis-session", 'حزن', "sad")
+            records = get_emotion_timeline("analysis-session")
+            timeline = EmotionalTimeline()
+            valences = [timeline._record_valence(record) for record in records]
+            print(f"Valences: {valences}")
+            assert valences == [-0.8, 0.0, -1.0]
+        finally:
+            os.chdir(previous)
+
+
+def test_language_identification():
+    """Test script-ratio language identification and its memoization"""
+    print("\n=== Testing Language Identification ===")
+    cases = [
+        ("أنا سعيد جدا اليوم", 'ar', 'ar'),
+        ("أنَا سَعِيدٌ", 'ar', 'ar'),
+        ("I am very happy today", 'en', 'en'),
+        ("This is mixed عربي and English", 'mixed', 'en'),
+        ("شكرا جزيلا thanks", 'mixed', 'ar'),
+        ("enta 3amel eh? ana za3lan", 'arabizi', 'ar'),
+        ("ana mabsoot awi", 'arabizi', 'ar'),
+        ("3ala fekra, ana 7abeby", 'arabizi', 'ar'),
+        # Short Arabizi: one word spelling a letter with a digit is enough
+        ("ana za3lan", 'arabizi', 'ar'),
+        ("ana 3ayez a3ayat", 'arabizi', 'ar'),
+        # Any Arabic character used to make the text Arabic; mostly Latin text is now English
+        ("I said شكرا to everyone at the party", 'mixed', 'en'),
+        ("قلت لهم شكرا على كل شيء ok", 'ar', 'ar'),
+        # English words that are also Arabic words, and letter-digit tokens
+        ("A5 paper please", 'en', 'en'),
+        ("ya know, ana and leh are coming", 'en', 'en'),
+        ("salam", 'en', 'en'),
+        ("an mp3 and some h2o", 'en', 'en'),
+        ("habibi", 'en', 'en'),
+        ("123 !@#$%", 'unknown', 'unknown'),
+        ("", 'unknown', 'unknown'),
+    ]
+    for text, language, primary in cases:
+        print(f"{text!r} -> {identify_language(text)} / {primary_language(text)}")
+        assert identify_language(text) == language, text
+        assert primary_language(text) == primary, text
+        assert emotion_engine.detect_language(text) == primary
+
+    # Repeated texts are served from the memo
+    before = language_profile.cache_info().hits
+    identify_language("I am very happy today")
+    assert language_profile.cache_info().hits == before + 1
+
+
+if __name__ == "__main__":
+    test_lexicon_classifier()
+    test_remote_escalation()
+    test_emotion_cache()
+    test_batch_detection()
+    test_emotion_analysis()
+    test_language_identification()
+    print("\n=== All emotion engine tests completed successfully ===")
@@ -0,0 +1,567 @@
+"""
+Test script for the MemoryIndexer.
+This script checks that the index follows MemoryStore changes and that
+searches over the index return the expected memories.
+
+Usage:
+    python test_memory_indexer.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory_index_file import MappedPostings
+from memory_indexer import LIST_INDEXES, MemoryIndexer, get_memory_indexer, intersect_postings
+from memory_persona_bridge import MemoryPersonaBridge
+from memory_store import MemoryStore
+from text_index import analyze
+from ttl_cache import TTLCache
+from vector_index import NUMPY_AVAILABLE, VectorIndex, text_vector
+
+
+@contextmanager
+def temporary_workdir():
+    """Run inside a temporary directory so the relative data/ paths stay isolated"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def _create_store(**config):
+    """Create a memory store in the current directory"""
+    store_config = {'storage_backend': 'log'}
+    store_config.update(config)
+    return MemoryStore(store_config)
+
+
+def _create_store_with(memories):
+    """
+    Create a memory store holding episodic memories with given timestamps
+
+    Args:
+        memories (list): (input, emotion, importance, age in days) tuples
+
+    Returns:
+        tuple: (MemoryStore, list of memory IDs in the order given)
+    """
+    now = datetime.now()
+    episodic_memories = [{
+        'id': f"memory-{i}",
+        'type': 'episodic',
+        'input': text,
+        'response': 'ok',
+        'emotion': emotion,
+        'context': {},
+        'timestamp': (now - timedelta(days=age)).isoformat(),
+        'importance': importance,
+        'retrieval_count': 0
+    } for i, (text, emotion, importance, age) in enumerate(memories)]
+
+    os.makedirs('data', exist_ok=True)
+    with open('data/memory_store.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'episodic_memories': sorted(episodic_memories, key=lambda memory: memory['timestamp'], reverse=True),
+            'semantic_memories': {},
+            'last_consolidation': now.isoformat()
+        }, f)
+    return _create_store(storage_backend='json'), [memory['id'] for memory in episodic_memories]
+
+
+def test_incremental_index_updates():
+    """Test that inserts, evictions and restarts update the index without a rebuild"""
+    print("\n=== Testing Incremental Index Updates ===")
+
+    with temporary_workdir():
+        store = _create_store(max_episodic_memories=2)
+        indexer = MemoryIndexer(store)
+        assert indexer.sync_index() == 0  # No saved index yet, so this is a rebuild
+
+        first_id = store.store_episodic_memory({"input": "first", "response": "ok", "emotion": "neutral"})
+        sad_id = store.store_episodic_memory({"input": "second", "response": "ok", "emotion": "sad"})
+        assert indexer.index_data['emotion_index']['sad'] == [sad_id]
+        assert [memory['id'] for memory in indexer.search_memories('', {'emotion': 'sad'})] == [sad_id]
+
+        # The neutral memory is the least important, so it is evicted and leaves the index
+        store.store_episodic_memory({"input": "third", "response": "ok", "emotion": "happy"})
+        assert first_id not in indexer.index_data['memory_keys']
+        assert 'neutral' not in indexer.index_data['emotion_index']
+
+        indexer.close()
+        # Stored while no indexer is following the store
+        angry_id = store.store_episodic_memory({"input": "fourth", "response": "ok", "emotion": "angry"})
+        store.close()
+
+        store = _create_store(max_episodic_memories=2)
+        indexer = MemoryIndexer(store)
+        changed = indexer.sync_index()
+        print(f"Memories reconciled on startup: {changed}")
+        assert changed == 2  # The angry memory was added and the memory it evicted removed
+        assert indexer.index_data['emotion_index']['angry'] == [angry_id]
+        assert set(indexer.index_data['memory_keys']) == {memory['id'] for memory in store.get_all_memories()}
+        indexer.close()
+        store.close()
+
+
+def test_sync_after_unclean_exit():
+    """Test that sync_index picks up updates made after the index was last saved"""
+    print("\n=== Testing Sync After Unclean Exit ===")
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+        tea_id = store.store_episodic_memory({"input": "green tea", "response": "ok"})
+        indexer.close()
+
+        # The next process updates the memory and exits without saving its index
+        crashed = MemoryIndexer(store)
+        store.retrieve_episodic_memories({"text": "tea"})
+        store.flush_retrieval_stats()
+        importance = store.get_memory_by_id(tea_id)['importance']
+        assert crashed.index_data['memory_stats'][tea_id][1] == importance
+        store.unsubscribe(crashed.handle_memory_event)
+
+        indexer = MemoryIndexer(store)
+        assert indexer.index_data['memory_stats'][tea_id][1] < importance
+        assert indexer.sync_index() == 1
+        assert indexer.index_data['memory_stats'][tea_id][1] == importance
+        assert indexer.sync_index() == 0
+        indexer.close()
+        store.close()
+
+
+def test_shared_indexer():
+    """Test that modules share one indexer per index file"""
+    print("\n=== Testing Shared Indexer ===")
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = get_memory_indexer(store)
+        bridge = MemoryPersonaBridge(store)
+        assert bridge.memory_indexer is indexer
+        assert get_memory_indexer() is indexer
+        assert len(store.listeners) == 1
+
+        # A closed indexer leaves the registry
+        indexer.close()
+        assert not store.listeners
+        reopened = get_memory_indexer(store)
+        assert reopened is not indexer
+        reopened.close()
+        store.close()
+
+
+def test_field_postings():
+    """Test that input, response and semantic values are indexed per field and ranked with boosts"""
+    print("\n=== Testing Field Postings ===")
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        input_id = store.store_episodic_memory({"input": "coffee coffee with friends", "response": "sounds nice"})
+        response_id = store.store_episodic_memory({"input": "what should I drink", "response": "maybe coffee"})
+        store.store_semantic_memory('preferences', 'drinks', 'coffee')
+
+        assert indexer.index_data['field_index']['input']['coffee'] == {input_id: 2}
+        assert indexer.index_data['field_index']['response']['coffee'] == {response_id: 1}
+        assert indexer.index_data['keyword_index']['coffee'].count(input_id) == 1
+
+        results = [memory['id'] for memory in indexer.search_memories('coffee')]
+        print(f"Default ranking: {results}")
+        # The short, confident semantic memory wins; input matches outweigh response matches
+        assert results == ['preferences:drinks', input_id, response_id]
+
+        results = [memory['id'] for memory in indexer.search_memories('coffee', field_boosts={'response': 5, 'value': 0})]
+        assert results == [response_id, input_id, 'preferences:drinks']
+
+        # Both keywords must appear, in any field
+        assert [memory['id'] for memory in indexer.search_memories('drink coffee')] == [response_id]
+        indexer.close()
+        store.close()
+
+
+def test_binary_index_file():
+    """Test that the index survives a restart through the mapped binary file and the JSON export"""
+    print("\n=== Testing Binary Index File ===")
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+        tea_id = store.store_episodic_memory({"input": "green tea tea", "response": "nice", "emotion": "happy"})
+        store.store_episodic_memory({"input": "black coffee", "response": "strong", "emotion": "sad"})
+        indexer.close()
+        size = os.path.getsize('data/memory_index.bin')
+        print(f"Binary index: {size} bytes")
+
+        indexer = MemoryIndexer(store)
+        assert isinstance(indexer.index_data['keyword_index'], MappedPostings)
+        assert indexer.sync_index() == 0
+        assert indexer.index_data['field_index']['input']['tea'] == {tea_id: 2}
+        assert [memory['id'] for memory in indexer.search_memories('tea', {'emotion': 'happy'})] == [tea_id]
+
+        # Changes on top of the mapped file are kept and saved
+        milk_id = store.store_episodic_memory({"input": "tea with milk", "response": "ok", "emotion": "happy"})
+        assert set(indexer.index_data['keyword_index']['tea']) == {tea_id, milk_id}
+
+        # Saving unmaps the loaded file before replacing it, as Windows requires, and maps the saved one
+        loaded = indexer.index_data['keyword_index']
+        indexer.save_index_data()
+        assert loaded.table.buffer.closed
+        assert indexer.index_data['keyword_index'] is not loaded
+        assert set(indexer.index_data['keyword_index']['tea']) == {tea_id, milk_id}
+        assert [memory['id'] for memory in indexer.search_memories('milk')] == [milk_id]
+        indexer.export_index_json('data/export.json')
+        indexer.close()
+
+        os.remove('data/memory_index.bin')
+        os.rename('data/export.json', 'data/memory_index.json')
+        indexer = MemoryIndexer(store)
+        assert indexer.sync_index() == 0  # Imported from the legacy JSON file
+        assert set(indexer.index_data['keyword_index']['tea']) == {tea_id, milk_id}
+        indexer.close()
+        assert os.path.exists('data/memory_index.bin')
+        store.close()
+
+
+def test_sorted_postings():
+    """Test that postings stay sorted and deduplicated and are intersected correctly"""
+    print("\n=== Testing Sorted Postings ===")
+
+    assert intersect_postings([['a', 'c', 'e', 'g'], ['c', 'g'], ['b', 'c', 'd', 'g', 'h']]) == ['c', 'g']
+    assert intersect_postings([['a', 'b'], []]) == []
+    assert intersect_postings([]) == []
+    # Lists much longer than the candidates are searched by galloping
+    common = [f"{i:05d}" for i in range(1000)]
+    rare = ['00003', '00500', '00999', '01500']
+    assert intersect_postings([common, rare, common[::3]]) == ['00003', '00999']
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        ids = [store.store_episodic_memory({"input": f"tea number {i}", "response": "ok",
+                                            "emotion": "happy" if i % 2 else "sad"})
+               for i in range(6)]
+        for memory_id in ids:
+            indexer.index_memory(store.get_memory_by_id(memory_id))  # Re-indexing must not duplicate
+
+        for index_name in LIST_INDEXES:
+            for posting in indexer.index_data[index_name].values():
+                assert posting == sorted(set(posting))
+        assert indexer.index_data['keyword_index']['tea'] == sorted(ids)
+
+        happy_ids = [memory['id'] for memory in indexer.search_memories('tea', {'emotion': 'happy'})]
+        assert sorted(happy_ids) == sorted(ids[1::2])
+        # A missing keyword matches nothing, wherever it appears in the query
+        assert indexer.search_memories('coffee tea') == []
+        assert indexer.search_memories('tea coffee') == []
+        indexer.close()
+        store.close()
+
+
+def test_weighted_cross_references():
+    """Test that cross-references are built incrementally, weighted and ranked by weight"""
+    print("\n=== Testing Weighted Cross-References ===")
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        walk_id = store.store_episodic_memory({"input": "morning walk park dog", "response": "lovely",
+                                               "emotion": "happy"})
+        park_id = store.store_episodic_memory({"input": "dog park walk again", "response": "fun",
+                                               "emotion": "happy"})
+        exam_id = store.store_episodic_memory({"input": "exam tomorrow", "response": "good luck",
+                                               "emotion": "anxious"})
+
+        cross_references = indexer.index_data['cross_references']
+        # Same emotion, three shared keywords and within an hour
+        assert cross_references[walk_id][park_id] == cross_references[park_id][walk_id] == 5
+        # Only within an hour
+        assert cross_references[exam_id] == {walk_id: 1, park_id: 1}
+
+        related = indexer.get_related_memories(exam_id)
+        assert {memory['id'] for memory in related} == {walk_id, park_id}
+        assert [memory['id'] for memory in indexer.get_related_memories(walk_id)] == [park_id, exam_id]
+        assert [memory['id'] for memory in indexer.get_related_memories(walk_id, limit=1)] == [park_id]
+
+        # A rebuild finds the same cross-references as the incremental updates
+        incremental = {memory_id: dict(related) for memory_id, related in cross_references.items()}
+        indexer.rebuild_index()
+        assert indexer.index_data['cross_references'] == incremental
+        indexer.close()
+
+        # After a restart the timelines are restored from the index file
+        indexer = MemoryIndexer(store)
+        assert indexer.sync_index() == 0
+        dog_id = store.store_episodic_memory({"input": "dog walk", "response": "ok", "emotion": "happy"})
+        assert indexer.index_data['cross_references'][dog_id][walk_id] == 4
+
+        indexer.remove_memory(walk_id)
+        assert walk_id not in indexer.index_data['cross_references']
+        assert walk_id not in indexer.index_data['cross_references'][park_id]
+        indexer.close()
+        store.close()
+
+
+def test_ranked_top_k():
+    """Test that searches rank by relevance, recency and importance and only load the winners"""
+    print("\n=== Testing Ranked Top-k Search ===")
+
+    with temporary_workdir():
+        store, (old_id, recent_id, sad_id, _) = _create_store_with([
+            ("piano lesson", "happy", 0.9, 400),
+            ("piano lesson", "happy", 0.6, 1),
+            ("piano lesson", "sad", 0.9, 1),
+            ("guitar lesson", "happy", 0.7, 0),
+        ])
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        # The important old memory has decayed below the less important recent one
+        assert [memory['id'] for memory in indexer.search_memories('piano')] == [sad_id, recent_id, old_id]
+
+        loaded = []
+        get_memory_by_id = store.get_memory_by_id
+        store.get_memory_by_id = lambda memory_id: loaded.append(memory_id) or get_memory_by_id(memory_id)
+        results = indexer.search_memories('lesson', limit=2)
+        print(f"Memories loaded for 2 of 4 matches: {len(loaded)}")
+        assert len(results) == 2 and loaded == [memory['id'] for memory in results]
+        assert indexer.search_memories('lesson', limit=0) == []
+        del store.get_memory_by_id
+
+        indexer.close()
+        store.close()
+
+
+def test_time_ranges():
+    """Test [from, to) ranges, last N days and cursor pagination over the time index"""
+    print("\n=== Testing Time Ranges ===")
+
+    with temporary_workdir():
+        # ids[n] is n days old
+        store, ids = _create_store_with([(f"walk day {days}", "happy" if days % 2 else "sad", 0.5, days)
+                                         for days in range(10)])
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        results = indexer.search_memories('walk', {'last_days': 3.5}, limit=10)
+        assert {memory['id'] for memory in results} == set(ids[:4])
+
+        time_from = store.get_memory_by_id(ids[8])['timestamp']
+        time_to = store.get_memory_by_id(ids[4])['timestamp']
+        results = indexer.search_memories('', {'time_from': time_from, 'time_to': time_to, 'emotion': 'sad'})
+        assert {memory['id'] for memory in results} == {ids[6], ids[8]}  # ids[4] is at the exclusive end
+
+        # Page through all memories two at a time, newest first
+        pages = []
+        cursor = None
+        while True:
+            page = indexer.browse_memories(limit=2, cursor=cursor)
+            pages.append([memory['id'] for memory in page['memories']])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+            if len(pages) == 2:
+                # Memories stored between pages do not shift the next page
+                store.store_episodic_memory({"input": "walk today", "response": "ok"})
+        print(f"Pages: {len(pages)}")
+        assert [memory_id for page in pages for memory_id in page] == ids
+        assert indexer.browse_memories('walk', {'emotion': 'happy'}, limit=10)['memories'][0]['id'] == ids[1]
+
+        # A filtered page only carries a cursor when another match follows it
+        sad = indexer.browse_memories('walk', {'emotion': 'sad'}, limit=5)
+        assert [memory['id'] for memory in sad['memories']] == ids[::2]
+        assert sad['next_cursor'] is None  # ids[9] is older but happy
+        page = indexer.browse_memories('walk', {'emotion': 'sad'}, limit=2)
+        page = indexer.browse_memories('walk', {'emotion': 'sad'}, limit=2, cursor=page['next_cursor'])
+        assert [memory['id'] for memory in page['memories']] == [ids[4], ids[6]]
+        page = indexer.browse_memories('walk', {'emotion': 'sad'}, limit=2, cursor=page['next_cursor'])
+        assert [memory['id'] for memory in page['memories']] == [ids[8]] and page['next_cursor'] is None
+
+        month = datetime.fromisoformat(time_from) - timedelta(days=1)
+        in_month = [memory['id'] for memory in indexer.get_memories_by_time_period(month.year, month.month, limit=20)]
+        assert ids[9] in in_month
+
+        # The time index is rebuilt from the index file after a restart
+        indexer.close()
+        indexer = MemoryIndexer(store)
+        assert indexer.sync_index() == 0
+        results = indexer.browse_memories(filters={'time_to': time_to, 'time_from': time_from})['memories']
+        assert [memory['id'] for memory in results] == [ids[5], ids[6], ids[7], ids[8]]
+        indexer.close()
+        store.close()
+
+
+class _ActivationRecorder:
+    """Collects module activations the way SystemMetrics receives them"""
+
+    def __init__(self):
+        self.activations = []
+
+    def record_module_activation(self, module_name, execution_time=None):
+        self.activations.append(module_name)
+
+
+def test_search_cache():
+    """Test that searches are cached per normalized request and dropped when the index changes"""
+    print("\n=== Testing Search Cache ===")
+
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)  # Evicts 'b', the least recently used
+    assert cache.get('b') is None and cache.get('c') == 3
+    expired = TTLCache(ttl=0)
+    expired.put('a', 1)
+    assert expired.get('a') is None
+
+    with temporary_workdir():
+        store = _create_store()
+        recorder = _ActivationRecorder()
+        indexer = MemoryIndexer(store, metrics=recorder)
+        indexer.sync_index()
+
+        tea_id = store.store_episodic_memory({"input": "green tea and coffee", "response": "ok"})
+        assert [memory['id'] for memory in indexer.search_memories('tea coffee')] == [tea_id]
+        assert [memory['id'] for memory in indexer.search_memories('coffee tea tea')] == [tea_id]
+        assert recorder.activations == ['memory_search_cache_miss', 'memory_search_cache_hit']
+
+        # Re-indexing an unchanged memory keeps the cache
+        revision = indexer.revision
+        indexer.index_memory(store.get_memory_by_id(tea_id))
+        assert indexer.revision == revision
+        indexer.search_memories('tea coffee')
+        assert recorder.activations[-1] == 'memory_search_cache_hit'
+
+        # Retrievals raise the importance, which is stored without dropping the cache
+        importance = indexer.index_data['memory_stats'][tea_id][1]
+        store.retrieve_episodic_memories({"text": "green tea"})
+        store.flush_retrieval_stats()
+        assert indexer.index_data['memory_stats'][tea_id][1] > importance
+        assert indexer.revision == revision
+        indexer.search_memories('tea coffee')
+        assert recorder.activations[-1] == 'memory_search_cache_hit'
+
+        # A new memory invalidates it
+        milk_id = store.store_episodic_memory({"input": "tea coffee milk", "response": "ok"})
+        results = [memory['id'] for memory in indexer.search_memories('tea coffee')]
+        assert recorder.activations[-1] == 'memory_search_cache_miss'
+        assert set(results) == {tea_id, milk_id}
+
+        indexer.get_related_memories(tea_id)
+        indexer.get_related_memories(tea_id)
+        assert recorder.activations[-2:] == ['memory_search_cache_miss', 'memory_search_cache_hit']
+
+        stats = indexer.get_index_stats()['search_cache']
+        print(f"Search cache: {stats}")
+        assert stats['hits'] == 4 and stats['misses'] == 3
+        indexer.close()
+        store.close()
+
+
+def test_arabic_analyzer():
+    """Test that Arabic spelling variants, diacritics and clitics map to one index term"""
+    print("\n=== Testing Arabic Analyzer ===")
+
+    assert analyze('المدرسة') == analyze('مدرسة') == analyze('والمدرسه') == ['مدرس']
+    assert analyze('الأصدقاء') == analyze('اصدقاء') == analyze('بالأَصدِقاء')
+    assert analyze('ذهبت إلى المدرسة مع الأصدقاء') == ['ذهبت', 'مدرس', 'اصدقاء']
+    assert analyze('I went to the park') == ['went', 'park']
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store)
+        indexer.sync_index()
+
+        school_id = store.store_episodic_memory({"input": "ذهبتُ إلى المدرسةِ مع الأصدقاء", "response": "جميل"})
+        print(f"Index terms: {sorted(indexer.index_data['keyword_index'])}")
+        assert [memory['id'] for memory in indexer.search_memories('مدرسة')] == [school_id]
+        assert [memory['id'] for memory in indexer.search_memories('أصدقاء المدرسه')] == [school_id]
+        indexer.close()
+        store.close()
+
+
+def test_vector_index():
+    """Test similarity search over hashed n-gram vectors, exact and partitioned"""
+    print("\n=== Testing Vector Index ===")
+
+    # NumPy is in requirements.txt, so a missing install is a broken environment, not a skip
+    assert NUMPY_AVAILABLE, "NumPy is not installed; run pip install -r requirements.txt"
+
+    index = VectorIndex(dimensions=64, ivf_threshold=50, probes=3)
+    for i in range(60):
+        index.add(f"filler-{i}", f"note number {i} about nothing in particular {i * 7}")
+    index.add('garden', 'watering the tomatoes in the garden')
+    index.add('gardening', 'gardens and tomato plants need water')
+    index.add('exam', 'studying for the chemistry exam')
+
+    query = text_vector('tomato garden', 64)
+    assert index.centroids is None
+    results = [memory_id for memory_id, _ in index.search(query, limit=2)]
+    assert index.centroids is not None  # Partitioned once the threshold was reached
+    assert set(results) == {'garden', 'gardening'}
+
+    index.remove('garden')
+    assert 'garden' not in [memory_id for memory_id, _ in index.search(query, limit=3)]
+    index.add('garden2', 'tomatoes in my garden')  # Reuses the freed row
+    assert len(index) == 63 and index.next_row == 63
+
+    with temporary_workdir():
+        store = _create_store()
+        indexer = MemoryIndexer(store, use_vectors=True)
+        indexer.sync_index()
+        garden_id = store.store_episodic_memory({"input": "watering the tomatoes in the garden", "response": "ok"})
+        plants_id = store.store_episodic_memory({"input": "my tomato plants need water", "response": "ok"})
+        store.store_episodic_memory({"input": "studying for the chemistry exam", "response": "good luck"})
+
+        # No memory contains both keywords, but similar wordings are found
+        assert indexer.search_memories('tomato gardens') == []
+        similar = indexer.search_similar('tomato gardens', limit=2)
+        assert {memory['id'] for memory in similar} == {garden_id, plants_id}
+        assert [memory['id'] for memory in indexer.get_similar_memories(garden_id, limit=1)] == [plants_id]
+
+        # Building the vector index while memories are inserted takes the locks in the same order
+        indexer.vector_index = None
+        writer = threading.Thread(target=lambda: [
+            store.store_episodic_memory({"input": f"watering note {i}", "response": "ok"}) for i in range(50)])
+        writer.start()
+        indexer.search_similar('chemistry exam', limit=1)
+        writer.join(timeout=10)
+        assert not writer.is_alive()
+        indexer.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    test_incremental_index_updates()
+    test_sync_after_unclean_exit()
+    test_shared_indexer()
+    test_field_postings()
+    test_binary_index_file()
+    test_sorted_postings()
+    test_weighted_cross_references()
+    test_ranked_top_k()
+    test_time_ranges()
+    test_search_cache()
+    test_arabic_analyzer()
+    test_vector_index()
+    print("\n=== All indexer tests completed successfully ===")
@@ -0,0 +1,606 @@
+"""
+Test script for the MemoryStore storage backends.
+This script checks that memories survive a restart with both the JSON and the
+append-only log backends.
+
+Usage:
+    python test_memory_storage.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add the current directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory_scheduler import ReadWriteLock, consolidation_scheduler, flush_scheduler
+from memory_shards import MemoryShardManager, user_memory
+from memory_store import MemoryStore, create_memory_store, get_memory_store, get_memory_store_stats
+
+
+def _create_store(directory, backend, **config):
+    """Create a memory store writing into a temporary directory"""
+    store_config = {
+        'storage_path': os.path.join(directory, 'memory_store.json'),
+        'storage_backend': backend
+    }
+    store_config.update(config)
+    return MemoryStore(store_config)
+
+
+def test_log_backend_replay():
+    """Test that logged mutations are replayed when the store is reopened"""
+    print("\n=== Testing Append Log Replay ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'log')
+        store.store_episodic_memory({"input": "my name is sara", "response": "Hello Sara", "emotion": "happy"})
+        store.store_episodic_memory({"input": "I feel tired", "response": "Rest well", "emotion": "sad"})
+        store.retrieve_episodic_memories({"emotion": "sad"})
+        store.close()
+
+        assert os.path.exists(os.path.join(directory, 'memory_store.json.log'))
+
+        reopened = _create_store(directory, 'log')
+        memories = reopened.retrieve_episodic_memories({"limit": 10})
+        print(f"Recovered {len(memories)} memories")
+
+        assert len(memories) == 2
+        assert reopened.retrieve_semantic_memory('personal_info', 'name')['value'] == 'sara'
+        sad_memory = [m for m in memories if m['emotion'] == 'sad'][0]
+        assert sad_memory['retrieval_count'] >= 1
+        reopened.close()
+
+
+def test_log_backend_compaction():
+    """Test that the log is folded into the snapshot once it grows too large"""
+    print("\n=== Testing Append Log Compaction ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'log', log_compact_threshold=5, max_episodic_memories=3)
+        for i in range(10):
+            store.store_episodic_memory({"input": f"message {i}", "response": "ok"})
+        store.close()
+
+        log_path = os.path.join(directory, 'memory_store.json.log')
+        with open(log_path, 'r', encoding='utf-8') as f:
+            log_lines = [line for line in f if line.strip()]
+        print(f"Log records after compaction: {len(log_lines)}")
+        assert len(log_lines) < 5
+
+        reopened = _create_store(directory, 'log')
+        assert len(reopened.episodic_memories) == 3
+        reopened.close()
+
+
+def test_log_backend_torn_record():
+    """Test that records appended after a torn final write survive the next restart"""
+    print("\n=== Testing Append Log Torn Record ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, 'memory_store.json.log')
+        store = _create_store(directory, 'log')
+        store.store_episodic_memory({"input": "first", "response": "ok"})
+        store.store_episodic_memory({"input": "second", "response": "ok"})
+        store.close()
+
+        # A crash in the middle of a write leaves a partial line without a newline
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write('{"op":"episodic_insert","memory":{"input":"tor')
+
+        store = _create_store(directory, 'log')
+        assert len(store.episodic_memories) == 2
+        store.store_episodic_memory({"input": "third", "response": "ok"})
+        store.store_episodic_memory({"input": "fourth", "response": "ok"})
+        store.close()
+
+        reopened = _create_store(directory, 'log')
+        inputs = [memory['input'] for memory in reopened.episodic_memories]
+        print(f"Memories after restart: {inputs}")
+        assert inputs == ["fourth", "third", "second", "first"]
+        reopened.close()
+
+
+def test_log_backend_timed_sync():
+    """Test that a record left unsynced by a small batch is synced by the flush thread"""
+    print("\n=== Testing Append Log Timed Sync ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'log', log_fsync_batch_size=1000, log_fsync_interval=0.05)
+        store.store_episodic_memory({"input": "hello", "response": "hi"})
+        storage = store.storage
+        storage.sync()
+
+        store.store_episodic_memory({"input": "only one write", "response": "ok"})
+        assert storage.unsynced_records > 0
+        time.sleep(0.3)
+        print(f"Unsynced records after the interval: {storage.unsynced_records}")
+        assert storage.unsynced_records == 0
+        assert not flush_scheduler.is_scheduled(storage._timed_sync)
+        store.close()
+
+
+def test_json_backend_roundtrip():
+    """Test that the default JSON backend keeps its behaviour"""
+    print("\n=== Testing JSON Backend ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'json')
+        store.store_episodic_memory({"input": "i live in cairo", "response": "Nice city"})
+        store.close()
+
+        reopened = _create_store(directory, 'json')
+        assert len(reopened.episodic_memories) == 1
+        assert reopened.retrieve_semantic_memory('personal_info', 'location')['value'] == 'cairo'
+        reopened.close()
+
+
+def test_memory_ids():
+    """Test that memories get stable IDs and older timestamp IDs still resolve"""
+    print("\n=== Testing Memory IDs ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_timestamp = '2025-05-01T10:00:00'
+        with open(os.path.join(directory, 'memory_store.json'), 'w', encoding='utf-8') as f:
+            json.dump({'episodic_memories': [
+                {'type': 'episodic', 'input': 'first', 'response': '', 'emotion': 'neutral', 'context': {},
+                 'timestamp': legacy_timestamp, 'importance': 0.5, 'retrieval_count': 0},
+                {'type': 'episodic', 'input': 'second', 'response': '', 'emotion': 'neutral', 'context': {},
+                 'timestamp': legacy_timestamp, 'importance': 0.5, 'retrieval_count': 0}
+            ], 'semantic_memories': {}}, f)
+
+        store = _create_store(directory, 'log')
+        assert store.get_memory_by_id(legacy_timestamp)['input'] == 'first'
+        assert len({memory['id'] for memory in store.get_all_memories()}) == 2
+
+        memory_id = store.store_episodic_memory({"input": "third", "response": "ok"})
+        assert store.get_memory_by_id(memory_id)['input'] == 'third'
+        store.close()
+
+        reopened = _create_store(directory, 'log')
+        assert reopened.get_memory_by_id(memory_id)['input'] == 'third'
+        reopened.close()
+
+
+def test_eviction_order():
+    """Test that the least important, oldest memories are evicted first"""
+    print("\n=== Testing Eviction Order ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'log', max_episodic_memories=3)
+        store.store_episodic_memory({"input": "plain one", "response": "ok"})
+        store.store_episodic_memory({"input": "sad one", "response": "ok", "emotion": "sad"})
+        store.store_episodic_memory({"input": "plain two", "response": "ok"})
+        store.store_episodic_memory({"input": "plain three", "response": "ok"})
+
+        inputs = [memory['input'] for memory in store.retrieve_episodic_memories({"limit": 10})]
+        print(f"Remaining memories: {inputs}")
+        assert inputs == ["plain three", "plain two", "sad one"]
+
+        # Retrieved memories gain importance equally, so the oldest plain memory goes next
+        store.store_episodic_memory({"input": "sad two", "response": "ok", "emotion": "sad"})
+        inputs = [memory['input'] for memory in store.episodic_memories]
+        assert inputs == ["sad two", "plain three", "sad one"]
+        store.close()
+
+
+def test_retrieval_stats_batching():
+    """Test that reads buffer retrieval counts instead of writing to storage"""
+    print("\n=== Testing Retrieval Stats Batching ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, 'memory_store.json.log')
+        store = _create_store(directory, 'log', retrieval_flush_interval=3600)
+        memory_id = store.store_episodic_memory({"input": "hello", "response": "hi"})
+        log_size = os.path.getsize(log_path)
+
+        store.retrieve_episodic_memories({"limit": 5})
+        store.retrieve_episodic_memories({"text": "hello"})
+        assert os.path.getsize(log_path) == log_size
+        assert store.get_memory_by_id(memory_id)['retrieval_count'] == 0
+
+        store.flush_retrieval_stats()
+        assert os.path.getsize(log_path) > log_size
+        assert store.get_memory_by_id(memory_id)['retrieval_count'] == 2
+        store.close()
+
+        sync_store = _create_store(directory, 'log', retrieval_stats_durability='sync')
+        sync_store.retrieve_episodic_memories({"limit": 5})
+        assert sync_store.get_memory_by_id(memory_id)['retrieval_count'] == 3
+        sync_store.close()
+
+
+def test_text_search():
+    """Test indexed text search with Arabic normalization and the substring fallback"""
+    print("\n=== Testing Indexed Text Search ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _create_store(directory, 'log', max_episodic_memories=3)
+        store.store_episodic_memory({"input": "أنا سعيدة اليوم", "response": "رائع"})
+        store.store_episodic_memory({"input": "the exam went well, exam passed", "response": "Great"})
+        store.store_episodic_memory({"input": "tomorrow is my exam", "response": "Good luck"})
+
+        results = store.retrieve_episodic_memories({"text": "انا سعيده"})
+        assert [memory['input'] for memory in results] == ["أنا سعيدة اليوم"]
+
+        results = store.retrieve_episodic_memories({"text": "EXAM"})
+        print(f"BM25 order: {[memory['input'] for memory in results]}")
+        assert results[0]['input'] == "the exam went well, exam passed"
+        assert store.retrieve_episodic_memories({"text": "exa"}) == []
+        assert len(store.retrieve_episodic_memories({"text": "exa", "match": "substring"})) == 2
+
+        # Evicted memories leave the index
+        store.store_episodic_memory({"input": "a sad exam day", "response": "sorry", "emotion": "sad"})
+        assert len(store.text_index) == 3
+        store.close()
+
+
+def test_semantic_extraction():
+    """Test single-pass semantic extraction with default and custom rules"""
+    print("\n=== Testing Semantic Extraction ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        rules_path = os.path.join(directory, 'semantic_rules.json')
+        with open(rules_path, 'w', encoding='utf-8') as f:
+            json.dump([{'category': 'personal_info', 'key': 'job',
+                        'patterns': [r'i work as an?\s+(\w+)']}], f)
+
+        store = _create_store(directory, 'log', semantic_rules_path=rules_path)
+        store.store_episodic_memory({"input": "My name is Sara and I live in Cairo, I work as a nurse",
+                                     "response": "Nice to meet you"})
+        store.store_episodic_memory({"input": "لا أحب القهوة", "response": "حسناً"})
+
+        facts = store.semantic_memories
+        print(f"Extracted: {facts}")
+        assert facts['personal_info']['name']['value'] == 'sara'
+        assert facts['personal_info']['location']['value'] == 'cairo, i work as a nurse'
+        assert facts['personal_info']['job']['value'] == 'nurse'
+        assert facts['preferences']['dislikes']['value'] == 'القهوة'
+        store.close()
+
+        # Extracted facts are persisted with the episodic memory
+        reopened = _create_store(directory, 'log', semantic_rules_path=rules_path)
+        assert reopened.retrieve_semantic_memory('personal_info', 'job')['value'] == 'nurse'
+        reopened.close()
+
+
+def test_consolidation_scheduler():
+    """Test that stores sharing a path share one consolidation thread and slices see every memory"""
+    print("\n=== Testing Consolidation Scheduler ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.abspath(os.path.join(directory, 'memory_store.json'))
+        loops_before = consolidation_scheduler.loop_count()
+
+        first = _create_store(directory, 'log', consolidation_slice_size=2)
+        second = _create_store(directory, 'log')
+        assert consolidation_scheduler.loop_count() == loops_before + 1
+        assert len(consolidation_scheduler.loops[path].stores) == 2
+
+        for i in range(5):
+            first.store_episodic_memory({"input": f"memory {i}", "response": "ok"})
+        for memory in first.episodic_by_id.values():
+            memory['retrieval_count'] = 3
+
+        first.consolidate_memories()
+        assert all(abs(memory['importance'] - 0.9) < 1e-9 for memory in first.episodic_by_id.values())
+
+        first.close()
+        second.close()
+        assert consolidation_scheduler.loop_count() == loops_before
+        assert path not in consolidation_scheduler.loops
+
+        # Consolidation results are replayed from the log
+        reopened = _create_store(directory, 'log')
+        assert reopened.last_consolidation == first.last_consolidation
+        assert all(abs(memory['importance'] - 0.9) < 1e-9 for memory in reopened.episodic_by_id.values())
+        reopened.close()
+
+
+def test_read_write_lock():
+    """Test that readers share the lock while writers are exclusive"""
+    print("\n=== Testing Read/Write Lock ===")
+
+    lock = ReadWriteLock()
+    events = []
+
+    with lock.read():
+        with lock.read():
+            pass  # Reads nest
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append('write'), lock.release_write()))
+        writer.start()
+        writer.join(timeout=0.2)
+        assert events == []  # Writer waits for the reader
+
+    writer.join(timeout=2)
+    assert events == ['write']
+
+    with lock:
+        with lock.read():  # Writers may read
+            with lock:
+                pass
+    assert lock.writer is None and lock.readers == 0
+
+
+def test_shared_store_registry():
+    """Test that modules asking for the same storage path share one store"""
+    print("\n=== Testing Shared Memory Store Registry ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memory_store.json')
+        store = get_memory_store({'storage_path': path, 'storage_backend': 'log'})
+        assert get_memory_store({'storage_path': os.path.join(directory, '.', 'memory_store.json')}) is store
+        assert get_memory_store() is get_memory_store()
+
+        store.store_episodic_memory({"input": "shared memory", "response": "ok"})
+        stats = get_memory_store_stats()
+        print(f"Live stores: {stats['live_instances']}, shared: {stats['shared_instances']}")
+        entry = next(entry for entry in stats['stores'] if entry['storage_path'] == os.path.abspath(path))
+        assert entry['shared'] and entry['episodic_memories'] == 1 and entry['bytes'] > 0
+
+        # A closed store leaves the registry, so the next request loads a fresh one
+        store.close()
+        reopened = get_memory_store({'storage_path': path, 'storage_backend': 'log'})
+        assert reopened is not store
+        assert len(reopened.episodic_by_id) == 1
+        reopened.close()
+
+
+def test_memory_shards():
+    """Test per-user shards with lazy loading and LRU eviction"""
+    print("\n=== Testing Per-User Memory Shards ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        shards = MemoryShardManager({'storage_backend': 'log'}, shard_dir=directory, max_open_shards=2)
+        shards.get_store('alice').store_episodic_memory({"input": "my name is alice", "response": "hi"})
+        shards.get_store('bob').store_episodic_memory({"input": "my name is bob", "response": "hi"})
+        assert shards.get_store('alice').get_user_summary()['personal_info']['name'] == 'alice'
+        assert len(shards.get_store('bob').retrieve_episodic_memories({"limit": 10})) == 1
+
+        # Opening a third shard closes the least recently used one (alice)
+        carol = shards.get_store('carol@example.com')
+        assert list(shards.shards) == ['bob', 'carol@example.com']
+        assert os.path.basename(shards.shard_path('carol@example.com')) != 'carol@example.com.json'
+        print(f"Shard stats: {shards.get_stats()}")
+
+        # Evicted shards are flushed and reload on the next access
+        assert shards.get_store('alice').get_user_summary()['personal_info']['name'] == 'alice'
+        assert carol is shards.get_store('carol@example.com')
+
+        # A tiny budget keeps only the most recently used shard open
+        shards.memory_budget = 1
+        shards.get_store('bob')
+        assert list(shards.shards) == ['bob']
+
+        # A leased shard stays open until the request releases it
+        with shards.lease('alice') as alice:
+            shards.get_store('bob')
+            assert list(shards.shards) == ['alice', 'bob']
+            alice.store_episodic_memory({"input": "written while leased", "response": "ok"})
+        assert list(shards.shards) == ['bob']
+        reopened = shards.get_store('alice')
+        assert reopened is not alice
+        assert len(reopened.retrieve_episodic_memories({"text": "leased", "limit": 10})) == 1
+        assert shards.get_stats()['leased_shards'] == 0
+        shards.close()
+
+
+def test_shard_indexes_and_threads():
+    """Test that every shard has its own index and that open shards share the background threads"""
+    print("\n=== Testing Shard Indexes and Threads ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        shared = _create_store(os.path.join(directory, 'shared'), 'log')
+        shards = MemoryShardManager({'storage_backend': 'log', 'retrieval_flush_interval': 0.05,
+                                     'log_fsync_batch_size': 1000, 'log_fsync_interval': 0.05},
+                                    shard_dir=os.path.join(directory, 'shards'), max_open_shards=2)
+        loops_before = consolidation_scheduler.loop_count()
+        threads_before = {thread.name for thread in threading.enumerate()}
+
+        # Memories stored in a shard are found through that shard's indexer only
+        with user_memory(shards, 'alice', shared) as (store, indexer):
+            store.store_episodic_memory({"input": "alice likes green tea", "response": "noted"})
+            assert shards.get_stats()['leased_shards'] == 1
+            assert [memory['input'] for memory in indexer.search_memories('tea')] == ["alice likes green tea"]
+        assert shards.get_stats()['leased_shards'] == 0
+        for user_id in ('bob', 'carol'):
+            shards.get_store(user_id).store_episodic_memory({"input": f"{user_id} likes coffee", "response": "ok"})
+            shards.get_store(user_id).retrieve_episodic_memories({"text": "coffee"})
+        assert shards.get_indexer('bob').search_memories('tea') == []
+        assert len(shards.get_indexer('bob').search_memories('coffee')) == 1
+
+        # Without partitioning or a user, the shared store is used
+        with user_memory(None, 'alice', shared) as (store, _):
+            assert store is shared
+        with user_memory(shards, None, shared) as (store, _):
+            assert store is shared
+
+        # One consolidation loop and the process-wide flush thread serve every shard
+        time.sleep(0.2)
+        assert consolidation_scheduler.loop_count() == loops_before + 1
+        new_threads = {thread.name for thread in threading.enumerate()} - threads_before
+        print(f"Threads started for the shards: {sorted(new_threads)}")
+        assert new_threads <= {'memory-flush', f"memory-consolidation:shards:{os.path.abspath(shards.shard_dir)}"}
+        assert shards.get_store('carol').storage.unsynced_records == 0
+
+        # An evicted shard saves its index, which is reloaded with the shard
+        assert 'alice' not in shards.shards and os.path.exists(shards.index_path('alice'))
+        assert len(shards.get_indexer('alice').search_memories('green')) == 1
+        shards.close()
+        assert consolidation_scheduler.loop_count() == loops_before
+        shared.close()
+
+
+def test_shard_migration():
+    """Test copying the shared store into a user's shard"""
+    print("\n=== Testing Shared Store Migration ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        shared = create_memory_store({'storage_path': os.path.join(directory, 'shared.json'),
+                                      'storage_backend': 'log'})
+        for i in range(3):
+            shared.store_episodic_memory({"input": f"shared memory {i}", "response": "ok"})
+        shared.store_semantic_memory('personal_info', 'name', 'dana')
+
+        shards = MemoryShardManager({'storage_backend': 'log'}, shard_dir=os.path.join(directory, 'shards'))
+        shards.get_store('dana').store_episodic_memory({"input": "already in the shard", "response": "ok"})
+        assert shards.migrate_shared_memories(shared, 'dana') == 4
+        # Running it again does not duplicate memories
+        assert shards.migrate_shared_memories(shared, 'dana') == 4
+        shards.close()
+
+        shards = MemoryShardManager({'storage_backend': 'log'}, shard_dir=os.path.join(directory, 'shards'))
+        store = shards.get_store('dana')
+        memories = store.retrieve_episodic_memories({"limit": 10})
+        print(f"Migrated memories: {[memory['input'] for memory in memories]}")
+        assert memories[0]['input'] == "already in the shard"
+        assert store.get_user_summary()['personal_info']['name'] == 'dana'
+        assert len(shared.retrieve_episodic_memories({"limit": 10})) == 3
+        shards.close()
+        shared.close()
+
+
+def test_sqlite_store():
+    """Test the SQLite-backed store through the MemoryStore API"""
+    print("\n=== Testing SQLite Memory Store ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = {
+            'storage_backend': 'sqlite',
+            'storage_path': os.path.join(directory, 'memory_store.db'),
+            'max_episodic_memories': 3
+        }
+        store = create_memory_store(config)
+        ids = [store.store_episodic_memory({"input": f"i like tea {i}", "response": "ok", "emotion": "happy"})
+               for i in range(5)]
+        store.store_episodic_memory({"input": "I am scared", "response": "I am here", "emotion": "anxious"})
+
+        memories = store.retrieve_episodic_memories({"limit": 10})
+        print(f"Stored {len(memories)} memories")
+        assert len(memories) == 3
+        assert store.get_memory_by_id(memories[0]['id'])['input'] == memories[0]['input']
+        assert store.retrieve_episodic_memories({"emotion": "anxious"})[0]['input'] == "I am scared"
+        assert store.retrieve_semantic_memory('preferences', 'likes')['value'] == 'tea 4'
+        assert store.get_memory_by_id('preferences:likes')['type'] == 'semantic'
+        assert store.get_memory_by_id(ids[0]) is None
+
+        store.consolidate_memories()
+        assert len(store.get_all_memories()) == 4
+        assert store.get_user_summary()['preferences']['likes'] == ['tea 4']
+        store.close()
+
+        reopened = create_memory_store(config)
+        assert len(reopened.retrieve_episodic_memories({"limit": 10})) == 3
+        reopened.close()
+
+
+def test_sqlite_text_search():
+    """Test full-text search in the SQLite store, matching the in-memory store"""
+    print("\n=== Testing SQLite Text Search ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = {
+            'storage_backend': 'sqlite',
+            'storage_path': os.path.join(directory, 'memory_store.db'),
+            'max_episodic_memories': 3
+        }
+        store = create_memory_store(config)
+        store.store_episodic_memory({"input": "أنا سعيدة اليوم", "response": "رائع"})
+        store.store_episodic_memory({"input": "the exam went well, exam passed", "response": "Great"})
+        store.store_episodic_memory({"input": "tomorrow is my exam", "response": "Good luck"})
+
+        results = store.retrieve_episodic_memories({"text": "انا سعيده"})
+        assert [memory['input'] for memory in results] == ["أنا سعيدة اليوم"]
+
+        results = store.retrieve_episodic_memories({"text": "EXAM"})
+        print(f"BM25 order: {[memory['input'] for memory in results]}")
+        assert results[0]['input'] == "the exam went well, exam passed"
+        assert store.retrieve_episodic_memories({"text": "exam luck"})[0]['input'] == "tomorrow is my exam"
+        assert store.retrieve_episodic_memories({"text": "exa"}) == []
+        assert len(store.retrieve_episodic_memories({"text": "exa", "match": "substring"})) == 2
+        assert len(store.retrieve_episodic_memories({"text": "exam", "rank": "recency"})) == 2
+
+        # Evicted memories leave the index
+        store.store_episodic_memory({"input": "a sad exam day", "response": "sorry", "emotion": "sad"})
+        assert store.retrieve_episodic_memories({"text": "exam", "emotion": "sad"})[0]['input'] == "a sad exam day"
+        conn = store._connection()
+        assert conn.execute("SELECT COUNT(*) FROM episodic_text").fetchone()[0] == 3
+
+        # Databases created before the full-text index are indexed on open
+        with conn:
+            conn.execute("DELETE FROM episodic_text")
+        store.close()
+        reopened = create_memory_store(config)
+        assert len(reopened.retrieve_episodic_memories({"text": "exam", "limit": 10})) == 3
+        reopened.close()
+
+
+def test_sqlite_store_events():
+    """Test that the SQLite store publishes changes only once they are committed"""
+    print("\n=== Testing SQLite Store Events ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memory_store.db')
+        store = create_memory_store({'storage_backend': 'sqlite', 'storage_path': path})
+        events = []
+
+        def listener(event, memory):
+            # Listeners run after the commit, so other connections already see the change
+            with sqlite3.connect(path) as conn:
+                committed = conn.execute("SELECT 1 FROM episodic_memories WHERE id = ?",
+                                         (memory['id'],)).fetchone() is not None
+            events.append((event, memory['id'], committed))
+
+        store.subscribe(listener)
+        memory_id = store.store_episodic_memory({"input": "hello", "response": "hi"})
+        assert events == [('insert', memory_id, True)]
+
+        # A failed transaction is rolled back without publishing anything
+        events.clear()
+        original = store.extract_semantic_information
+        store.extract_semantic_information = lambda memory: 1 / 0
+        try:
+            store.store_episodic_memory({"input": "rolled back", "response": "ok"})
+            assert False, "expected the insert to fail"
+        except ZeroDivisionError:
+            pass
+        store.extract_semantic_information = original
+        assert events == []
+        assert len(store.retrieve_episodic_memories({"limit": 10})) == 1
+
+        # Consolidation publishes semantic confidence changes
+        store.import_memories({'semantic_memories': {'preferences': {'tea': {
+            'value': 'green', 'timestamp': '2025-05-01T10:00:00', 'confidence': 0.8, 'sources': 2}}}})
+        events.clear()
+        store.consolidate_memories()
+        assert ('update', 'preferences:tea', False) in events
+        assert store.get_memory_by_id('preferences:tea')['confidence'] == 0.9
+        store.close()
+
+
+if __name__ == "__main__":
+    test_log_backend_replay()
+    test_log_backend_compaction()
+    test_log_backend_torn_record()
+    test_log_backend_timed_sync()
+    test_json_backend_roundtrip()
+    test_memory_ids()
+    test_eviction_order()
+    test_retrieval_stats_batching()
+    test_text_search()
+    test_semantic_extraction()
+    test_consolidation_scheduler()
+    test_read_write_lock()
+    test_shared_store_registry()
+    test_memory_shards()
+    test_shard_indexes_and_threads()
+    test_shard_migration()
+    test_sqlite_store()
+    test_sqlite_text_search()
+    test_sqlite_store_events()
+    print("\n=== All storage tests completed successfully ===")
@@ -114,6 +114,26 @@ def test_voice_preferences():
     # Reset preferences
     bridge.update_voice_preferences({"default_gender": "feminine", "emotion_intensity": 0.8})
 
+def test_voice_language():
+    """Test which voice language mixed and Arabizi texts get."""
+    print("\nTesting voice language...\n")
+
+    bridge = MemoryVoiceBridge()
+
+    # Arabizi is spoken with the Arabic voice, mostly Latin text with the English one
+    cases = [
+        ("ana za3lan", "ar"),
+        ("enta 3amel eh? ana mabsoot awi", "ar"),
+        ("I said شكرا to everyone at the party", "en"),
+        ("قلت لهم شكرا على كل شيء ok", "ar"),
+        ("I am very happy today", "en"),
+    ]
+    for text, language in cases:
+        voice_params = bridge.get_voice_parameters(text, detected_emotion="neutral")
+        print(f"Text: {text} -> {voice_params['language']}")
+        assert voice_params["language"] == language, text
+    print("-" * 50)
+
 if __name__ == "__main__":
     # Check if the required environment variables are set
     required_vars = ["GOOGLE_PROJECT_ID", "GOOGLE_LOCATION", "GOOGLE_CREDENTIALS_PATH"]
@@ -128,5 +148,6 @@ if __name__ == "__main__":
     test_voice_parameters()
     test_memory_guided_voice_response()
     test_voice_preferences()
+    test_voice_language()
     
     print("All tests completed.")
\ No newline at end of file
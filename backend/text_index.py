@@ -0,0 +1,261 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Arabic diacritics (tashkeel), superscript alef and tatweel carry no meaning for search
+_ARABIC_NORMALIZATION = {code: None for code in range(0x064B, 0x0653)}
+_ARABIC_NORMALIZATION.update({
+    0x0670: None,  # Superscript alef
+    0x0640: None,  # Tatweel
+    ord('أ'): 'ا',
+    ord('إ'): 'ا',
+    ord('آ'): 'ا',
+    ord('ٱ'): 'ا',
+    ord('ى'): 'ي',
+    ord('ة'): 'ه',
+})
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+_ARABIC_LETTERS = re.compile(r'[\u0621-\u064A]')
+
+# Clitics removed by the light stemmer, longest first. Texts are normalized
+# first, so taa marbuta appears as 'ه' and hamza forms of alef as 'ا'.
+_ARABIC_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+_ARABIC_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+
+# Analyzed terms must keep at least this many characters
+_MIN_TERM_LENGTH = 2
+
+
+def normalize_text(text):
+    """
+    Normalize text for search: case folding plus Arabic orthographic normalization
+
+    Args:
+        text (str): The text to normalize
+
+    Returns:
+        str: Normalized text
+    """
+    return text.casefold().translate(_ARABIC_NORMALIZATION)
+
+
+def tokenize(text):
+    """
+    Split text into normalized Arabic and English search terms
+
+    Args:
+        text (str): The text to tokenize
+
+    Returns:
+        list: Normalized terms
+    """
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def _normalized_words(words):
+    """Normalize a stopword list the same way as indexed text"""
+    return frozenset(normalize_text(word) for word in words)
+
+
+STOPWORDS = _normalized_words([
+    # Arabic
+    'و', 'في', 'من', 'على', 'إلى', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'تلك', 'هو', 'هي', 'أنا', 'أنت',
+    'نحن', 'هم', 'أن', 'إن', 'كان', 'كانت', 'لا', 'لم', 'لن', 'ما', 'ماذا', 'هل', 'قد', 'ثم', 'أو',
+    'بل', 'لكن', 'كل', 'بعد', 'قبل', 'عند', 'حتى', 'إذا', 'التي', 'الذي', 'الذين', 'هناك', 'هنا',
+    'يا', 'به', 'بها', 'له', 'لها', 'فيه', 'فيها', 'منه', 'منها', 'عليه', 'عليها',
+    # English
+    'the', 'and', 'for', 'are', 'was', 'were', 'you', 'your', 'with', 'that', 'this', 'from', 'have',
+    'has', 'had', 'but', 'not', 'all', 'can', 'what', 'about', 'they', 'them', 'she', 'his', 'her',
+    'its', 'our', 'will', 'would', 'there', 'their', 'then', 'than', 'been', 'into', 'just', 'also',
+    'is', 'to', 'of', 'in', 'on', 'at', 'it', 'an', 'as', 'be', 'by', 'do', 'he', 'me', 'my', 'or',
+    'so', 'up', 'us', 'we', 'am', 'if', 'i', 'a',
+])
+
+
+@lru_cache(maxsize=65536)
+def light_stem(term):
+    """
+    Strip common Arabic clitics from a normalized term
+
+    A light stemmer in the style of Light10: an initial conjunction 'و',
+    one definite article or prepositional prefix and common suffixes are
+    removed, as long as at least two letters remain. Terms without Arabic
+    letters are returned unchanged. Results are cached, since natural text
+    repeats a small vocabulary.
+
+    Args:
+        term (str): Normalized term
+
+    Returns:
+        str: The stem
+    """
+    if not _ARABIC_LETTERS.match(term):
+        return term
+
+    if len(term) > 3 and term[0] == 'و':
+        term = term[1:]
+    for prefix in _ARABIC_PREFIXES:
+        if term.startswith(prefix) and len(term) - len(prefix) >= 2:
+            term = term[len(prefix):]
+            break
+    for suffix in _ARABIC_SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 2:
+            term = term[:-len(suffix)]
+    return term
+
+
+def analyze(text):
+    """
+    Turn text into index terms: normalize, tokenize, drop stopwords and stem
+
+    Indexing and querying must use the same analyzer, so that spelling
+    variants, diacritics and clitics of a word all map to one term.
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        list: Index terms, in text order
+    """
+    terms = []
+    for token in tokenize(text):
+        if token in STOPWORDS:
+            continue
+        term = light_stem(token)
+        if len(term) >= _MIN_TERM_LENGTH and term not in STOPWORDS:
+            terms.append(term)
+    return terms
+
+
+class TextIndex:
+    """
+    Inverted full-text index over memory texts
+
+    Maps each normalized term to the set of document IDs containing it and
+    keeps per-document term frequencies, so queries intersect posting sets
+    instead of scanning every document and results can be ranked with BM25.
+    The index is updated incrementally as documents are added and removed.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # Maps terms to sets of document IDs
+        self.doc_terms = {}  # Maps document IDs to Counters of their terms
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, text):
+        """
+        Index a document, replacing any previous version of it
+
+        Args:
+            doc_id (str): Document ID
+            text (str): Document text
+        """
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+
+        terms = tokenize(text)
+        term_counts = Counter(terms)
+        for term in term_counts:
+            self.postings.setdefault(term, set()).add(doc_id)
+
+        self.doc_terms[doc_id] = term_counts
+        self.doc_lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, doc_id):
+        """
+        Remove a document from the index
+
+        Args:
+            doc_id (str): Document ID
+        """
+        term_counts = self.doc_terms.pop(doc_id, None)
+        if term_counts is None:
+            return
+
+        for term in term_counts:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self.postings[term]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def clear(self):
+        """Remove all documents"""
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def search(self, terms):
+        """
+        Find documents containing all of the given terms
+
+        Args:
+            terms (list): Normalized query terms
+
+        Returns:
+            set: IDs of matching documents
+        """
+        if not terms:
+            return set()
+
+        # Intersect starting from the rarest term so the working set stays small
+        postings = sorted((self.postings.get(term, set()) for term in set(terms)), key=len)
+        if not postings[0]:
+            return set()
+
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting
+            if not matches:
+                break
+        return matches
+
+    def bm25(self, terms, doc_id):
+        """
+        Score a document against query terms with BM25
+
+        Args:
+            terms (list): Normalized query terms
+            doc_id (str): Document ID
+
+        Returns:
+            float: BM25 score
+        """
+        term_counts = self.doc_terms.get(doc_id)
+        if not term_counts:
+            return 0.0
+
+        doc_count = len(self.doc_terms)
+        average_length = self.total_length / doc_count if doc_count else 0
+        length_norm = 1 - self.b + self.b * (self.doc_lengths[doc_id] / average_length if average_length else 0)
+
+        score = 0.0
+        for term in set(terms):
+            frequency = term_counts.get(term, 0)
+            if not frequency:
+                continue
+            document_frequency = len(self.postings[term])
+            idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            score += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return score
@@ -0,0 +1,258 @@
+import zlib
+from functools import lru_cache
+
+from text_index import tokenize
+
+# Flag to track if NumPy is available
+NUMPY_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+
+
+@lru_cache(maxsize=65536)
+def _token_features(token, dimensions):
+    """
+    Hash a token and its character trigrams into signed vector buckets
+
+    crc32 is used instead of hash() so vectors do not change between
+    processes.
+
+    Args:
+        token (str): Normalized token
+        dimensions (int): Vector dimensions
+
+    Returns:
+        tuple: (bucket, sign) pairs
+    """
+    padded = f" {token} "
+    grams = [padded[i:i + 3] for i in range(len(padded) - 2)] + [padded]
+    features = []
+    for gram in grams:
+        code = zlib.crc32(gram.encode('utf-8'))
+        features.append((code % dimensions, 1.0 if code & 0x80000000 else -1.0))
+    return tuple(features)
+
+
+def text_vector(text, dimensions=128):
+    """
+    Embed text as a hashed character n-gram vector
+
+    Each token contributes its character trigrams (with word boundaries)
+    and the whole token, so spelling variants and shared word parts end up
+    close together without any trained model.
+
+    Args:
+        text (str): The text to embed
+        dimensions (int): Vector dimensions
+
+    Returns:
+        numpy.ndarray: L2-normalized float32 vector (all zeros for empty text)
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in tokenize(text):
+        for bucket, sign in _token_features(token, dimensions):
+            vector[bucket] += sign
+
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over hashed n-gram vectors
+
+    Vectors are rows of one contiguous float32 matrix, so a query is a single
+    batched dot product (cosine similarity, as the rows are normalized).
+    Removed rows are recycled. Once the index holds ivf_threshold vectors it
+    is split into partitions around k-means centroids (IVF), and queries
+    only scan the partitions whose centroids are closest to the query.
+    """
+
+    def __init__(self, dimensions=128, ivf_threshold=20000, probes=8):
+        """
+        Initialize an empty index
+
+        Args:
+            dimensions (int): Vector dimensions
+            ivf_threshold (int): Size from which queries use IVF partitions
+            probes (int): Number of partitions scanned per query
+
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("The vector index requires NumPy")
+
+        self.dimensions = dimensions
+        self.ivf_threshold = ivf_threshold
+        self.probes = probes
+
+        capacity = 1024
+        self.matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.row_partition = np.full(capacity, -1, dtype=np.int32)
+        self.row_ids = [None] * capacity  # Maps rows to memory IDs
+        self.rows = {}  # Maps memory IDs to rows
+        self.free_rows = []
+        self.next_row = 0
+
+        self.centroids = None
+        self.partitioned_size = 0  # Size when the partitions were last built
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, memory_id):
+        return memory_id in self.rows
+
+    def _allocate_row(self):
+        """Get a free row, growing the matrix when it is full"""
+        if self.free_rows:
+            return self.free_rows.pop()
+
+        if self.next_row == len(self.active):
+            capacity = len(self.active) * 2
+            matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            matrix[:self.next_row] = self.matrix
+            self.matrix = matrix
+            self.active = np.concatenate([self.active, np.zeros(capacity - len(self.active), dtype=bool)])
+            self.row_partition = np.concatenate([self.row_partition,
+                                                 np.full(capacity - len(self.row_partition), -1, dtype=np.int32)])
+            self.row_ids.extend([None] * (capacity - len(self.row_ids)))
+
+        row = self.next_row
+        self.next_row += 1
+        return row
+
+    def add(self, memory_id, text):
+        """
+        Add or replace the vector of a memory
+
+        Args:
+            memory_id (str): The memory ID
+            text (str): Text of the memory
+        """
+        row = self.rows.get(memory_id)
+        if row is None:
+            row = self._allocate_row()
+            self.rows[memory_id] = row
+            self.row_ids[row] = memory_id
+
+        vector = text_vector(text, self.dimensions)
+        self.matrix[row] = vector
+        self.active[row] = True
+        if self.centroids is not None:
+            self.row_partition[row] = int(np.argmax(self.centroids @ vector))
+
+    def remove(self, memory_id):
+        """
+        Remove the vector of a memory
+
+        Args:
+            memory_id (str): The memory ID
+        """
+        row = self.rows.pop(memory_id, None)
+        if row is None:
+            return
+        self.matrix[row] = 0
+        self.active[row] = False
+        self.row_partition[row] = -1
+        self.row_ids[row] = None
+        self.free_rows.append(row)
+
+    def vector(self, memory_id):
+        """
+        Get the stored vector of a memory
+
+        Args:
+            memory_id (str): The memory ID
+
+        Returns:
+            numpy.ndarray: The vector, or None if the memory is not indexed
+        """
+        row = self.rows.get(memory_id)
+        return None if row is None else self.matrix[row]
+
+    def build_partitions(self, partitions=None, iterations=5, seed=0):
+        """
+        Cluster the vectors with k-means and assign every row to a partition
+
+        Args:
+            partitions (int, optional): Number of partitions; about sqrt(size) if omitted
+            iterations (int): k-means iterations
+            seed (int): Random seed for the initial centroids and sample
+        """
+        rows = np.flatnonzero(self.active[:self.next_row])
+        if not len(rows):
+            return
+        partitions = min(partitions or int(np.sqrt(len(rows))), len(rows))
+
+        # Train on a sample, then assign every row
+        rng = np.random.default_rng(seed)
+        sample = self.matrix[rng.choice(rows, size=min(len(rows), 20000), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=partitions, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for partition in range(partitions):
+                members = sample[assignment == partition]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm:
+                        centroids[partition] = centroid / norm
+
+        self.centroids = centroids
+        # In chunks, so the similarity matrix stays small
+        for start in range(0, len(rows), 16384):
+            chunk = rows[start:start + 16384]
+            self.row_partition[chunk] = np.argmax(self.matrix[chunk] @ centroids.T, axis=1)
+        self.partitioned_size = len(rows)
+
+    def search(self, vector, limit=5, exclude=()):
+        """
+        Find the memories whose vectors are most similar to a query vector
+
+        Args:
+            vector (numpy.ndarray): Normalized query vector
+            limit (int): Maximum number of results
+            exclude (iterable): Memory IDs to leave out
+
+        Returns:
+            list: (memory ID, cosine similarity) pairs, most similar first
+        """
+        exclude = set(exclude)
+        if not self.rows or limit <= 0 or not vector.any():
+            return []
+
+        # Partition once the index is large, and again whenever it has doubled
+        if len(self.rows) >= self.ivf_threshold and len(self.rows) >= 2 * self.partitioned_size:
+            self.build_partitions()
+
+        if self.centroids is not None and len(self.rows) >= self.ivf_threshold:
+            probes = np.argsort(self.centroids @ vector)[-self.probes:]
+            candidates = np.flatnonzero(np.isin(self.row_partition[:self.next_row], probes))
+        else:
+            candidates = np.flatnonzero(self.active[:self.next_row])
+        if not len(candidates):
+            return []
+
+        scores = self.matrix[candidates] @ vector
+        wanted = min(limit + len(exclude), len(candidates))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            memory_id = self.row_ids[candidates[position]]
+            if memory_id in exclude:
+                continue
+            results.append((memory_id, float(scores[position])))
+            if len(results) == limit:
+                break
+        return results